@@ -0,0 +1,47 @@
+"""audit jobs
+
+Revision ID: 9c3e5b7a2d41
+Revises: 61d898f041a9
+Create Date: 2026-10-17 10:12:45.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5b7a2d41'
+down_revision: Union[str, Sequence[str], None] = '61d898f041a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('audit_id', sa.String(length=36), nullable=False),
+    sa.Column('lane', sa.String(length=20), nullable=True, comment='队列通道'),
+    sa.Column('priority', sa.Integer(), nullable=True, comment='领取优先级，越小越先执行'),
+    sa.Column('status', sa.String(length=20), nullable=True, comment='任务状态'),
+    sa.Column('attempts', sa.Integer(), nullable=True, comment='已执行次数'),
+    sa.Column('max_attempts', sa.Integer(), nullable=True, comment='最大执行次数'),
+    sa.Column('deadline', sa.Float(), nullable=True, comment='单次执行截止时间（秒）'),
+    sa.Column('worker_id', sa.String(length=64), nullable=True, comment='执行中的工作者'),
+    sa.Column('error_message', sa.Text(), nullable=True, comment='错误信息'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+    sa.Column('started_at', sa.DateTime(), nullable=True, comment='开始执行时间'),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True, comment='最近心跳时间'),
+    sa.Column('finished_at', sa.DateTime(), nullable=True, comment='结束时间'),
+    sa.ForeignKeyConstraint(['audit_id'], ['audits.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_audit_jobs_claim', 'audit_jobs', ['status', 'priority', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_jobs_claim', table_name='audit_jobs')
+    op.drop_table('audit_jobs')
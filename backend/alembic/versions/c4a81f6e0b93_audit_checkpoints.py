@@ -0,0 +1,35 @@
+"""audit checkpoints
+
+Revision ID: c4a81f6e0b93
+Revises: 9c3e5b7a2d41
+Create Date: 2026-10-17 14:37:09.526310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a81f6e0b93'
+down_revision: Union[str, Sequence[str], None] = '9c3e5b7a2d41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_checkpoints',
+    sa.Column('thread_id', sa.String(length=64), nullable=False, comment='审计流程标识（通常为审计 ID）'),
+    sa.Column('next_node', sa.String(length=32), nullable=False, comment='下一个待执行节点，__end__ 表示流程已结束'),
+    sa.Column('step', sa.Integer(), nullable=True, comment='已完成的节点数'),
+    sa.Column('state', sa.LargeBinary(), nullable=False, comment='zlib 压缩的 JSON 状态'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新时间'),
+    sa.PrimaryKeyConstraint('thread_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('audit_checkpoints')
@@ -21,6 +21,7 @@ from app.models.schemas import (
 )
 from app.services.storage import file_storage
 from app.services.crud import DocumentCRUD, AuditCRUD
+from app.services.jobs import audit_workers, enqueue_audit
 from app.core.config import settings
 from app.core.database import get_db
 
@@ -149,20 +150,19 @@ async def start_audit(
             detail=f"文档尚未解析完成，当前状态: {doc.status}"
         )
 
-    # 创建审计任务
+    # 创建审计任务并加入持久化队列，由工作者池执行
     audit_id = str(uuid.uuid4())
-    AuditCRUD.create(db, audit_id, request.document_id)
-    AuditCRUD.update(db, audit_id, status="processing")
-
-    audit = AuditCRUD.get(db, audit_id)
-
-    # TODO: 添加后台审计任务
-    # background_tasks.add_task(run_audit_async, audit_id, request.document_id)
+    audit = AuditCRUD.create(db, audit_id, request.document_id)
+    try:
+        enqueue_audit(db, audit_id, lane=request.lane)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    audit_workers.notify()
 
     return AuditResult(
         audit_id=audit.id,
         document_id=audit.document_id,
-        status=TaskStatus.PROCESSING,
+        status=TaskStatus.PENDING,
         risk_score=None
     )
 
@@ -0,0 +1,33 @@
+"""
+规则引擎 API 接口
+查看符号引擎的规则执行统计
+"""
+
+from fastapi import APIRouter
+
+from app.core.symbolic.profiler import rule_profiler
+
+router = APIRouter()
+
+
+@router.get("/stats")
+async def get_rule_stats():
+    """
+    获取规则执行统计
+
+    按累计耗时降序返回每条规则的调用次数、违规率、异常次数与耗时；
+    未开启 SYMBOLIC_PROFILING 时只有异常计数。
+    """
+    rules = rule_profiler.snapshot()
+    return {
+        "enabled": rule_profiler.enabled,
+        "total": len(rules),
+        "rules": rules
+    }
+
+
+@router.delete("/stats")
+async def reset_rule_stats():
+    """清空规则执行统计"""
+    rule_profiler.reset()
+    return {"message": "规则执行统计已清空"}
@@ -17,10 +17,31 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     
     # 推理引擎配置
-    INFERENCE_MODE: str = "api"  # api / local
+    INFERENCE_MODE: str = "api"  # api / local / routing
+    INFERENCE_ENDPOINTS: str = ""  # routing 模式的端点，逗号分隔：http(s) 地址或 local:<模型路径>
+    LLM_HEDGE: bool = True  # routing 模式下主请求超过 p95 延迟时向次优端点发对冲请求
+    LLM_HEDGE_QUANTILE: float = 0.95  # 对冲触发的延迟分位数
+    LLM_HEDGE_MIN_DELAY: float = 0.05  # 对冲等待时间下限（秒）
     DEEPSEEK_API_KEY: str = ""
     DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
     LOCAL_MODEL_PATH: str = ""
+    LOCAL_BACKEND: str = ""  # 本地推理后端: vllm / stub，留空为 vllm；stub 仅用于测试
+    LOCAL_BATCH_SIZE: int = 8  # 本地推理微批最大批量
+    LOCAL_BATCH_WAIT_MS: float = 10.0  # 微批收集窗口（毫秒）
+    LLM_CACHE_FILE: str = ".llm_cache.sqlite3"  # 推理结果缓存（SQLite），留空则关闭
+    LLM_CACHE_TTL: float = 86400  # 缓存有效期（秒），0 表示不过期
+    LLM_CACHE_MAX_ENTRIES: int = 1000  # 缓存条目上限，按最近访问时间淘汰
+    LLM_STREAM: bool = False  # 使用流式接口，extracted_data 到达即开始符号校验
+    LLM_INITIAL_CONCURRENCY: int = 4  # 推理请求初始并发窗口
+    LLM_MAX_CONCURRENCY: int = 16  # 自适应并发窗口上限
+    LLM_MAX_RETRIES: int = 3  # 429 / 5xx / 网络错误的最大重试次数
+    LLM_REQUEST_DEADLINE: float = 120.0  # 单次推理调用（含重试）的截止时间（秒）
+    LLM_MAX_CONNECTIONS: int = 32  # 共享推理客户端的连接池上限
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 16  # 保持的空闲长连接数
+    LLM_KEEPALIVE_EXPIRY: float = 60.0  # 空闲长连接保留时间（秒）
+    PROMPT_COMPACTION: bool = True  # 只把资产负债表相关行送入模型
+    PROMPT_TOKEN_BUDGET: int = 4000  # 文档部分的 token 预算（本地估算），0 表示不限制
+    RETRY_PROMPT_MODE: str = "delta"  # 纠偏重试提示词: delta（只发违规字段与相关片段，返回补丁） / full（重发整份文档）
     
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./fincode.db"
@@ -32,7 +53,28 @@ class Settings(BaseSettings):
     
     # 审计配置
     MAX_RETRY_COUNT: int = 3  # 最大纠偏重试次数
+    AUDIT_DEADLINE: float = 600.0  # 单次审计流程的截止时间（秒），推理重试不会超出
+    AUDIT_WORKERS: int = 4  # 审计工作者数量，0 表示不在本进程执行审计任务
+    AUDIT_INTERACTIVE_WORKERS: int = 1  # 只领取 interactive 通道任务的工作者数量
+    AUDIT_JOB_DEADLINE: float = 900.0  # 单个任务单次执行的截止时间（秒）
+    AUDIT_JOB_MAX_ATTEMPTS: int = 3  # 任务最大执行次数（超时、失败、崩溃恢复均计入）
+    AUDIT_JOB_POLL_INTERVAL: float = 1.0  # 空闲工作者轮询队列的间隔（秒）
+    AUDIT_JOB_STALE_AFTER: float = 60.0  # 执行中任务心跳超过该秒数视为工作者失联
+    AUDIT_CHECKPOINTS: bool = True  # 每个流程节点完成后保存检查点，中断的审计从最后完成的节点续跑
+    AUDIT_FAST_PATH: bool = True  # 解析指标置信度为 HIGH 且关键规则全部通过时跳过大模型分析
+    AUDIT_SPECULATIVE: bool = True  # 首次抽取时文档解析器与大模型并行，解析结果先通过校验则取消大模型请求
+    AUDIT_SECTION_FANOUT: bool = False  # 按资产负债表/利润表/现金流量表/附注分段并行抽取后合并
+    AUDIT_SECTION_CONCURRENCY: int = 4  # 分段抽取的最大并行数
     BALANCE_TOLERANCE: float = 0.01  # 勾稽校验容差
+
+    # 规则库配置
+    RULES_DIR: Path = Path("rules")
+    RULES_RELOAD_INTERVAL: float = 5.0  # 规则目录 mtime 检查间隔（秒），0 表示关闭热加载
+    SYMBOLIC_BACKEND: str = "python"  # 规则执行后端: python / zen
+    ZEN_POOL_SIZE: int = 4  # Zen 引擎池大小
+    SYMBOLIC_PROFILING: bool = False  # 记录每条规则的耗时、调用与违规次数
+    SYMBOLIC_FAIL_FAST: bool = False  # 纠偏循环中间轮次遇到第一条违规即停止校验（结果不完整，后续轮次无法增量校验）
+    RULE_RESULT_CACHE_SIZE: int = 10000  # 规则结果 LRU 缓存条目数，0 表示关闭
     
     # 日志配置
     LOG_LEVEL: str = "INFO"
@@ -0,0 +1,89 @@
+"""
+动态微批处理
+把并发到达的推理请求聚合成批次（最大批量 + 最长等待窗口），一次性交给本地推理后端，
+再把结果分发回各自的调用方
+"""
+
+import asyncio
+import inspect
+from typing import Any, Callable, List, Optional, Tuple
+
+# 批处理函数：输入一批请求，返回等长的结果列表（同步函数在线程池中执行）
+BatchFunction = Callable[[List[Any]], Any]
+
+
+class MicroBatcher:
+    """
+    微批处理器
+
+    第一个请求到达后最多等待 max_wait 秒收集同批请求，凑满 max_batch_size 立即发出；
+    同一时刻只有一个批次在执行，执行期间到达的请求进入下一批。
+    """
+
+    def __init__(self, batch_fn: BatchFunction, max_batch_size: int = 8, max_wait: float = 0.01):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batches = 0  # 已执行的批次数
+        self.items = 0  # 已处理的请求数
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._worker: Optional[asyncio.Task] = None
+        self._full: Optional[asyncio.Event] = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        提交一个请求并等待其结果
+
+        Args:
+            item: 单个请求
+
+        Returns:
+            该请求对应的结果；批处理失败时抛出批处理的异常
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if self._worker is None or self._worker.done():
+            self._full = asyncio.Event()
+            self._worker = asyncio.ensure_future(self._drain())
+        elif len(self._pending) >= self.max_batch_size:
+            self._full.set()
+
+        return await future
+
+    async def _drain(self) -> None:
+        while self._pending:
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:len(batch)]
+            # 已取消的调用方不再占用批次
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            try:
+                outputs = await self._dispatch([item for item, _ in batch])
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"批处理返回 {len(outputs)} 个结果，期望 {len(batch)} 个")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+
+    async def _dispatch(self, items: List[Any]) -> List[Any]:
+        if inspect.iscoroutinefunction(self.batch_fn):
+            return list(await self.batch_fn(items))
+        return list(await asyncio.to_thread(self.batch_fn, items))
@@ -0,0 +1,152 @@
+"""
+推理结果缓存
+按 (模型, 系统提示词, 用户提示词, 温度) 的内容哈希缓存大模型的解析结果，
+存储在本地 SQLite 文件中，支持 TTL 过期与按最近访问时间的容量淘汰
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+
+class ResponseCache:
+    """
+    SQLite 响应缓存
+
+    数据库在首次读写时才创建；读写失败时只打印警告，调用方按未命中处理。
+    异步调用方使用 aget / aset，磁盘读写在线程池中执行，不阻塞事件循环。
+    """
+
+    def __init__(self, path: Path, ttl: float = 86400, max_entries: int = 1000):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+        """
+        生成缓存键
+
+        Args:
+            model: 模型名称
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            temperature: 采样温度
+
+        Returns:
+            请求内容的 sha256
+        """
+        payload = json.dumps(
+            [model, system_prompt, user_prompt, temperature],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        读取缓存
+
+        Returns:
+            缓存的结果，未命中或已过期时返回 None
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, created_at = row
+                if self.ttl > 0 and now - created_at > self.ttl:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            return json.loads(value)
+        except Exception as e:
+            print(f"Warning: Failed to read response cache {self.path}: {e}")
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        """写入缓存，超出容量时淘汰最久未访问的条目"""
+        now = time.time()
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, payload, now, now)
+                )
+                count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if self.max_entries > 0 and count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+                conn.commit()
+        except Exception as e:
+            print(f"Warning: Failed to write response cache {self.path}: {e}")
+
+    async def aget(self, key: str) -> Optional[dict]:
+        """在线程池中执行 get"""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: dict) -> None:
+        """在线程池中执行 set"""
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _default_response_cache() -> Optional[ResponseCache]:
+    if not settings.LLM_CACHE_FILE:
+        return None
+    return ResponseCache(
+        Path(settings.LLM_CACHE_FILE),
+        ttl=settings.LLM_CACHE_TTL,
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES
+    )
+
+
+# 全局实例（LLM_CACHE_FILE 为空时关闭）
+response_cache = _default_response_cache()
@@ -1,8 +1,31 @@
 import os
+import json
+import time
+import asyncio
 import httpx
-from typing import Optional
+from typing import AsyncIterator, Optional
 from abc import ABC, abstractmethod
 
+from app.core.config import settings
+from app.core.neural.cache import ResponseCache, response_cache
+from app.core.neural.singleflight import SingleFlight, inflight_requests
+from app.core.neural.http import http_clients
+from app.core.neural.prompts.audit import build_system_prompt, build_user_prompt
+from app.core.neural.batching import MicroBatcher
+from app.core.neural.local_backends import LocalBackend, create_local_backend
+from app.core.neural.limiter import (
+    AdaptiveLimiter,
+    backoff_delay,
+    current_deadline,
+    inference_limiter,
+    parse_retry_after,
+)
+from app.core.neural.streaming import IncrementalJSONParser, iter_sse_content, parse_json_object
+
+# 可重试的响应状态：限流与服务端暂时性错误
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
 class InferenceEngineAdapter(ABC):
     """推理引擎适配器抽象基类"""
     
@@ -24,122 +47,295 @@ class InferenceEngineAdapter(ABC):
 class DeepSeekAPIAdapter(InferenceEngineAdapter):
     """DeepSeek R1 API 模式适配器"""
     
-    def __init__(self, api_key: str, base_url: str = "https://api.deepseek.com"):
+    MODEL = "deepseek-reasoner"  # DeepSeek R1 推理模型
+    TEMPERATURE = 0.3  # 降低温度以提高一致性
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.deepseek.com",
+        response_cache: Optional[ResponseCache] = None,
+        stream: bool = False,
+        single_flight: Optional[SingleFlight] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        max_retries: int = 3,
+        request_deadline: float = 120.0,
+        client: Optional[httpx.AsyncClient] = None
+    ):
         self.api_key = api_key
         self.base_url = base_url
-        self.client = httpx.AsyncClient(
-            base_url=base_url,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            timeout=30.0
-        )
+        self.response_cache = response_cache
+        self.stream = stream  # analyze 内部走流式接口
+        # 进程内合并指纹相同的并发请求
+        self.single_flight = single_flight if single_flight is not None else inflight_requests
+        # 进程内共享的自适应并发窗口；限流、5xx 与网络错误在截止时间内退避重试
+        self.limiter = limiter if limiter is not None else inference_limiter
+        self.max_retries = max_retries
+        self.request_deadline = request_deadline
+        # 默认使用进程级共享的 HTTP/2 长连接客户端
+        self.client = client if client is not None else http_clients.get(base_url, api_key)
     
     def _build_system_prompt(self) -> str:
         """构建系统提示词，定义输出格式"""
-        return """你是一个专业的财务审计助手。请对给定的财务数据进行分析，并按照以下JSON格式返回结果：
-
-{
-  "conclusion": "分析结论（简短明确）",
-  "confidence": 0.0-1.0,
-  "reasoning_chain": [
-    "步骤1: 具体分析过程",
-    "步骤2: 计算过程",
-    ...
-  ],
-  "extracted_data": {
-    "资产总计": 数值,
-    "负债总计": 数值,
-    "权益总计": 数值
-  }
-}
-
-要求：
-1. reasoning_chain 必须包含至少3个步骤
-2. confidence 基于数据完整性和一致性评估
-3. 严格按照JSON格式返回，不要包含markdown标记
-4. 如果有纠偏反馈，请在推理步骤中体现
-"""
+        return build_system_prompt()
     
     def _build_user_prompt(self, data: dict, feedback: Optional[str] = None) -> str:
         """构建用户提示词"""
-        prompt = f"请分析以下财务数据：\n\n{data}\n\n"
-        if feedback:
-            prompt += f"纠偏反馈：\n{feedback}\n\n"
-        prompt += "请输出结构化JSON分析结果。"
-        return prompt
+        return build_user_prompt(data, feedback)
     
+    def _build_request(self, system_prompt: str, user_prompt: str, stream: bool = False) -> dict:
+        """构建 /chat/completions 请求体"""
+        request = {
+            "model": self.MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": self.TEMPERATURE,
+            "response_format": {"type": "json_object"}  # 强制 JSON 输出
+        }
+        if stream:
+            request["stream"] = True
+        return request
+
+    def _cache_key(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        return ResponseCache.make_key(self.MODEL, system_prompt, user_prompt, self.TEMPERATURE)
+
+    def _deadline(self) -> float:
+        """本次调用的截止时间：单次请求上限与审计任务截止时间取较早者"""
+        deadline = time.monotonic() + self.request_deadline
+        scoped = current_deadline()
+        return deadline if scoped is None else min(deadline, scoped)
+
+    def _retry_delay(self, attempt: int, deadline: float, retry_after: Optional[float], error: str) -> float:
+        """
+        计算下一次重试前的等待时间
+
+        优先遵守 Retry-After，否则使用带抖动的指数退避。
+
+        Raises:
+            Exception: 重试次数用尽或等待后将超过截止时间
+        """
+        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+        if attempt >= self.max_retries or time.monotonic() + delay > deadline:
+            raise Exception(error)
+        return delay
+
+    async def _post(self, body: dict) -> httpx.Response:
+        """发送非流式请求，返回 200 响应"""
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            async with self.limiter.slot() as slot:
+                try:
+                    response = await self.client.post("/chat/completions", json=body)
+                except httpx.TransportError as e:
+                    error, retry_after = f"API request failed: {e!r}", None
+                else:
+                    if response.status_code == 200:
+                        slot.succeeded()
+                        return response
+                    error = f"API request failed: {response.status_code} - {response.text}"
+                    if response.status_code not in RETRYABLE_STATUS:
+                        raise Exception(error)
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if response.status_code == 429:
+                        slot.throttled(retry_after)
+            await asyncio.sleep(self._retry_delay(attempt, deadline, retry_after, error))
+            attempt += 1
+
+    def _fallback_result(self, error: Exception) -> dict:
+        """错误处理：返回降级结果"""
+        return {
+            "conclusion": f"分析失败: {str(error)}",
+            "confidence": 0.0,
+            "reasoning_chain": ["API 调用异常"],
+            "extracted_data": {},
+            "cache_hit": False
+        }
+
     async def analyze(self, data: dict, feedback: Optional[str] = None) -> dict:
-        """调用 DeepSeek R1 API 进行分析"""
+        """
+        调用 DeepSeek R1 API 进行分析
+
+        配置了响应缓存时，相同请求内容直接返回缓存结果；
+        结果中的 cache_hit 标明是否命中缓存，降级结果不写入缓存。
+        指纹相同的并发调用合并为一次请求，各调用方得到结果的独立副本。
+        """
         system_prompt = self._build_system_prompt()
         user_prompt = self._build_user_prompt(data, feedback)
+        fingerprint = self._fingerprint(system_prompt, user_prompt)
+
+        if self.stream:
+            request = lambda: self._consume_stream(data, feedback)
+        else:
+            request = lambda: self._request(system_prompt, user_prompt)
+
+        result = await self.single_flight.do(fingerprint, request)
+        return {**result}
+
+    def _fingerprint(self, system_prompt: str, user_prompt: str) -> tuple:
+        return (
+            self.base_url,
+            ResponseCache.make_key(self.MODEL, system_prompt, user_prompt, self.TEMPERATURE)
+        )
+
+    async def _consume_stream(self, data: dict, feedback: Optional[str]) -> dict:
+        result: dict = {}
+        async for event in self.analyze_stream(data, feedback):
+            if event["event"] == "done":
+                result = event["result"]
+        return result
+
+    async def _request(self, system_prompt: str, user_prompt: str) -> dict:
+        """发出非流式请求（先查响应缓存）"""
+        cache_key = self._cache_key(system_prompt, user_prompt)
+        if cache_key is not None:
+            cached = await self.response_cache.aget(cache_key)
+            if cached is not None:
+                return {**cached, "cache_hit": True}
         
         try:
-            response = await self.client.post(
-                "/chat/completions",
-                json={
-                    "model": "deepseek-reasoner",  # DeepSeek R1 推理模型
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "temperature": 0.3,  # 降低温度以提高一致性
-                    "response_format": {"type": "json_object"}  # 强制 JSON 输出
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"API request failed: {response.status_code} - {response.text}")
+            response = await self._post(self._build_request(system_prompt, user_prompt))
                 
             # 解析响应
             content = response.json()["choices"][0]["message"]["content"]
             
             # 尝试解析 JSON
-            import json
             try:
                 result = json.loads(content)
             except json.JSONDecodeError:
-                # 如果不是纯 JSON，尝试提取 JSON 部分
-                import re
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
-                else:
-                    raise ValueError(f"Could not parse JSON from response: {content}")
+                # 如果不是纯 JSON，提取第一个完整的 JSON 对象
+                result = parse_json_object(content)
+
+            if cache_key is not None:
+                await self.response_cache.aset(cache_key, result)
             
-            return result
+            return {**result, "cache_hit": False}
             
         except Exception as e:
-            # 错误处理：返回降级结果
-            return {
-                "conclusion": f"分析失败: {str(e)}",
-                "confidence": 0.0,
-                "reasoning_chain": ["API 调用异常"],
-                "extracted_data": {}
-            }
+            return self._fallback_result(e)
+
+    async def analyze_stream(self, data: dict, feedback: Optional[str] = None) -> AsyncIterator[dict]:
+        """
+        以流式接口调用 DeepSeek R1 API，增量解析输出
+
+        Args:
+            data: 输入数据（文档解析结果）
+            feedback: 符号引擎的纠偏反馈（可选）
+
+        Yields:
+            {"event": "field", "key": 字段名, "value": 值}：某个顶层字段已完整到达
+            {"event": "done", "result": 完整结果}：最后一个事件，失败时为降级结果
+
+        指纹相同的并发流式调用共享一次上游流，后加入的调用方先重放已到达的字段。
+        """
+        system_prompt = self._build_system_prompt()
+        user_prompt = self._build_user_prompt(data, feedback)
+        stream = self.single_flight.stream(
+            self._fingerprint(system_prompt, user_prompt),
+            lambda: self._stream(system_prompt, user_prompt)
+        )
+        try:
+            async for event in stream:
+                yield event
+        finally:
+            # 调用方提前退出时立即退订，最后一个订阅方退出会取消上游流
+            await stream.aclose()
+
+    async def _stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[dict]:
+        """发出流式请求（先查响应缓存），事件格式同 analyze_stream"""
+        cache_key = self._cache_key(system_prompt, user_prompt)
+        if cache_key is not None:
+            cached = await self.response_cache.aget(cache_key)
+            if cached is not None:
+                for key, value in cached.items():
+                    yield {"event": "field", "key": key, "value": value}
+                yield {"event": "done", "result": {**cached, "cache_hit": True}}
+                return
+
+        parser = IncrementalJSONParser()
+        request = self._build_request(system_prompt, user_prompt, stream=True)
+        deadline = self._deadline()
+        attempt = 0
+        try:
+            while True:
+                async with self.limiter.slot() as slot:
+                    try:
+                        async with self.client.stream("POST", "/chat/completions", json=request) as response:
+                            if response.status_code == 200:
+                                async for content in iter_sse_content(response):
+                                    for key, value in parser.feed(content):
+                                        yield {"event": "field", "key": key, "value": value}
+                                slot.succeeded()
+                                break
+
+                            body = (await response.aread()).decode("utf-8", errors="replace")
+                            error = f"API request failed: {response.status_code} - {body}"
+                            if response.status_code not in RETRYABLE_STATUS:
+                                raise Exception(error)
+                            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                            if response.status_code == 429:
+                                slot.throttled(retry_after)
+                    except httpx.TransportError as e:
+                        # 已产出字段后中断的流无法重试
+                        if parser.result:
+                            raise
+                        error, retry_after = f"API request failed: {e!r}", None
+                await asyncio.sleep(self._retry_delay(attempt, deadline, retry_after, error))
+                attempt += 1
+
+            if not parser.done:
+                raise ValueError("Could not parse JSON from response: stream ended before the object closed")
+            result = parser.result
+
+        except Exception as e:
+            yield {"event": "done", "result": self._fallback_result(e)}
+            return
+
+        if cache_key is not None:
+            await self.response_cache.aset(cache_key, result)
+        yield {"event": "done", "result": {**result, "cache_hit": False}}
 
     async def close(self):
-        """关闭客户端连接"""
-        await self.client.aclose()
+        """关闭客户端连接（共享客户端由注册表在应用退出时统一关闭）"""
+        if not http_clients.owns(self.client):
+            await self.client.aclose()
 
 
 class LocalModelAdapter(InferenceEngineAdapter):
     """本地私有化模型适配器 (vLLM)"""
     
-    def __init__(self, model_path: str):
+    def __init__(
+        self,
+        model_path: str,
+        backend: Optional[LocalBackend] = None,
+        max_batch_size: int = 8,
+        max_wait: float = 0.01
+    ):
         self.model_path = model_path
-        # TODO: 初始化 vLLM 推理引擎
+        self.backend = backend or create_local_backend(model_path)
+        # 并发的 analyze 调用聚合成批次交给本地后端
+        self.batcher = MicroBatcher(self.backend.generate, max_batch_size=max_batch_size, max_wait=max_wait)
     
     async def analyze(self, data: dict, feedback: Optional[str] = None) -> dict:
-        """调用本地模型进行分析"""
-        # TODO: 实现本地推理逻辑
-        return {
-            "conclusion": "本地模型分析占位",
-            "confidence": 0.0,
-            "reasoning_chain": [],
-            "extracted_data": {}
-        }
+        """调用本地模型进行分析（与其他并发调用合批推理）"""
+        prompt = (build_system_prompt(), build_user_prompt(data, feedback))
+        try:
+            content = await self.batcher.submit(prompt)
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError:
+                return parse_json_object(content)
+        except Exception as e:
+            return {
+                "conclusion": f"分析失败: {str(e)}",
+                "confidence": 0.0,
+                "reasoning_chain": ["本地推理异常"],
+                "extracted_data": {}
+            }
 
 
 class InferenceEngineFactory:
@@ -152,18 +348,67 @@ class InferenceEngineFactory:
         
         INFERENCE_MODE=api -> DeepSeekAPIAdapter
         INFERENCE_MODE=local -> LocalModelAdapter
+        INFERENCE_MODE=routing -> RoutingAdapter（INFERENCE_ENDPOINTS 中的多个端点）
         """
         mode = os.getenv("INFERENCE_MODE", "api")
         
         if mode == "api":
-            api_key = os.getenv("DEEPSEEK_API_KEY", "")
-            if not api_key:
-                raise ValueError("DEEPSEEK_API_KEY 环境变量未设置")
-            return DeepSeekAPIAdapter(api_key)
+            return InferenceEngineFactory._create_api(settings.DEEPSEEK_BASE_URL)
         elif mode == "local":
             model_path = os.getenv("LOCAL_MODEL_PATH", "")
             if not model_path:
                 raise ValueError("LOCAL_MODEL_PATH 环境变量未设置")
-            return LocalModelAdapter(model_path)
+            return InferenceEngineFactory._create_local(model_path)
+        elif mode == "routing":
+            return InferenceEngineFactory._create_routing()
         else:
             raise ValueError(f"不支持的推理模式: {mode}")
+
+    @staticmethod
+    def _create_api(base_url: str) -> DeepSeekAPIAdapter:
+        api_key = os.getenv("DEEPSEEK_API_KEY", "")
+        if not api_key:
+            raise ValueError("DEEPSEEK_API_KEY 环境变量未设置")
+        return DeepSeekAPIAdapter(
+            api_key,
+            base_url=base_url,
+            response_cache=response_cache,
+            stream=settings.LLM_STREAM,
+            max_retries=settings.LLM_MAX_RETRIES,
+            request_deadline=settings.LLM_REQUEST_DEADLINE
+        )
+
+    @staticmethod
+    def _create_local(model_path: str) -> LocalModelAdapter:
+        return LocalModelAdapter(
+            model_path,
+            backend=create_local_backend(model_path, settings.LOCAL_BACKEND or None),
+            max_batch_size=settings.LOCAL_BATCH_SIZE,
+            max_wait=settings.LOCAL_BATCH_WAIT_MS / 1000
+        )
+
+    @staticmethod
+    def _create_routing() -> InferenceEngineAdapter:
+        """
+        INFERENCE_ENDPOINTS 为逗号分隔的端点列表：
+        http(s) 地址使用 DeepSeek 兼容接口，local:<模型路径> 使用本地模型
+        """
+        from app.core.neural.routing import RoutingAdapter
+
+        entries = [e.strip() for e in settings.INFERENCE_ENDPOINTS.split(",") if e.strip()]
+        if not entries:
+            raise ValueError("INFERENCE_ENDPOINTS 环境变量未设置")
+
+        endpoints = []
+        for entry in entries:
+            if entry.startswith("local:"):
+                endpoints.append((entry, InferenceEngineFactory._create_local(entry[len("local:"):])))
+            else:
+                endpoints.append((entry, InferenceEngineFactory._create_api(entry)))
+
+        return RoutingAdapter(
+            endpoints,
+            hedge=settings.LLM_HEDGE,
+            hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+            min_hedge_delay=settings.LLM_HEDGE_MIN_DELAY
+        )
@@ -0,0 +1,102 @@
+"""
+推理 HTTP 客户端注册表
+同一 (base_url, api_key) 在进程内共享一个启用 HTTP/2 与长连接的 AsyncClient，
+TLS 握手与建连开销在多次审计间摊销；应用退出时统一关闭
+"""
+
+import asyncio
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+# HTTP/2 需要 h2（httpx[http2]），未安装时退回 HTTP/1.1 长连接
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientRegistry:
+    """
+    进程级 AsyncClient 注册表
+
+    客户端按创建时所在的事件循环区分，事件循环关闭后对应的客户端被丢弃重建。
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        max_keepalive_connections: int = 16,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 30.0
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = timeout
+        self._clients: Dict[Tuple[Optional[int], str, str], Tuple[httpx.AsyncClient, Optional[asyncio.AbstractEventLoop]]] = {}
+
+    def get(self, base_url: str, api_key: str) -> httpx.AsyncClient:
+        """
+        获取（必要时创建）共享客户端
+
+        Args:
+            base_url: 接口地址
+            api_key: 鉴权密钥
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        for key, (_, owner) in list(self._clients.items()):
+            if owner is not None and owner.is_closed():
+                del self._clients[key]
+
+        key = (id(loop) if loop is not None else None, base_url, api_key)
+        entry = self._clients.get(key)
+        if entry is not None and not entry[0].is_closed:
+            return entry[0]
+
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=HTTP2_AVAILABLE
+        )
+        self._clients[key] = (client, loop)
+        return client
+
+    def owns(self, client: httpx.AsyncClient) -> bool:
+        """客户端是否由注册表管理（调用方不应自行关闭）"""
+        return any(entry[0] is client for entry in self._clients.values())
+
+    async def aclose(self) -> None:
+        """关闭全部客户端（应用退出时调用）"""
+        clients = [client for client, _ in self._clients.values()]
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"Warning: Failed to close HTTP client: {e}")
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+# 全局实例
+http_clients = HTTPClientRegistry(
+    max_connections=settings.LLM_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY
+)
@@ -0,0 +1,202 @@
+"""
+推理请求自适应限流
+按观测到的延迟与 429 限流信号（AIMD）调整并发窗口，遵守 Retry-After，
+并提供带抖动的退避与按审计任务划分的截止时间
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Deque, Iterator, Optional
+
+from app.core.config import settings
+
+# 延迟超过基线的倍数时视为拥塞
+LATENCY_TOLERANCE = 2.0
+
+# 拥塞时的窗口缩减系数（429 时再减半）
+LATENCY_BACKOFF = 0.9
+THROTTLE_BACKOFF = 0.5
+
+# 每个样本基线允许上浮的比例，使基线能跟随服务端真实延迟上升
+BASELINE_DRIFT = 1.05
+
+# 当前审计任务的截止时间（time.monotonic() 时刻）
+_deadline: ContextVar[Optional[float]] = ContextVar("inference_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[float]:
+    """
+    为当前上下文（及其派生的任务）设置截止时间，已有更早的截止时间时保留更早者
+
+    Args:
+        seconds: 从现在起的剩余秒数
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """当前上下文的截止时间，未设置时返回 None"""
+    return _deadline.get()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 头
+
+    Args:
+        value: 秒数或 HTTP 日期
+
+    Returns:
+        需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """指数退避（full jitter）：在 [0, min(cap, base * 2^attempt)] 内均匀取值"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发限制器
+
+    请求成功且延迟未明显高于基线时窗口加 1/limit（每个窗口约加 1），
+    延迟超过基线 LATENCY_TOLERANCE 倍时乘以 LATENCY_BACKOFF，收到 429 时减半，
+    并在 Retry-After 期间暂停发放新的并发槽位。
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.in_flight = 0
+        self.baseline: Optional[float] = None  # 基线延迟（秒）
+        self.blocked_until = 0.0  # time.monotonic() 时刻
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def slot(self) -> "LimiterSlot":
+        """占用一个并发槽位：async with limiter.slot() as slot: ..."""
+        return LimiterSlot(self)
+
+    async def acquire(self) -> None:
+        """等待 Retry-After 暂停结束并取得槽位"""
+        while True:
+            pause = self.blocked_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # 已被唤醒却取消时，把唤醒机会转交给下一个等待者
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        """归还槽位并唤醒等待者"""
+        self.in_flight = max(0, self.in_flight - 1)
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            try:
+                waiter.set_result(None)
+            except RuntimeError:
+                # 等待者所在的事件循环已关闭
+                continue
+            free -= 1
+
+    def on_success(self, latency: float) -> None:
+        """记录一次成功请求的延迟"""
+        if self.baseline is None:
+            self.baseline = latency
+        else:
+            self.baseline = min(latency, self.baseline * BASELINE_DRIFT)
+
+        if latency > self.baseline * LATENCY_TOLERANCE:
+            self.limit = max(float(self.min_limit), self.limit * LATENCY_BACKOFF)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """记录一次 429 限流"""
+        self.limit = max(float(self.min_limit), self.limit * THROTTLE_BACKOFF)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+
+class LimiterSlot:
+    """并发槽位，退出时根据标记的结果调整窗口"""
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        self.limiter = limiter
+        self.started = 0.0
+        self._succeeded = False
+        self._throttled = False
+        self._retry_after: Optional[float] = None
+
+    def succeeded(self) -> None:
+        """标记请求成功，退出时计入延迟"""
+        self._succeeded = True
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """标记请求被限流"""
+        self._throttled = True
+        self._retry_after = retry_after
+
+    async def __aenter__(self) -> "LimiterSlot":
+        await self.limiter.acquire()
+        self.started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._throttled:
+            self.limiter.on_throttle(self._retry_after)
+        elif self._succeeded:
+            self.limiter.on_success(time.monotonic() - self.started)
+        self.limiter.release()
+
+
+# 全局实例（所有推理客户端共享）
+inference_limiter = AdaptiveLimiter(
+    initial=settings.LLM_INITIAL_CONCURRENCY,
+    max_limit=settings.LLM_MAX_CONCURRENCY
+)
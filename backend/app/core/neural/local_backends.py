@@ -0,0 +1,116 @@
+"""
+本地推理后端
+LocalModelAdapter 的批量生成实现：vLLM（GPU，需安装 vllm）与仅用于测试的 CPU 桩后端
+"""
+
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+# vllm is optional; the vllm backend raises on creation if it's not installed
+try:
+    import vllm
+    VLLM_AVAILABLE = True
+except ImportError:
+    vllm = None
+    VLLM_AVAILABLE = False
+
+# 一次对话请求：(系统提示词, 用户提示词)
+ChatPrompt = Tuple[str, str]
+
+BACKEND_VLLM = "vllm"
+BACKEND_STUB = "stub"
+
+
+class LocalBackend(ABC):
+    """本地推理后端抽象基类"""
+
+    @abstractmethod
+    def generate(self, prompts: List[ChatPrompt]) -> List[str]:
+        """
+        批量生成
+
+        Args:
+            prompts: 一批对话请求
+
+        Returns:
+            与输入等长的模型输出文本
+        """
+        pass
+
+
+class VLLMBackend(LocalBackend):
+    """vLLM 离线批量推理后端，模型在首次调用时加载"""
+
+    def __init__(self, model_path: str, temperature: float = 0.3, max_tokens: int = 2048):
+        if not VLLM_AVAILABLE:
+            raise RuntimeError("vllm 未安装，无法加载本地推理后端（仅测试时可设置 LOCAL_BACKEND=stub）")
+        self.model_path = model_path
+        self.sampling_params = vllm.SamplingParams(temperature=temperature, max_tokens=max_tokens)
+        self._llm = None
+        self._lock = threading.Lock()
+
+    def _get_llm(self):
+        with self._lock:
+            if self._llm is None:
+                self._llm = vllm.LLM(model=self.model_path)
+            return self._llm
+
+    def generate(self, prompts: List[ChatPrompt]) -> List[str]:
+        llm = self._get_llm()
+        tokenizer = llm.get_tokenizer()
+        texts = [
+            tokenizer.apply_chat_template(
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                tokenize=False,
+                add_generation_prompt=True
+            )
+            for system_prompt, user_prompt in prompts
+        ]
+        outputs = llm.generate(texts, self.sampling_params)
+        return [output.outputs[0].text for output in outputs]
+
+
+class StubBackend(LocalBackend):
+    """CPU 桩后端：返回固定结构的结果，记录每批大小，用于测试"""
+
+    def __init__(self):
+        self.batch_sizes: List[int] = []
+
+    def generate(self, prompts: List[ChatPrompt]) -> List[str]:
+        self.batch_sizes.append(len(prompts))
+        return [
+            json.dumps({
+                "conclusion": "本地模型分析占位",
+                "confidence": 0.0,
+                "reasoning_chain": [f"批量推理：本批 {len(prompts)} 个请求"],
+                "extracted_data": {}
+            }, ensure_ascii=False)
+            for _ in prompts
+        ]
+
+
+def create_local_backend(model_path: str, kind: Optional[str] = None) -> LocalBackend:
+    """
+    创建本地推理后端
+
+    Args:
+        model_path: 模型路径
+        kind: vllm / stub，默认 vllm；桩后端只返回占位结果，必须显式指定
+
+    Returns:
+        推理后端
+
+    Raises:
+        RuntimeError: 使用 vllm 但未安装
+    """
+    kind = kind or BACKEND_VLLM
+    if kind == BACKEND_VLLM:
+        return VLLMBackend(model_path)
+    if kind == BACKEND_STUB:
+        return StubBackend()
+    raise ValueError(f"不支持的本地推理后端: {kind}")
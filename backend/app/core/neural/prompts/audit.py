@@ -0,0 +1,82 @@
+"""
+财务审计分析 Prompt
+所有推理适配器共用的系统提示词与用户提示词模板
+"""
+
+import json
+from typing import Optional
+
+# 纠偏重试的增量请求：data = {CORRECTION_KEY: {"extracted_data", "fields", "snippets"}}
+CORRECTION_KEY = "correction"
+
+SYSTEM_PROMPT = """你是一个专业的财务审计助手。请对给定的财务数据进行分析，并按照以下JSON格式返回结果：
+
+{
+  "conclusion": "分析结论（简短明确）",
+  "confidence": 0.0-1.0,
+  "reasoning_chain": [
+    "步骤1: 具体分析过程",
+    "步骤2: 计算过程",
+    ...
+  ],
+  "extracted_data": {
+    "资产总计": 数值,
+    "负债总计": 数值,
+    "权益总计": 数值
+  }
+}
+
+要求：
+1. reasoning_chain 必须包含至少3个步骤
+2. confidence 基于数据完整性和一致性评估
+3. 严格按照JSON格式返回，不要包含markdown标记
+4. 如果有纠偏反馈，请在推理步骤中体现
+"""
+
+
+def build_system_prompt() -> str:
+    """构建系统提示词，定义输出格式"""
+    return SYSTEM_PROMPT
+
+
+def build_user_prompt(data: dict, feedback: Optional[str] = None) -> str:
+    """构建用户提示词；只有 raw_text 时原样嵌入文本，避免 dict 转义换行浪费 token"""
+    if CORRECTION_KEY in data:
+        return build_correction_prompt(data[CORRECTION_KEY], feedback)
+    if set(data) == {"raw_text"} and isinstance(data["raw_text"], str):
+        body = data["raw_text"]
+    else:
+        body = json.dumps(data, ensure_ascii=False, default=str)
+    prompt = f"请分析以下财务数据：\n\n{body}\n\n"
+    if feedback:
+        prompt += f"纠偏反馈：\n{feedback}\n\n"
+    prompt += "请输出结构化JSON分析结果。"
+    return prompt
+
+
+def build_correction_prompt(correction: dict, feedback: Optional[str] = None) -> str:
+    """
+    构建纠偏重试的增量提示词
+
+    不再重发整份文档，只给出上一次的提取结果、违规规则与相关原文片段，
+    要求模型在 extracted_data 中只返回需要修改的字段（补丁），由编排器合并。
+
+    Args:
+        correction: {"extracted_data": 上一次提取结果, "fields": 需复核的字段, "snippets": 原文片段}
+        feedback: 符号引擎的纠偏反馈
+    """
+    previous = json.dumps(correction.get("extracted_data", {}), ensure_ascii=False, default=str)
+    prompt = f"上一次提取的财务数据未通过规则校验：\n\n{previous}\n\n"
+    if feedback:
+        prompt += f"纠偏反馈：\n{feedback}\n\n"
+    fields = correction.get("fields") or []
+    if fields:
+        prompt += "需要复核的字段：" + "、".join(fields) + "\n\n"
+    snippets = correction.get("snippets") or []
+    if snippets:
+        prompt += "相关原文片段：\n" + "\n".join(snippets) + "\n\n"
+    prompt += (
+        "请只复核上述字段：extracted_data 中只包含需要修改的字段（保持原有层级），"
+        "未修改的字段不要输出；请输出结构化JSON分析结果。"
+    )
+    return prompt
@@ -0,0 +1,219 @@
+"""
+文档压缩
+在送入大模型之前只保留与资产负债表指标相关的表格行，统一数字格式，
+并按本地 token 估算把文档控制在预算之内
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Sequence
+
+# tiktoken is optional (not in requirements.txt); without it token counts use the character heuristic
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+# 资产负债表相关的行关键词
+BALANCE_SHEET_KEYWORDS = (
+    "资产", "负债", "权益", "股东", "所有者",
+    "货币资金", "应收", "预付", "存货", "固定资产", "无形资产", "商誉", "在建工程",
+    "短期借款", "长期借款", "应付", "预收", "合同负债",
+    "实收资本", "股本", "资本公积", "盈余公积", "未分配利润",
+)
+
+# 汇总行关键词：优先保留
+TOTAL_KEYWORDS = ("合计", "总计", "总额")
+
+# 资产负债表标题，命中后保留其后若干行作为表头上下文
+SECTION_TITLES = ("资产负债表", "合并资产负债表", "balance sheet")
+SECTION_CONTEXT_LINES = 2
+
+# 抽取字段名（extracted_data 的路径分段）对应的原文科目名
+FIELD_ALIASES = {
+    "assets": ("资产总计", "资产合计", "总资产"),
+    "liabilities": ("负债合计", "负债总计", "总负债"),
+    "equity": ("所有者权益合计", "股东权益合计", "权益合计", "权益总计"),
+    "current_assets": ("流动资产合计",),
+    "current_liabilities": ("流动负债合计",),
+    "cash": ("货币资金",),
+    "inventory": ("存货",),
+}
+
+# 没有区分度的路径分段，不作为检索词
+GENERIC_SEGMENTS = {"total", "value", "amount", "current", "previous"}
+
+_NUMBER = re.compile(r"[-+(（]?\d[\d,，]*(?:\.\d+)?[)）]?")
+# 可安全规整的数字：完整的千分位分组或普通整数，可带小数；前后紧邻数字、小数点或 ",数字"
+# 的（日期 2023.10.31、逗号分隔的单元格 1000,2000）不处理
+_AMOUNT = re.compile(r"(?<![\d.])(?<!\d,)(-?)(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?(?!\.?\d|,\d)")
+# 括号负数：括号成对且内部是带千分位或小数的金额，如 (12,000.50)
+_PAREN_NEGATIVE = re.compile(r"\(\s*(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+\.\d+)\s*\)")
+_CJK = re.compile(r"[㐀-鿿豈-﫿]")
+_SPACES = re.compile(r"[ \t　]+")
+
+
+@dataclass
+class CompactionResult:
+    """压缩结果"""
+    text: str
+    original_tokens: int
+    tokens: int
+    kept_lines: int
+    total_lines: int
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算 token 数
+
+    安装可选依赖 tiktoken 时使用 cl100k_base 编码计数；否则（默认）按字符估算：
+    每个汉字约 0.6 个 token，其他非空白字符约 4 个一个 token。
+    """
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    cjk = len(_CJK.findall(text))
+    other = len(text) - cjk - sum(1 for ch in text if ch.isspace())
+    return int(cjk * 0.6 + max(other, 0) / 4) + 1
+
+
+def normalize_numbers(text: str) -> str:
+    """
+    统一数字格式：全角转半角、去掉千分位、去掉全零小数（.00）、成对括号的金额转为负号
+
+    日期、逗号分隔的多个数值、不成对的括号保持原样。
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = _PAREN_NEGATIVE.sub(lambda match: f"-{match.group(1)}", text)
+
+    def normalize(match: "re.Match") -> str:
+        sign, integer, fraction = match.group(1), match.group(2), match.group(3) or ""
+        if fraction and not fraction[1:].strip("0"):
+            fraction = ""
+        return f"{sign}{integer.replace(',', '')}{fraction}"
+
+    return _AMOUNT.sub(normalize, text)
+
+
+def compact_document(
+    text: str,
+    token_budget: int,
+    keywords: Sequence[str] = BALANCE_SHEET_KEYWORDS
+) -> CompactionResult:
+    """
+    压缩文档
+
+    汇总行、资产负债表标题及表头、含关键词且含数字的行依次优先保留，
+    在预算内按原文顺序输出；没有任何相关行时按预算截取开头。
+
+    Args:
+        text: 原始文档文本
+        token_budget: token 预算，0 表示不限制
+        keywords: 相关行关键词
+
+    Returns:
+        压缩结果
+    """
+    original_tokens = estimate_tokens(text)
+    lines = [_SPACES.sub(" ", normalize_numbers(line)).strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+
+    scored: List[tuple] = []
+    context_left = 0
+    for index, line in enumerate(lines):
+        lowered = line.lower()
+        has_number = bool(_NUMBER.search(line))
+        if any(title in lowered for title in SECTION_TITLES):
+            score = 3
+            context_left = SECTION_CONTEXT_LINES
+        elif has_number and any(k in line for k in TOTAL_KEYWORDS) and any(k in line for k in keywords):
+            score = 4
+        elif has_number and any(k in line for k in keywords):
+            score = 2
+        elif context_left > 0:
+            score = 1
+        else:
+            score = 0
+        if score != 3 and context_left > 0:
+            context_left -= 1
+        if score > 0:
+            scored.append((score, index))
+
+    if not scored:
+        kept = _truncate(lines, token_budget)
+    else:
+        kept = []
+        used = 0
+        for score, index in sorted(scored, key=lambda item: (-item[0], item[1])):
+            cost = estimate_tokens(lines[index])
+            if token_budget and used + cost > token_budget:
+                continue
+            kept.append(index)
+            used += cost
+        kept = [lines[index] for index in sorted(kept)]
+
+    compacted = "\n".join(kept)
+    return CompactionResult(
+        text=compacted,
+        original_tokens=original_tokens,
+        tokens=estimate_tokens(compacted),
+        kept_lines=len(kept),
+        total_lines=len(lines)
+    )
+
+
+def field_terms(field: str) -> List[str]:
+    """
+    字段路径对应的原文检索词
+
+    Args:
+        field: 点分路径，如 "assets.total"
+
+    Returns:
+        路径分段本身（通用分段除外）及其科目别名
+    """
+    terms: List[str] = []
+    for segment in field.split("."):
+        candidates = FIELD_ALIASES.get(segment, ())
+        if segment not in GENERIC_SEGMENTS:
+            candidates = (segment,) + tuple(candidates)
+        for term in candidates:
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def extract_snippets(text: str, terms: Sequence[str], token_budget: int = 0) -> List[str]:
+    """
+    摘取包含指定字段名的原文行（数字已统一格式），按原文顺序在预算内输出
+
+    Args:
+        text: 原始文档文本
+        terms: 字段名
+        token_budget: token 预算，0 表示不限制
+
+    Returns:
+        原文片段列表
+    """
+    terms = [term for term in terms if term]
+    if not terms:
+        return []
+    lines = [_SPACES.sub(" ", normalize_numbers(line)).strip() for line in text.splitlines()]
+    return _truncate([line for line in lines if any(term in line for term in terms)], token_budget)
+
+
+def _truncate(lines: List[str], token_budget: int) -> List[str]:
+    """按预算截取开头的行"""
+    kept = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if token_budget and used + cost > token_budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept
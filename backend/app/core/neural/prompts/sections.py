@@ -0,0 +1,99 @@
+"""
+文档分段
+把年报类多报表文档按标题切分为资产负债表、利润表、现金流量表与附注，
+供审计流程对各段并行抽取后合并
+"""
+
+import re
+from typing import Dict, List, Sequence
+
+from app.core.neural.prompts.compaction import BALANCE_SHEET_KEYWORDS
+
+# 分段名（同时是合并顺序：靠前的报表在字段冲突时优先）
+SECTION_ORDER = ("balance_sheet", "income_statement", "cash_flow", "notes")
+
+SECTION_LABELS = {
+    "balance_sheet": "资产负债表",
+    "income_statement": "利润表",
+    "cash_flow": "现金流量表",
+    "notes": "附注",
+}
+
+# 分段标题关键词（小写比较）
+SECTION_HEADINGS = {
+    "notes": ("附注", "notes to"),
+    "balance_sheet": ("资产负债表", "balance sheet", "statement of financial position"),
+    "income_statement": ("利润表", "损益表", "income statement", "profit or loss"),
+    "cash_flow": ("现金流量表", "cash flow"),
+}
+
+# 各段压缩时保留的相关行关键词；附注没有固定科目，只按预算截取
+SECTION_KEYWORDS: Dict[str, Sequence[str]] = {
+    "balance_sheet": BALANCE_SHEET_KEYWORDS,
+    "income_statement": (
+        "收入", "成本", "费用", "利润", "收益", "损失", "所得税", "每股",
+    ),
+    "cash_flow": (
+        "现金", "经营活动", "投资活动", "筹资活动", "收到", "支付",
+    ),
+    "notes": (),
+}
+
+# 标题行最大长度（超过视为正文）
+MAX_HEADING_LENGTH = 40
+
+_HEADING_PREFIX = re.compile(r"^[#>*\s\d一二三四五六七八九十、.（）()]+")
+# 金额（含小数、千分位或 5 位以上整数）：带金额的行是数据行而不是标题
+_AMOUNT = re.compile(r"\d[\d,，]*\.\d+|\d{1,3}(?:[,，]\d{3})+|\d{5,}")
+
+
+def heading_section(line: str) -> str:
+    """
+    判断一行是否为分段标题
+
+    Returns:
+        分段名；不是标题时返回空字符串
+    """
+    stripped = _HEADING_PREFIX.sub("", line).strip().strip("*").lower()
+    if not stripped or len(stripped) > MAX_HEADING_LENGTH or _AMOUNT.search(stripped):
+        return ""
+    for name, headings in SECTION_HEADINGS.items():
+        if any(heading in stripped for heading in headings):
+            return name
+    return ""
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """
+    按报表标题切分文档
+
+    首个标题之前的内容（公司名、报告期等）并入第一段；同一报表多次出现
+    （如合并报表与母公司报表）时内容拼接。进入附注后不再切换，附注中的
+    “资产负债表日后事项”等小标题仍归附注。
+
+    Args:
+        text: 原始文档文本
+
+    Returns:
+        分段名 -> 分段文本，按 SECTION_ORDER 排序；没有识别出任何标题时为 {}
+    """
+    preamble: List[str] = []
+    parts: Dict[str, List[str]] = {}
+    current = ""
+    for line in text.splitlines():
+        section = "" if current == "notes" else heading_section(line)
+        if section:
+            if not parts and preamble:
+                parts[section] = preamble
+            current = section
+            parts.setdefault(section, [])
+        if current:
+            parts[current].append(line)
+        else:
+            preamble.append(line)
+
+    return {
+        name: "\n".join(parts[name]).strip()
+        for name in SECTION_ORDER
+        if name in parts and "\n".join(parts[name]).strip()
+    }
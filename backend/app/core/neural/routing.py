@@ -0,0 +1,218 @@
+"""
+多端点延迟感知路由
+在多个推理适配器（多个 DeepSeek 兼容地址或本地模型）之间按延迟 EWMA 与错误率选路，
+可在主请求超过该端点 p95 延迟仍未返回时向次优端点发出对冲请求，取先成功的结果
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, List, Optional, Sequence, Tuple
+
+from app.core.neural.engine import InferenceEngineAdapter
+
+# 降级结果的结论前缀（适配器内部吞掉异常后返回）
+FAILURE_PREFIX = "分析失败"
+
+# 错误率对延迟评分的放大系数：评分 = EWMA * (1 + ERROR_PENALTY * 错误率)
+ERROR_PENALTY = 4.0
+
+
+def is_failure(result: dict) -> bool:
+    """结果是否为适配器的降级结果"""
+    return str(result.get("conclusion", "")).startswith(FAILURE_PREFIX)
+
+
+class EndpointStats:
+    """单个端点的延迟与错误统计"""
+
+    def __init__(self, alpha: float = 0.2, window: int = 100):
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0  # 错误率 EWMA
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0  # time.monotonic() 时刻
+        self.requests = 0
+        self.hedges = 0  # 作为对冲端点被调用的次数
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.consecutive_failures = 0
+        self._latencies.append(latency)
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+        self.error_rate *= 1 - self.alpha
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.consecutive_failures += 1
+        self.error_rate += self.alpha * (1 - self.error_rate)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """最近成功请求延迟的分位数，没有样本时返回 None"""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    def score(self) -> float:
+        """
+        选路评分，越小越优
+
+        从未请求过的端点评分为 0，优先被探测；只失败过、没有成功延迟样本的端点评分为无穷大，
+        排在所有有样本的端点之后
+        """
+        if self.requests == 0:
+            return 0.0
+        if self.latency_ewma is None:
+            return float("inf")
+        return self.latency_ewma * (1 + ERROR_PENALTY * self.error_rate)
+
+    def to_dict(self) -> dict:
+        return {
+            "latency_ewma": self.latency_ewma,
+            "p95": self.quantile(0.95),
+            "error_rate": self.error_rate,
+            "requests": self.requests,
+            "hedges": self.hedges
+        }
+
+
+class RoutingAdapter(InferenceEngineAdapter):
+    """
+    延迟感知的多端点路由适配器
+
+    每次 analyze 选择当前评分最优的健康端点；连续失败 max_failures 次的端点冷却 cooldown 秒。
+    开启对冲时，主请求超过其端点 p95 延迟（样本不足 min_samples 时不对冲）仍未返回，
+    则向次优端点再发一次，取先成功的结果。主请求失败时按评分依次切换到其余端点。
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Tuple[str, InferenceEngineAdapter]],
+        hedge: bool = True,
+        hedge_quantile: float = 0.95,
+        min_hedge_delay: float = 0.05,
+        min_samples: int = 10,
+        alpha: float = 0.2,
+        max_failures: int = 3,
+        cooldown: float = 30.0
+    ):
+        if not endpoints:
+            raise ValueError("至少需要一个推理端点")
+        self.endpoints = list(endpoints)
+        self.stats = {name: EndpointStats(alpha) for name, _ in self.endpoints}
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+
+    def ranked(self) -> List[Tuple[str, InferenceEngineAdapter]]:
+        """按评分排序的端点，冷却中的端点排在最后"""
+        now = time.monotonic()
+        return sorted(
+            self.endpoints,
+            key=lambda endpoint: (
+                self.stats[endpoint[0]].cooldown_until > now,
+                self.stats[endpoint[0]].score()
+            )
+        )
+
+    def hedge_delay(self, name: str) -> Optional[float]:
+        """对冲等待时间；未开启对冲或样本不足时返回 None"""
+        stats = self.stats[name]
+        if not self.hedge or stats.samples < self.min_samples:
+            return None
+        return max(self.min_hedge_delay, stats.quantile(self.hedge_quantile))
+
+    async def analyze(self, data: dict, feedback: Optional[str] = None) -> dict:
+        """
+        路由到最优端点进行分析
+
+        Returns:
+            首个成功的结果；全部端点失败时返回最后一个降级结果
+        """
+        candidates = self.ranked()
+        result: dict = {}
+        while candidates:
+            name, adapter = candidates.pop(0)
+            backup = candidates[0] if candidates else None
+            # 不向从未成功过的端点对冲：对冲请求大概率失败，只会白白消耗其重试与退避
+            if backup is not None and self.stats[backup[0]].score() == float("inf"):
+                backup = None
+            delay = self.hedge_delay(name) if backup is not None else None
+
+            primary = asyncio.ensure_future(self._call(name, adapter, data, feedback))
+            pending = {primary}
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    # 主请求超过 p95 仍未返回：向次优端点发对冲请求
+                    candidates.pop(0)
+                    self.stats[backup[0]].hedges += 1
+                    pending.add(asyncio.ensure_future(self._call(backup[0], backup[1], data, feedback)))
+
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        result = task.result()
+                        if not is_failure(result):
+                            return result
+            finally:
+                for task in pending:
+                    task.cancel()
+        return result
+
+    async def _call(
+        self,
+        name: str,
+        adapter: InferenceEngineAdapter,
+        data: dict,
+        feedback: Optional[str]
+    ) -> dict:
+        """调用单个端点并记录延迟与错误"""
+        stats = self.stats[name]
+        started = time.monotonic()
+        try:
+            result = await adapter.analyze(data, feedback=feedback)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result = {
+                "conclusion": f"{FAILURE_PREFIX}: {str(e)}",
+                "confidence": 0.0,
+                "reasoning_chain": ["推理端点异常"],
+                "extracted_data": {}
+            }
+
+        if result.get("cache_hit"):
+            # 命中响应缓存未访问端点，其延迟不能代表端点，不计入统计
+            return result
+        if is_failure(result):
+            stats.record_failure()
+            if stats.consecutive_failures >= self.max_failures:
+                stats.cooldown_until = time.monotonic() + self.cooldown
+        else:
+            stats.record_success(time.monotonic() - started)
+        return result
+
+    def snapshot(self) -> dict:
+        """各端点的统计快照"""
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    async def close(self):
+        """关闭各端点适配器"""
+        for _, adapter in self.endpoints:
+            close = getattr(adapter, "close", None)
+            if close is not None:
+                await close()
@@ -0,0 +1,135 @@
+"""
+并发请求合并（single-flight）
+同一进程内指纹相同的并发推理请求只发出一次，其余调用方等待同一个结果；
+流式请求同理，多个订阅方共享一次上游流
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List
+
+
+class _SharedStream:
+    """一次上游流的共享状态：已产出的事件与消费上游的任务"""
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self.events: List[Any] = []
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+        self.task.add_done_callback(lambda _: self._notify())
+
+    async def _pump(self, source: AsyncIterator[Any]) -> None:
+        async for event in source:
+            self.events.append(event)
+            self._notify()
+
+    def _notify(self) -> None:
+        # 唤醒当前等待者，之后的等待使用新的 Event
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """
+    按键合并并发的异步调用
+
+    首个调用方启动任务，同一键上的后续调用方等待同一任务；任务结束后键被移除，
+    之后的调用重新执行。单个调用方被取消不会影响其他调用方，
+    最后一个等待者也被取消时共享任务随之取消（不再为无人等待的结果付费）。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task"] = {}
+        self._waiters: Dict["asyncio.Task", int] = {}
+        self._streams: Dict[Hashable, _SharedStream] = {}
+        self.coalesced = 0  # 被合并的调用次数
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行（或加入）键对应的调用
+
+        Args:
+            key: 请求指纹
+            fn: 无参协程函数，仅在没有同键任务进行中时调用
+
+        Returns:
+            共享任务的结果；任务抛出的异常会传递给所有调用方
+        """
+        task = self._calls.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(task) == 1:
+                task.cancel()
+            raise
+        finally:
+            remaining = self._waiters.get(task, 1) - 1
+            if remaining > 0:
+                self._waiters[task] = remaining
+            else:
+                self._waiters.pop(task, None)
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        订阅（或加入）键对应的流式调用
+
+        后加入的订阅方先重放已产出的事件，再与其他订阅方同步接收后续事件；
+        最后一个订阅方退出时上游流随之取消。
+
+        Args:
+            key: 请求指纹
+            fn: 无参异步生成器函数，仅在没有同键流进行中时调用
+
+        Yields:
+            上游事件（每个订阅方得到事件字典的独立副本）
+        """
+        shared = self._streams.get(key)
+        if shared is None or shared.task.done() or shared.task.get_loop() is not asyncio.get_running_loop():
+            shared = _SharedStream(fn())
+            self._streams[key] = shared
+            shared.task.add_done_callback(lambda _, key=key, shared=shared: self._forget_stream(key, shared))
+        else:
+            self.coalesced += 1
+
+        shared.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(shared.events):
+                    event = shared.events[index]
+                    index += 1
+                    yield dict(event) if isinstance(event, dict) else event
+                if shared.task.done():
+                    if index < len(shared.events):
+                        continue
+                    if not shared.task.cancelled() and shared.task.exception() is not None:
+                        raise shared.task.exception()
+                    return
+                await shared.changed.wait()
+        finally:
+            shared.subscribers -= 1
+            if shared.subscribers == 0 and not shared.task.done():
+                shared.task.cancel()
+
+    def _forget_stream(self, key: Hashable, shared: _SharedStream) -> None:
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+
+    def _forget(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+
+# 全局实例
+inflight_requests = SingleFlight()
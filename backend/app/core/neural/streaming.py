@@ -0,0 +1,166 @@
+"""
+流式响应解析
+解析 OpenAI 兼容接口的 SSE 流，并增量解析模型输出的 JSON 对象：
+每当一个顶层字段的值完整到达就立即产出，无需等待整个响应结束
+"""
+
+import json
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+import httpx
+
+# 顶层对象内的扫描状态
+_KEY = "key"
+_COLON = "colon"
+_VALUE = "value"
+_AFTER_VALUE = "after_value"
+
+
+class IncrementalJSONParser:
+    """
+    顶层 JSON 对象的增量解析器
+
+    第一个 "{" 之前的文本（如 markdown 代码块标记）被忽略；
+    顶层对象闭合后的文本也被忽略。
+    """
+
+    def __init__(self):
+        self.result: dict = {}
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = _KEY
+        self._key: Optional[str] = None
+        self._token_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        输入一段文本
+
+        Args:
+            chunk: 新到达的文本
+
+        Returns:
+            本次新完成的顶层字段 [(字段名, 值)]
+
+        Raises:
+            ValueError: 字段值不是合法 JSON
+        """
+        self._text += chunk
+        text = self._text
+        fields: List[Tuple[str, Any]] = []
+        i = self._pos
+
+        while i < len(text) and not self.done:
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._state == _KEY:
+                            self._key = json.loads(text[self._token_start:i + 1])
+                            self._token_start = None
+                            self._state = _COLON
+                        elif self._state == _VALUE:
+                            fields.append(self._emit(text[self._token_start:i + 1]))
+
+            elif self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._state = _KEY
+
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._token_start is None:
+                    self._token_start = i
+
+            elif ch in "{[":
+                if self._depth == 1 and self._state == _VALUE and self._token_start is None:
+                    self._token_start = i
+                self._depth += 1
+
+            elif ch in "}]":
+                if self._depth == 1:
+                    if self._state == _VALUE and self._token_start is not None:
+                        fields.append(self._emit(text[self._token_start:i]))
+                    self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 1 and self._state == _VALUE:
+                        fields.append(self._emit(text[self._token_start:i + 1]))
+
+            elif self._depth == 1:
+                if ch == ":" and self._state == _COLON:
+                    self._state = _VALUE
+                    self._token_start = None
+                elif ch == ",":
+                    if self._state == _VALUE and self._token_start is not None:
+                        fields.append(self._emit(text[self._token_start:i]))
+                    self._state = _KEY
+                    self._token_start = None
+                elif not ch.isspace() and self._state == _VALUE and self._token_start is None:
+                    self._token_start = i
+
+            i += 1
+
+        self._pos = i
+        return fields
+
+    def _emit(self, raw: str) -> Tuple[str, Any]:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON value for field {self._key!r}: {raw[:100]}") from e
+        self.result[self._key] = value
+        self._state = _AFTER_VALUE
+        self._token_start = None
+        return self._key, value
+
+
+def parse_json_object(content: str) -> dict:
+    """
+    从模型输出中提取第一个完整的 JSON 对象
+
+    Args:
+        content: 模型输出文本，可能夹带说明文字或代码块标记
+
+    Returns:
+        解析后的对象
+
+    Raises:
+        ValueError: 找不到完整的 JSON 对象
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(content)
+    if not parser.done:
+        raise ValueError(f"Could not parse JSON from response: {content}")
+    return parser.result
+
+
+async def iter_sse_content(response: httpx.Response) -> AsyncIterator[str]:
+    """
+    逐块产出 SSE 流中的 delta.content
+
+    推理模型的 reasoning_content 不属于最终输出，直接跳过。
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            break
+        if not payload:
+            continue
+        chunk = json.loads(payload)
+        for choice in chunk.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
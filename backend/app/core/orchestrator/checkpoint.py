@@ -0,0 +1,114 @@
+"""
+审计流程检查点
+每个流程节点完成后把 AuditState 以压缩 JSON 写入数据库，工作者崩溃或任务重新调度后
+从最后完成的节点续跑，已完成的推理结果不再重复请求
+"""
+
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import AuditCheckpoint
+
+# 不写入检查点的字段：原始文档由续跑调用方重新提供，resume_node 只在本次调用内有效
+TRANSIENT_KEYS = ("raw_document", "resume_node")
+
+
+@dataclass
+class Checkpoint:
+    """已保存的检查点"""
+    next_node: str
+    step: int
+    state: Dict[str, Any]
+
+
+def _to_json(value: Any) -> Any:
+    # 违规记录等 Mapping 对象按字典保存
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def serialize_state(state: Mapping[str, Any]) -> bytes:
+    """
+    压缩序列化状态：去掉临时字段与空值（None、空列表、空字典），紧凑 JSON 后 zlib 压缩
+
+    Args:
+        state: AuditState
+
+    Returns:
+        压缩后的字节串
+    """
+    compact = {
+        key: value for key, value in state.items()
+        if key not in TRANSIENT_KEYS and value is not None and value != [] and value != {}
+    }
+    payload = json.dumps(compact, ensure_ascii=False, separators=(",", ":"), default=_to_json)
+    return zlib.compress(payload.encode("utf-8"))
+
+
+def deserialize_state(blob: bytes) -> Dict[str, Any]:
+    """还原 serialize_state 的结果（被省略的空字段由流程默认值补齐）"""
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class CheckpointStore:
+    """基于数据库的检查点存储，每个审计流程只保留最新一份"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def save(self, thread_id: str, next_node: str, step: int, state: Mapping[str, Any]) -> None:
+        """
+        保存检查点
+
+        Args:
+            thread_id: 审计流程标识
+            next_node: 下一个待执行节点
+            step: 已完成的节点数
+            state: 当前完整状态
+        """
+        blob = serialize_state(state)
+        db = self.session_factory()
+        try:
+            record = db.get(AuditCheckpoint, thread_id)
+            if record is None:
+                record = AuditCheckpoint(thread_id=thread_id)
+                db.add(record)
+            record.next_node = next_node
+            record.step = step
+            record.state = blob
+            record.updated_at = datetime.now()
+            db.commit()
+        finally:
+            db.close()
+
+    def load(self, thread_id: str) -> Optional[Checkpoint]:
+        """读取检查点，不存在时返回 None"""
+        db = self.session_factory()
+        try:
+            record = db.get(AuditCheckpoint, thread_id)
+            if record is None:
+                return None
+            return Checkpoint(record.next_node, record.step or 0, deserialize_state(record.state))
+        finally:
+            db.close()
+
+    def delete(self, thread_id: str) -> None:
+        """删除检查点（审计结果落库后调用）"""
+        db = self.session_factory()
+        try:
+            db.query(AuditCheckpoint).filter(AuditCheckpoint.thread_id == thread_id).delete()
+            db.commit()
+        finally:
+            db.close()
+
+
+# 全局实例（AUDIT_CHECKPOINTS 关闭时为 None）
+audit_checkpoints = CheckpointStore() if settings.AUDIT_CHECKPOINTS else None
@@ -3,43 +3,154 @@ LangGraph 审计流程图定义
 编排神经-符号双引擎协同工作流
 """
 
-from typing import TypedDict, List, Optional, Dict, Any
+import asyncio
+import inspect
+from typing import TypedDict, List, Optional, Dict, Any, Callable, Awaitable
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
+from app.core.orchestrator.checkpoint import CheckpointStore, audit_checkpoints
 from app.core.neural.engine import InferenceEngineFactory
+from app.core.neural.limiter import deadline_scope
+from app.core.neural.prompts.audit import CORRECTION_KEY
+from app.core.neural.prompts.compaction import compact_document, extract_snippets, field_terms
+from app.core.neural.prompts.sections import SECTION_KEYWORDS, SECTION_LABELS, SECTION_ORDER, split_sections
 from app.core.symbolic.engine import SymbolicEngine
+from app.core.config import settings
+from app.services.document import document_parser
 
 
 class AuditState(TypedDict):
     """审计流程状态定义"""
     raw_document: str           # 原始文档内容
+    indicators: Optional[Dict[str, Any]]            # 文档解析器抽取的指标（FinancialIndicators，可选）
     extracted_data: Optional[Dict[str, Any]]        # 提取的结构化数据
     neural_output: Optional[Dict[str, Any]]         # 神经引擎输出
     validation_result: str      # APPROVED / REJECTED
     violations: List[Dict[str, Any]]      # 违规列表
+    validated_data: Optional[Dict[str, Any]]        # 上一次校验的提取数据（增量校验用）
+    ruleset_version: Optional[str]                  # 上一次校验所用的规则集版本
+    validation_complete: bool                       # 上一次校验是否为全量结果（fail-fast 中间轮次为 False）
+    early_validation: Optional[Dict[str, Any]]      # 流式输出中 extracted_data 到达时提前完成的校验
+    section_outputs: Optional[Dict[str, Dict[str, Any]]]  # 分段抽取时各段的神经引擎输出（重试时复用未违规的段）
     feedback_history: List[str] # 纠偏历史
     retry_count: int            # 重试次数
     final_report: Optional[Dict[str, Any]]  # 最终报告
+    resume_node: Optional[str]  # 从检查点续跑时的起始节点
 
 
 MAX_RETRIES = 3  # 最大纠偏重试次数
 
+ENTRY_NODE = "deterministic_check"
+# 固定后继节点（deterministic_check、symbolic_validate 的后继由路由函数决定）
+NEXT_NODE = {
+    "neural_analyze": "symbolic_validate",
+    "inject_feedback": "neural_analyze",
+    "generate_report": END,
+}
+
+
+def indicators_to_extracted_data(indicators: Any) -> Dict[str, Any]:
+    """
+    把文档解析器的 FinancialIndicators（模型或字典）转换为规则读取的 extracted_data 结构
+
+    解析器未找到的可选科目不写入。
+    """
+    if hasattr(indicators, "model_dump"):
+        indicators = indicators.model_dump()
+    data: Dict[str, Any] = {
+        "assets": {
+            "total": indicators.get("total_assets"),
+            "current": indicators.get("current_assets"),
+            "non_current": indicators.get("non_current_assets"),
+        },
+        "liabilities": {
+            "total": indicators.get("total_liabilities"),
+            "current": indicators.get("current_liabilities"),
+            "non_current": indicators.get("non_current_liabilities"),
+        },
+        "equity": {"total": indicators.get("total_equity")},
+    }
+    for key in ("cash", "receivables", "inventory"):
+        if indicators.get(key) is not None:
+            data[key] = indicators[key]
+    return data
+
+
+def _has_value(data: Dict[str, Any], path: str) -> bool:
+    """路径上是否有实际抽取到的值（解析器未找到的科目默认为 0.0，按缺失处理）"""
+    value: Any = data
+    for segment in path[2:].split(".") if path.startswith("$.") else path.split("."):
+        if not isinstance(value, dict):
+            return False
+        value = value.get(segment)
+    return value is not None and value != 0
+
+
+def _confidence(indicators: Any) -> str:
+    value = indicators.get("confidence") if isinstance(indicators, dict) else getattr(indicators, "confidence", None)
+    return str(getattr(value, "value", value) or "").lower()
+
+
+def _merge_patch(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """把补丁递归覆盖到基础数据上（不修改两者）"""
+    merged = dict(base)
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge_patch(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
 
 class AuditOrchestrator:
-    def __init__(self):
+    def __init__(
+        self,
+        progress_callback: Optional[Callable[[dict], Any]] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        section_fanout: Optional[bool] = None
+    ):
         # Use factory to create the neural engine adapter
         self.neural_engine = InferenceEngineFactory.create()
-        self.symbolic_engine = SymbolicEngine()
+        # Rules are parsed and compiled once per process by the shared ruleset cache
+        self.symbolic_engine = SymbolicEngine(rules_dir=str(settings.RULES_DIR))
+        self.symbolic_engine.load_rules()
+        # Optional sink for progress events (sync or async callable)
+        self.progress_callback = progress_callback
+        # 节点级检查点：中断的审计从最后完成的节点续跑，不再重复调用大模型
+        self.checkpoint_store = checkpoint_store if checkpoint_store is not None else audit_checkpoints
+        # 流程变体：多报表的年报按报表分段并行抽取
+        self.section_fanout = settings.AUDIT_SECTION_FANOUT if section_fanout is None else section_fanout
         self.graph = self._build_graph()
 
     def _build_graph(self):
         workflow = StateGraph(AuditState)
 
-        workflow.add_node("neural_analyze", self.neural_analyze_node)
-        workflow.add_node("symbolic_validate", self.symbolic_validate_node)
-        workflow.add_node("inject_feedback", self.inject_feedback_node)
-        workflow.add_node("generate_report", self.generate_report_node)
+        workflow.add_node("deterministic_check", self._checkpointed("deterministic_check", self.deterministic_check_node))
+        analyze = self.sectioned_analyze_node if self.section_fanout else self.neural_analyze_node
+        workflow.add_node("neural_analyze", self._checkpointed("neural_analyze", analyze))
+        workflow.add_node("symbolic_validate", self._checkpointed("symbolic_validate", self.symbolic_validate_node))
+        workflow.add_node("inject_feedback", self._checkpointed("inject_feedback", self.inject_feedback_node))
+        workflow.add_node("generate_report", self._checkpointed("generate_report", self.generate_report_node))
 
-        workflow.set_entry_point("neural_analyze")
+        # 续跑时从最后一个检查点之后的节点进入
+        workflow.set_conditional_entry_point(
+            lambda state: state.get("resume_node") or ENTRY_NODE,
+            {
+                name: name for name in (
+                    "deterministic_check", "neural_analyze", "symbolic_validate", "inject_feedback", "generate_report"
+                )
+            }
+        )
+
+        # 解析指标已通过全部关键规则时直接生成报告，不调用大模型
+        workflow.add_conditional_edges(
+            "deterministic_check",
+            self.fast_path_route,
+            {
+                "report": "generate_report",
+                "analyze": "neural_analyze"
+            }
+        )
 
         workflow.add_edge("neural_analyze", "symbolic_validate")
         
@@ -57,49 +168,443 @@ class AuditOrchestrator:
 
         return workflow.compile()
 
-    async def run(self, initial_state: dict) -> dict:
+    def _checkpointed(self, name: str, node: Callable[[AuditState], Awaitable[dict]]):
+        """包装节点：流程带 thread_id 时在节点完成后保存合并后的状态"""
+        async def run_node(state: AuditState, config: RunnableConfig) -> dict:
+            update = await node(state)
+            thread_id = (config or {}).get("configurable", {}).get("thread_id")
+            if thread_id is not None and self.checkpoint_store is not None:
+                merged = {**state, **update}
+                if name == "symbolic_validate":
+                    next_node = "inject_feedback" if self.should_retry(merged) == "retry" else "generate_report"
+                elif name == "deterministic_check":
+                    next_node = "generate_report" if self.fast_path_route(merged) == "report" else "neural_analyze"
+                else:
+                    next_node = NEXT_NODE[name]
+                # 每个节点拿到的 config 是副本，进度字典按引用共享
+                progress = config["configurable"]["checkpoint_progress"]
+                progress["step"] += 1
+                self.checkpoint_store.save(thread_id, next_node, progress["step"], merged)
+            return update
+
+        return run_node
+
+    async def run(self, initial_state: dict, thread_id: Optional[str] = None) -> dict:
+        """
+        执行审计流程
+
+        Args:
+            initial_state: 初始状态，至少包含 raw_document
+            thread_id: 审计流程标识；提供时每个节点完成后保存检查点，
+                已有检查点则从最后完成的节点续跑（流程已结束时直接返回保存的状态）
+        """
         state = {
             "extracted_data": {},
             "neural_output": {},
             "validation_result": "PENDING",
             "violations": [],
+            "validated_data": None,
+            "ruleset_version": None,
+            "validation_complete": True,
+            "early_validation": None,
+            "section_outputs": None,
             "feedback_history": [],
             "retry_count": 0,
             "final_report": None,
+            "indicators": None,
+            "resume_node": None,
             **initial_state
         }
-        return await self.graph.ainvoke(state)
+        config: Dict[str, Any] = {"configurable": {}}
+        if thread_id is not None and self.checkpoint_store is not None:
+            progress = {"step": 0}
+            config["configurable"] = {"thread_id": thread_id, "checkpoint_progress": progress}
+            checkpoint = self.checkpoint_store.load(thread_id)
+            if checkpoint is not None:
+                state.update(checkpoint.state)
+                progress["step"] = checkpoint.step
+                if checkpoint.next_node == END:
+                    return state
+                state["resume_node"] = checkpoint.next_node
+                await self._notify({"stage": "resume", "node": checkpoint.next_node, "step": checkpoint.step})
+
+        # Inference retries inside this audit never run past the audit deadline
+        with deadline_scope(settings.AUDIT_DEADLINE):
+            return await self.graph.ainvoke(state, config=config)
+
+    def discard_checkpoint(self, thread_id: str) -> None:
+        """审计结果落库后删除检查点"""
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.delete(thread_id)
+
+    async def deterministic_check_node(self, state: AuditState) -> dict:
+        """直接校验解析指标，只有置信度为 HIGH 且没有关键违规的文档走快速通道"""
+        # LangGraph 不接受空更新，清空 resume_node 作为无操作的写入
+        skip = {"resume_node": None}
+        indicators = state.get("indicators")
+        if not settings.AUDIT_FAST_PATH or not indicators or _confidence(indicators) != "high":
+            return skip
+
+        extracted_data = indicators_to_extracted_data(indicators)
+        update = self._validate(
+            {**state, "validated_data": None, "violations": [], "retry_count": MAX_RETRIES},
+            {"extracted_data": extracted_data}
+        )
+        critical = [v for v in update["violations"] if str(v.get("severity", "")).upper() == "CRITICAL"]
+        if critical:
+            await self._notify({"stage": "fast_path", "taken": False, "critical": len(critical)})
+            return skip
+
+        await self._notify({"stage": "fast_path", "taken": True})
+        await self._notify_verdict(state, update)
+        return {
+            **update,
+            "extracted_data": extracted_data,
+            "neural_output": {
+                "conclusion": "解析指标置信度高且关键规则全部通过，未调用大模型",
+                "confidence": 1.0,
+                "reasoning_chain": [
+                    "步骤1: 采用文档解析器抽取并自校验的财务指标",
+                    "步骤2: 符号引擎规则校验",
+                    f"步骤3: 关键规则全部通过（违规 {len(update['violations'])} 条，均非关键）"
+                ],
+                "extracted_data": extracted_data,
+                "fast_path": True
+            }
+        }
+
+    def fast_path_route(self, state: AuditState) -> str:
+        """
+        判断是否走确定性快速通道
+
+        Returns:
+            "report" - 已由解析指标完成校验，直接生成报告
+            "analyze" - 需要大模型分析
+        """
+        if (state.get("neural_output") or {}).get("fast_path"):
+            return "report"
+        return "analyze"
 
     async def neural_analyze_node(self, state: AuditState) -> dict:
         feedback = state["feedback_history"][-1] if state["feedback_history"] else None
+
+        # 首次抽取时文档解析器与大模型竞速，纠偏重试只用大模型
+        if settings.AUDIT_SPECULATIVE and state["retry_count"] == 0:
+            return await self._analyze_speculative(state, feedback)
+        return await self._analyze_llm(state, feedback)
+
+    async def _analyze_llm(self, state: AuditState, feedback: Optional[str]) -> dict:
+        # Streaming adapters expose stream=True; validation starts as soon as extracted_data arrives
+        if getattr(self.neural_engine, "stream", False) is True:
+            return await self._analyze_streaming(state, feedback)
         
+        payload = self._document_payload(state)
         result = await self.neural_engine.analyze(
-            data={"raw_text": state["raw_document"]}, # Adapter expects dict
+            data=payload, # Adapter expects dict
             feedback=feedback
         )
+        if CORRECTION_KEY in payload:
+            result = self._apply_patch(state, result)
         
         return {
             "neural_output": result,
-            "extracted_data": result.get("extracted_data", {}) 
+            "extracted_data": result.get("extracted_data", {}),
+            "early_validation": None
         }
 
+    async def sectioned_analyze_node(self, state: AuditState) -> dict:
+        """分段抽取：各报表分段并行分析，合并 extracted_data 后交给符号校验"""
+        sections = split_sections(state["raw_document"])
+        if len(sections) < 2:
+            return await self.neural_analyze_node(state)
+
+        feedback = state["feedback_history"][-1] if state["feedback_history"] else None
+        previous = {
+            name: output for name, output in (state.get("section_outputs") or {}).items() if name in sections
+        }
+        if state["retry_count"] > 0 and previous:
+            rerun = self._violated_sections(state, previous) or list(sections)
+        else:
+            rerun = list(sections)
+
+        semaphore = asyncio.Semaphore(max(1, settings.AUDIT_SECTION_CONCURRENCY))
+
+        async def analyze(name: str) -> dict:
+            async with semaphore:
+                return await self.neural_engine.analyze(
+                    data={"raw_text": self._section_text(name, sections[name])},
+                    feedback=feedback
+                )
+
+        results = await asyncio.gather(*[analyze(name) for name in rerun])
+        outputs = {**previous, **dict(zip(rerun, results))}
+        outputs = {name: outputs[name] for name in SECTION_ORDER if name in outputs}
+        await self._notify({
+            "stage": "sections",
+            "analyzed": rerun,
+            "reused": [name for name in outputs if name not in rerun],
+            "retry_count": state["retry_count"]
+        })
+
+        result = self._merge_sections(outputs)
+        return {
+            "neural_output": result,
+            "extracted_data": result["extracted_data"],
+            "section_outputs": outputs,
+            "early_validation": None
+        }
+
+    def _section_text(self, name: str, text: str) -> str:
+        # 压缩只保留资产负债表标题，各段统一加上报表名称
+        if settings.PROMPT_COMPACTION:
+            text = compact_document(text, settings.PROMPT_TOKEN_BUDGET, SECTION_KEYWORDS[name]).text
+        return f"【{SECTION_LABELS[name]}】\n{text}"
+
+    def _violated_sections(self, state: AuditState, outputs: Dict[str, dict]) -> List[str]:
+        """上一轮抽取结果包含违规规则所读字段的分段"""
+        if not hasattr(self.symbolic_engine, "violation_fields"):
+            return []
+        roots = {path[2:].split(".")[0] for path in self.symbolic_engine.violation_fields(state["violations"])}
+        return [
+            name for name, output in outputs.items()
+            if roots & set(output.get("extracted_data") or {})
+        ]
+
+    def _merge_sections(self, outputs: Dict[str, dict]) -> dict:
+        """把各段输出合并为一个 neural_output，字段冲突时靠前的报表优先"""
+        extracted_data: Dict[str, Any] = {}
+        for name in reversed(list(outputs)):
+            data = outputs[name].get("extracted_data")
+            if isinstance(data, dict):
+                extracted_data = _merge_patch(extracted_data, data)
+
+        confidences = [
+            output["confidence"] for output in outputs.values()
+            if isinstance(output.get("confidence"), (int, float))
+        ]
+        return {
+            "conclusion": "；".join(
+                f"[{SECTION_LABELS[name]}] {output.get('conclusion', '')}" for name, output in outputs.items()
+            ),
+            "confidence": min(confidences) if confidences else 0.0,
+            "reasoning_chain": [
+                f"[{SECTION_LABELS[name]}] {step}"
+                for name, output in outputs.items()
+                for step in output.get("reasoning_chain") or []
+            ],
+            "extracted_data": extracted_data,
+            "sections": list(outputs)
+        }
+
+    async def _analyze_speculative(self, state: AuditState, feedback: Optional[str]) -> dict:
+        """解析器与大模型的候选结果到达即校验，先通过校验的被采用"""
+        llm = asyncio.ensure_future(self._analyze_llm(state, feedback))
+        parser = asyncio.ensure_future(self._parser_candidate(state))
+        pending = {llm, parser}
+        llm_update: Optional[dict] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if parser in done:
+                    candidate = parser.result()
+                    if candidate is not None and candidate["early_validation"]["validation_result"] == "APPROVED":
+                        # 解析器胜出：进行中的大模型请求在 finally 中取消
+                        await self._notify({"stage": "speculative", "winner": "parser", "llm_cancelled": not llm.done()})
+                        await self._notify_verdict(state, candidate["early_validation"])
+                        return candidate
+                if llm in done:
+                    llm_update = llm.result()
+                    early_validation = llm_update.get("early_validation")
+                    if early_validation is None or early_validation["validated_data"] != llm_update["extracted_data"]:
+                        early_validation = self._validate(state, llm_update["neural_output"])
+                        llm_update = {**llm_update, "early_validation": early_validation}
+                        await self._notify_verdict(state, early_validation)
+                    if early_validation["validation_result"] == "APPROVED":
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        await self._notify({"stage": "speculative", "winner": "llm", "llm_cancelled": False})
+        return llm_update
+
+    async def _parser_candidate(self, state: AuditState) -> Optional[dict]:
+        """按模型输出的格式校验解析器抽取结果，没有可用结果时返回 None"""
+        indicators = state.get("indicators")
+        if indicators and settings.AUDIT_FAST_PATH and _confidence(indicators) == "high":
+            # deterministic_check 已校验过这些指标并发现关键违规
+            return None
+        try:
+            if not indicators:
+                indicators = await asyncio.to_thread(
+                    document_parser.extract_balance_sheet, {"raw_markdown": state["raw_document"]}
+                )
+            extracted_data = indicators_to_extracted_data(indicators)
+        except Exception as e:
+            print(f"Warning: Speculative parser extraction failed: {e}")
+            return None
+        # 关键规则读取的科目必须都被实际抽取到，只抽到部分科目的结果不参与竞速
+        required = []
+        if hasattr(self.symbolic_engine, "severity_fields"):
+            required = list(self.symbolic_engine.severity_fields("CRITICAL"))
+        if not all(_has_value(extracted_data, path) for path in required or ["$.assets.total"]):
+            return None
+
+        neural_output = {
+            "conclusion": "文档解析器抽取的指标通过全部规则校验，已取消大模型请求",
+            "confidence": 1.0,
+            "reasoning_chain": [
+                "步骤1: 文档解析器与大模型并行抽取财务指标",
+                "步骤2: 解析器结果先到达并通过符号引擎规则校验",
+                "步骤3: 采用解析器结果，取消进行中的大模型请求"
+            ],
+            "extracted_data": extracted_data,
+            "source": "parser"
+        }
+        return {
+            "neural_output": neural_output,
+            "extracted_data": extracted_data,
+            "early_validation": self._validate(state, neural_output)
+        }
+
+    async def _analyze_streaming(self, state: AuditState, feedback: Optional[str]) -> dict:
+        result: Dict[str, Any] = {}
+        early_validation = None
+
+        payload = self._document_payload(state)
+        correction = CORRECTION_KEY in payload
+
+        async for event in self.neural_engine.analyze_stream(payload, feedback=feedback):
+            if event["event"] == "field":
+                await self._notify({"stage": "field", "key": event["key"], "retry_count": state["retry_count"]})
+                if event["key"] == "extracted_data" and isinstance(event["value"], dict):
+                    # Validate while the rest of the response (reasoning_chain etc.) is still streaming
+                    extracted_data = event["value"]
+                    if correction:
+                        extracted_data = _merge_patch(state["extracted_data"], extracted_data)
+                    early_validation = self._validate(state, {"extracted_data": extracted_data})
+                    await self._notify_verdict(state, early_validation)
+            elif event["event"] == "done":
+                result = event["result"]
+                if correction:
+                    result = self._apply_patch(state, result)
+
+        return {
+            "neural_output": result,
+            "extracted_data": result.get("extracted_data", {}),
+            "early_validation": early_validation
+        }
+
+    def _document_payload(self, state: AuditState) -> dict:
+        # Retries send only the fields the violated rules read, plus matching source lines
+        correction = self._correction_payload(state)
+        if correction is not None:
+            return {CORRECTION_KEY: correction}
+
+        # Only balance-sheet rows within the token budget are sent to the model
+        raw_document = state["raw_document"]
+        if not settings.PROMPT_COMPACTION:
+            return {"raw_text": raw_document}
+        compacted = compact_document(raw_document, settings.PROMPT_TOKEN_BUDGET)
+        return {"raw_text": compacted.text}
+
+    def _correction_payload(self, state: AuditState) -> Optional[dict]:
+        """增量纠偏请求；需要重发整份文档时返回 None"""
+        previous = state.get("extracted_data")
+        if (
+            settings.RETRY_PROMPT_MODE != "delta"
+            or state["retry_count"] == 0
+            or not isinstance(previous, dict)
+            or not previous
+            or not hasattr(self.symbolic_engine, "violation_fields")
+        ):
+            return None
+
+        fields = [path[2:] for path in self.symbolic_engine.violation_fields(state["violations"])]
+        if not fields:
+            return None
+        terms = [term for field in fields for term in field_terms(field)]
+        return {
+            "extracted_data": previous,
+            "fields": fields,
+            "snippets": extract_snippets(state["raw_document"], terms, settings.PROMPT_TOKEN_BUDGET)
+        }
+
+    def _apply_patch(self, state: AuditState, result: dict) -> dict:
+        """把补丁字段合并进上一次的抽取结果"""
+        patch = result.get("extracted_data")
+        if not isinstance(patch, dict):
+            patch = {}
+        return {**result, "extracted_data": _merge_patch(state["extracted_data"], patch)}
+
     async def symbolic_validate_node(self, state: AuditState) -> dict:
+        # Reuse the validation done during streaming when the final data is identical
+        early_validation = state.get("early_validation")
+        extracted_data = state["neural_output"].get("extracted_data", {})
+        if early_validation is not None and early_validation["validated_data"] == extracted_data:
+            return {**early_validation, "early_validation": None}
+
+        update = self._validate(state, state["neural_output"])
+        await self._notify_verdict(state, update)
+        return {**update, "early_validation": None}
+
+    def _validate(self, state: AuditState, neural_output: Dict[str, Any]) -> dict:
         # Symbolic engine returns ValidationResult dataclass, need to handle it
-        result = self.symbolic_engine.validate(state["neural_output"])
+        # On retries only rules reading changed fields are re-evaluated;
+        # an early-stopped (fail-fast) result can't serve as the baseline
+        previous_complete = state.get("validation_complete", True)
+        previous_data = state.get("validated_data") if previous_complete else None
+        # Intermediate attempts without a full baseline stop at the first violation;
+        # with a baseline the incremental full pass is cheaper and keeps the baseline complete
+        fail_fast = (
+            settings.SYMBOLIC_FAIL_FAST
+            and state["retry_count"] < MAX_RETRIES
+            and previous_data is None
+        )
+        result = self.symbolic_engine.validate(
+            neural_output,
+            previous_data=previous_data,
+            previous_violations=state.get("violations"),
+            previous_version=state.get("ruleset_version"),
+            fail_fast=fail_fast
+        )
         
         # Check if result is dataclass or dict (mock returns dict, real returns dataclass)
         if hasattr(result, 'status'):
             status = result.status
             violations = result.violations
+            ruleset_version = result.ruleset_version
+            complete = result.complete
         else:
             status = result.get("status", "REJECTED")
             violations = result.get("violations", [])
+            ruleset_version = result.get("ruleset_version")
+            complete = result.get("complete", True)
 
         return {
             "validation_result": status,
-            "violations": violations
+            "violations": violations,
+            "validated_data": neural_output.get("extracted_data", {}),
+            "ruleset_version": ruleset_version,
+            "validation_complete": complete
         }
 
+    async def _notify_verdict(self, state: AuditState, update: dict) -> None:
+        await self._notify({
+            "stage": "verdict",
+            "retry_count": state["retry_count"],
+            "status": update["validation_result"],
+            "violations": len(update["violations"])
+        })
+
+    async def _notify(self, event: dict) -> None:
+        """向进度回调推送事件（未设置回调时忽略）"""
+        if self.progress_callback is None:
+            return
+        outcome = self.progress_callback(event)
+        if inspect.isawaitable(outcome):
+            await outcome
+
     async def inject_feedback_node(self, state: AuditState) -> dict:
         violations = state["violations"]
         
@@ -0,0 +1,222 @@
+"""
+批量向量化校验
+把规则表达式编译为 NumPy 数组运算，对大批量 extracted_data 一次性求值
+与 compiler 共享同一套表达式语法（equals / add / tolerance / $. 路径）
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from app.core.symbolic.compiler import DEFAULT_TOLERANCE, compile_path
+
+# Try to import numpy, fall back to per-document validation if not available
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# 向量化求值函数：输入 ColumnTable，返回数组或标量
+VectorEvaluator = Callable[["ColumnTable"], Any]
+
+
+class NotVectorizable(Exception):
+    """表达式包含无法向量化的操作数（如字符串字面量），需逐条求值"""
+
+
+def _normalize_path(path: str) -> str:
+    return path if path.startswith("$.") else f"$.{path}"
+
+
+class ColumnTable:
+    """
+    列式数据表
+
+    每个 JSON path 对应一列 float64，缺失值（None / 路径不存在）记为 NaN。
+    存在但非数值的单元格记入 irregular 掩码，由调用方回退到逐条求值。
+    """
+
+    def __init__(
+        self,
+        size: int,
+        columns: Dict[str, Any],
+        irregular: Dict[str, Any],
+        row_builder: Callable[[int], dict]
+    ):
+        self.size = size
+        self._columns = columns
+        self._irregular = irregular
+        self._row_builder = row_builder
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict], paths: List[str]) -> "ColumnTable":
+        """
+        从 extracted_data 字典列表构建列式表
+
+        Args:
+            records: extracted_data 列表
+            paths: 需要抽取的 JSON path
+        """
+        size = len(records)
+        columns: Dict[str, Any] = {}
+        irregular: Dict[str, Any] = {}
+
+        for path in paths:
+            resolve = compile_path(path)
+            columns[path], irregular[path] = cls._to_column([resolve(r) for r in records])
+
+        return cls(size, columns, irregular, lambda index: records[index])
+
+    @classmethod
+    def from_columns(cls, table: Mapping[str, Sequence], paths: List[str]) -> "ColumnTable":
+        """
+        从列式数据构建列式表
+
+        Args:
+            table: {JSON path: 列值} 映射，键可带或不带 "$." 前缀
+            paths: 需要抽取的 JSON path
+        """
+        source = {_normalize_path(key): values for key, values in table.items()}
+        sizes = {len(values) for values in source.values()}
+        if len(sizes) > 1:
+            raise ValueError(f"列长度不一致: {sorted(sizes)}")
+        size = sizes.pop() if sizes else 0
+
+        columns: Dict[str, Any] = {}
+        irregular: Dict[str, Any] = {}
+        for path in paths:
+            values = source.get(path)
+            if values is None:
+                columns[path] = np.full(size, np.nan)
+                irregular[path] = np.zeros(size, dtype=bool)
+                continue
+            array = np.asarray(values)
+            if array.dtype.kind in "biuf":
+                columns[path] = array.astype(np.float64)
+                irregular[path] = np.zeros(size, dtype=bool)
+            else:
+                columns[path], irregular[path] = cls._to_column(list(values))
+
+        def build_row(index: int) -> dict:
+            row: dict = {}
+            for path, values in source.items():
+                value = values[index]
+                if value is None or (isinstance(value, float) and math.isnan(value)):
+                    continue
+                if hasattr(value, "item"):
+                    value = value.item()
+                node = row
+                parts = path[2:].split(".")
+                for part in parts[:-1]:
+                    node = node.setdefault(part, {})
+                node[parts[-1]] = value
+            return row
+
+        return cls(size, columns, irregular, build_row)
+
+    @staticmethod
+    def _to_column(values: List[Any]):
+        """把 Python 值列表转换为 (float64 列, 非数值掩码)"""
+        size = len(values)
+        column = np.fromiter(
+            (v if isinstance(v, (int, float)) else np.nan for v in values),
+            dtype=np.float64,
+            count=size
+        )
+        irregular = np.fromiter(
+            (v is not None and not isinstance(v, (int, float)) for v in values),
+            dtype=bool,
+            count=size
+        )
+        return column, irregular
+
+    def column(self, path: str):
+        """获取某个 JSON path 的数值列"""
+        return self._columns[path]
+
+    def irregular_rows(self, paths: List[str]):
+        """返回在给定路径上含非数值单元格的行掩码"""
+        mask = np.zeros(self.size, dtype=bool)
+        for path in paths:
+            mask |= self._irregular[path]
+        return mask
+
+    def row(self, index: int) -> dict:
+        """还原第 index 行的 extracted_data（用于渲染违规详情）"""
+        return self._row_builder(index)
+
+
+def compile_vectorized(expression: dict) -> VectorEvaluator:
+    """
+    把规则表达式编译为向量化求值函数
+
+    NaN 在向量化语义中对应标量求值的 None：add 遇 NaN 结果为 NaN，
+    equals 任一侧为 NaN 时结果为 False。
+
+    Args:
+        expression: JSON 表达式树
+
+    Returns:
+        向量化求值函数
+
+    Raises:
+        NotVectorizable: 表达式含非数值字面量
+    """
+    return _compile_vector_node(expression)
+
+
+def to_valid_mask(result: Any, size: int):
+    """把规则求值结果转换为长度为 size 的布尔掩码（True 表示通过）"""
+    array = np.asarray(result)
+    if array.dtype != bool:
+        array = ~np.isnan(array.astype(np.float64)) & (array != 0)
+    return np.broadcast_to(array, (size,))
+
+
+def _compile_vector_operand(reference: Any) -> VectorEvaluator:
+    if isinstance(reference, (int, float)):
+        value = float(reference)
+        return lambda table: value
+    elif isinstance(reference, str) and reference.startswith("$."):
+        return lambda table: table.column(reference)
+    elif isinstance(reference, dict):
+        return _compile_vector_node(reference)
+    elif reference is None:
+        return lambda table: np.nan
+    else:
+        raise NotVectorizable(f"Unsupported literal: {reference!r}")
+
+
+def _compile_vector_node(expression: dict) -> VectorEvaluator:
+    operator = expression.get("operator")
+
+    if operator == "equals":
+        left = _compile_vector_operand(expression.get("left"))
+        right = _compile_vector_operand(expression.get("right"))
+        tolerance = expression.get("tolerance", DEFAULT_TOLERANCE)
+
+        def equals(table: ColumnTable):
+            return np.abs(left(table) - right(table)) <= tolerance
+
+        return equals
+
+    elif operator == "add":
+        operands = [_compile_vector_operand(o) for o in expression.get("operands", [])]
+
+        def add(table: ColumnTable):
+            result = 0.0
+            for operand in operands:
+                result = result + operand(table)
+            return result
+
+        return add
+
+    elif isinstance(operator, str) and operator.startswith("$."):
+        return lambda table: table.column(operator)
+
+    elif operator is None:
+        raise ValueError(f"Expression is missing operator: {expression}")
+
+    else:
+        return lambda table: np.nan
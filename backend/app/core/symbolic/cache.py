@@ -0,0 +1,177 @@
+"""
+规则集缓存
+进程级共享的规则文件缓存：按规则目录内容哈希标识版本，同一目录在进程内只读取、解析一次；
+后台线程按 mtime 监测变化，只重新解析变化的文件并原子替换快照
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass
+class RuleFileEntry:
+    """单个规则文件的缓存条目"""
+    path: str               # 相对规则目录的路径
+    mtime_ns: int
+    size: int
+    sha256: str             # 文件内容哈希
+    data: Optional[Any]     # 解析后的 JSON
+    error: Optional[str] = None  # 解析失败原因
+    compiled: Any = field(default=None, repr=False, compare=False)  # 由引擎填充的编译结果
+
+
+@dataclass(frozen=True)
+class RulesetSnapshot:
+    """某个规则目录在某一时刻的不可变快照"""
+    rules_dir: str
+    version: str            # 全部文件内容哈希的摘要
+    entries: Tuple[RuleFileEntry, ...]
+
+
+class RulesetCache:
+    """
+    规则集缓存
+
+    快照一经发布即不再修改，刷新时整体替换引用，
+    正在使用旧快照的校验不受影响，也无需加锁。
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, RulesetSnapshot] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def _key(rules_dir: Path) -> str:
+        return str(Path(rules_dir).resolve())
+
+    def get(self, rules_dir: Path) -> Optional[RulesetSnapshot]:
+        """
+        获取规则目录快照，首次访问时扫描目录
+
+        Args:
+            rules_dir: 规则目录
+
+        Returns:
+            规则集快照，目录不存在时返回 None
+        """
+        key = self._key(rules_dir)
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                snapshot = self._scan(key)
+                if snapshot is not None:
+                    self._snapshots[key] = snapshot
+        return snapshot
+
+    def current(self, rules_dir: Path) -> Optional[RulesetSnapshot]:
+        """返回已发布的快照（不触发扫描）"""
+        return self._snapshots.get(self._key(rules_dir))
+
+    def refresh(self) -> bool:
+        """
+        重新检查所有已加载目录的 mtime，有变化时发布新快照
+
+        其他线程正在刷新时直接返回，不阻塞调用方。
+
+        Returns:
+            是否有快照被替换
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            changed = False
+            for key, snapshot in list(self._snapshots.items()):
+                updated = self._scan(key, snapshot)
+                if updated is not None and updated.version != snapshot.version:
+                    self._snapshots[key] = updated
+                    changed = True
+            return changed
+        finally:
+            self._lock.release()
+
+    def start_watcher(self, interval: float) -> None:
+        """启动后台 mtime 监测线程"""
+        if interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+
+        self._stop_event.clear()
+
+        def watch() -> None:
+            while not self._stop_event.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Warning: Failed to refresh rules: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="ruleset-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        """停止后台监测线程"""
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def clear(self) -> None:
+        """清空快照，下次访问时重新扫描"""
+        with self._lock:
+            self._snapshots.clear()
+
+    def _scan(self, key: str, previous: Optional[RulesetSnapshot] = None) -> Optional[RulesetSnapshot]:
+        """扫描规则目录；mtime 与大小未变的文件直接复用缓存条目"""
+        root = Path(key)
+        if not root.exists():
+            return None
+
+        known = {entry.path: entry for entry in previous.entries} if previous is not None else {}
+
+        entries = []
+        for json_file in sorted(root.rglob("*.json")):
+            relative = json_file.relative_to(root).as_posix()
+            stat = json_file.stat()
+            cached = known.get(relative)
+
+            if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                entries.append(cached)
+                continue
+
+            raw = json_file.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+
+            if cached is not None and cached.sha256 == digest:
+                entries.append(replace(cached, mtime_ns=stat.st_mtime_ns, size=stat.st_size))
+                continue
+
+            try:
+                data, error = json.loads(raw.decode("utf-8")), None
+            except Exception as e:
+                data, error = None, str(e)
+
+            entries.append(RuleFileEntry(
+                path=relative,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                sha256=digest,
+                data=data,
+                error=error
+            ))
+
+        version = hashlib.sha256(
+            "\n".join(f"{e.path}:{e.sha256}" for e in entries).encode("utf-8")
+        ).hexdigest()
+        return RulesetSnapshot(rules_dir=key, version=version, entries=tuple(entries))
+
+
+# 全局实例
+ruleset_cache = RulesetCache()
@@ -0,0 +1,347 @@
+"""
+规则表达式编译器
+在规则加载阶段把 JSON 表达式树编译为闭包树，校验时直接调用，避免逐次解释
+
+整套规则一起编译时，结构相同的子表达式（如多条规则共用的
+add(负债总计, 权益总计)）分配同一个备忘槽位，同一次校验中最多求值一次
+"""
+
+import json
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# 编译后的求值函数：输入 extracted_data，返回表达式的值
+Evaluator = Callable[[dict], Any]
+
+# 带备忘的求值函数：evaluator(data, memo)，memo 为单次校验内共享的 {槽位: 值}
+MemoEvaluator = Callable[[dict, dict], Any]
+
+# 标记"非常量"节点，用于常量折叠
+_NOT_CONSTANT = object()
+
+# 不需要备忘时传入的占位（未分配槽位的节点不会写入）
+_NO_MEMO: dict = {}
+
+DEFAULT_TOLERANCE = 0.01
+
+
+def compile_expression(expression: dict) -> Evaluator:
+    """
+    编译规则表达式
+
+    Args:
+        expression: JSON 表达式树（与 rules/*.json 中的 expression 字段一致）
+
+    Returns:
+        求值函数，签名为 evaluator(data) -> Any
+    """
+    evaluator = ExpressionCompiler().compile(expression)
+    return lambda data: evaluator(data, _NO_MEMO)
+
+
+def compile_operand(reference: Any) -> Evaluator:
+    """
+    编译操作数（直接值、JSON path 或嵌套表达式）
+
+    Args:
+        reference: 操作数引用
+
+    Returns:
+        求值函数
+    """
+    evaluator = ExpressionCompiler().compile_operand(reference)
+    return lambda data: evaluator(data, _NO_MEMO)
+
+
+def compile_path(reference: str) -> Evaluator:
+    """
+    编译 JSON path（如 "$.assets.total"），路径在编译期预先拆分
+
+    Args:
+        reference: 以 "$." 开头的路径
+
+    Returns:
+        路径解析函数，路径不存在时返回 None
+    """
+    parts = tuple(reference[2:].split("."))
+
+    if len(parts) == 1:
+        key = parts[0]
+
+        def resolve_one(data: dict) -> Any:
+            return data.get(key) if isinstance(data, dict) else None
+
+        return resolve_one
+
+    def resolve(data: dict) -> Any:
+        value = data
+        for part in parts:
+            if isinstance(value, dict) and part in value:
+                value = value[part]
+            else:
+                return None
+        return value
+
+    return resolve
+
+
+def collect_paths(expression: Any) -> List[str]:
+    """
+    收集表达式引用的全部 JSON path（去重，保持出现顺序）
+
+    Args:
+        expression: 表达式树或操作数
+
+    Returns:
+        "$." 开头的路径列表
+    """
+    paths: List[str] = []
+
+    def visit(node: Any) -> None:
+        if isinstance(node, str) and node.startswith("$."):
+            if node not in paths:
+                paths.append(node)
+        elif isinstance(node, dict):
+            operator = node.get("operator")
+            if isinstance(operator, str) and operator.startswith("$."):
+                visit(operator)
+            visit(node.get("left"))
+            visit(node.get("right"))
+            for operand in node.get("operands", []):
+                visit(operand)
+
+    visit(expression)
+    return paths
+
+
+def expression_key(expression: dict) -> str:
+    """子表达式的结构化键：结构相同（忽略键顺序）的表达式键相同"""
+    return json.dumps(expression, sort_keys=True, ensure_ascii=False)
+
+
+@dataclass
+class CompiledRuleSet:
+    """整套规则的编译结果"""
+    evaluators: List[MemoEvaluator]                                 # 每条规则的求值函数
+    operands: List[Optional[Tuple[MemoEvaluator, MemoEvaluator]]]   # equals 规则的左右操作数（渲染时读取备忘）
+    shared_count: int                                               # 公共子表达式数量
+
+
+def compile_ruleset(expressions: Sequence[dict]) -> CompiledRuleSet:
+    """
+    整体编译一组规则表达式
+
+    出现两次及以上的子表达式，以及 equals 的非叶子操作数，会分配备忘槽位；
+    违规渲染复用同一 memo，不再重复计算右侧表达式。
+
+    Args:
+        expressions: 规则表达式列表
+
+    Returns:
+        编译结果；无法编译的规则其求值函数在调用时抛出原始异常
+    """
+    counts: Counter = Counter()
+    for expression in expressions:
+        _count_subexpressions(expression, counts)
+    shared = {key for key, count in counts.items() if count > 1}
+
+    compiler = ExpressionCompiler(shared)
+    evaluators: List[MemoEvaluator] = []
+    operands: List[Optional[Tuple[MemoEvaluator, MemoEvaluator]]] = []
+
+    for expression in expressions:
+        try:
+            # 先登记 equals 操作数，使规则自身求值与渲染共用同一槽位
+            rule_operands = None
+            if isinstance(expression, dict) and expression.get("operator") == "equals":
+                rule_operands = (
+                    compiler.compile_operand(expression.get("left"), memoize=True),
+                    compiler.compile_operand(expression.get("right"), memoize=True)
+                )
+            evaluator = compiler.compile(expression)
+        except Exception as e:
+            rule_operands, evaluator = None, _raising(e)
+        evaluators.append(evaluator)
+        operands.append(rule_operands)
+
+    return CompiledRuleSet(evaluators=evaluators, operands=operands, shared_count=len(shared))
+
+
+def _count_subexpressions(node: Any, counts: Counter) -> None:
+    if not isinstance(node, dict):
+        return
+    if node.get("operator") in ("equals", "add"):
+        counts[expression_key(node)] += 1
+    _count_subexpressions(node.get("left"), counts)
+    _count_subexpressions(node.get("right"), counts)
+    for operand in node.get("operands", []):
+        _count_subexpressions(operand, counts)
+
+
+def _raising(error: Exception) -> MemoEvaluator:
+    def evaluator(data: dict, memo: dict) -> Any:
+        raise error
+    return evaluator
+
+
+class ExpressionCompiler:
+    """
+    表达式编译器
+
+    memo_keys 中的子表达式求值结果写入 memo，同一 memo 内结构相同的
+    子表达式共享同一个槽位。
+    """
+
+    def __init__(self, memo_keys: Optional[Set[str]] = None):
+        self.memo_keys: Set[str] = set(memo_keys or ())
+        self._slots: Dict[str, int] = {}
+
+    def compile(self, expression: dict) -> MemoEvaluator:
+        """编译表达式节点"""
+        evaluator, _ = self._compile_node(expression)
+        return evaluator
+
+    def compile_operand(self, reference: Any, memoize: bool = False) -> MemoEvaluator:
+        """
+        编译操作数
+
+        Args:
+            reference: 操作数引用
+            memoize: 为嵌套表达式操作数分配备忘槽位
+        """
+        if memoize and isinstance(reference, dict):
+            self.memo_keys.add(expression_key(reference))
+        evaluator, _ = self._compile_reference(reference)
+        return evaluator
+
+    def _memoize(self, expression: dict, evaluator: MemoEvaluator) -> MemoEvaluator:
+        key = expression_key(expression)
+        if key not in self.memo_keys:
+            return evaluator
+        slot = self._slots.setdefault(key, len(self._slots))
+
+        def memoized(data: dict, memo: dict) -> Any:
+            if slot in memo:
+                return memo[slot]
+            value = evaluator(data, memo)
+            memo[slot] = value
+            return value
+
+        return memoized
+
+    def _compile_reference(self, reference: Any) -> Tuple[MemoEvaluator, Any]:
+        """编译操作数，返回 (求值函数, 常量值或 _NOT_CONSTANT)"""
+        if isinstance(reference, (int, float)):
+            return _constant(float(reference))
+        elif isinstance(reference, str) and reference.startswith("$."):
+            return _compile_path_reference(reference), _NOT_CONSTANT
+        elif isinstance(reference, dict):
+            return self._compile_node(reference)
+        else:
+            # 其他字面量原样返回；非数值字面量不参与折叠，保持运行期语义
+            if reference is None:
+                return _constant(None)
+            return (lambda data, memo: reference), _NOT_CONSTANT
+
+    def _compile_node(self, expression: dict) -> Tuple[MemoEvaluator, Any]:
+        """编译表达式节点，返回 (求值函数, 常量值或 _NOT_CONSTANT)"""
+        operator = expression.get("operator")
+
+        if operator == "equals":
+            evaluator, const = self._compile_equals(expression)
+        elif operator == "add":
+            evaluator, const = self._compile_add(expression)
+        elif isinstance(operator, str) and operator.startswith("$."):
+            return _compile_path_reference(operator), _NOT_CONSTANT
+        elif operator is None:
+            raise ValueError(f"Expression is missing operator: {expression}")
+        else:
+            print(f"Warning: Unknown operator: {operator}")
+            return _constant(None)
+
+        if const is not _NOT_CONSTANT:
+            return evaluator, const
+        return self._memoize(expression, evaluator), _NOT_CONSTANT
+
+    def _compile_equals(self, expression: dict) -> Tuple[MemoEvaluator, Any]:
+        left, left_const = self._compile_reference(expression.get("left"))
+        right, right_const = self._compile_reference(expression.get("right"))
+        tolerance = expression.get("tolerance", DEFAULT_TOLERANCE)
+
+        folded = (left_const, right_const)
+        if all(c is None or _is_number(c) for c in folded):
+            if left_const is None or right_const is None:
+                return _constant(False)
+            return _constant(abs(left_const - right_const) <= tolerance)
+
+        def equals(data: dict, memo: dict) -> bool:
+            lhs = left(data, memo)
+            rhs = right(data, memo)
+            if lhs is None or rhs is None:
+                return False
+            return abs(lhs - rhs) <= tolerance
+
+        return equals, _NOT_CONSTANT
+
+    def _compile_add(self, expression: dict) -> Tuple[MemoEvaluator, Any]:
+        constant_sum = 0
+        evaluators = []
+
+        for operand in expression.get("operands", []):
+            evaluator, const = self._compile_reference(operand)
+            if const is None:
+                return _constant(None)
+            if _is_number(const):
+                constant_sum += const
+            else:
+                evaluators.append(evaluator)
+
+        if not evaluators:
+            return _constant(constant_sum)
+
+        operands = tuple(evaluators)
+
+        if len(operands) == 2 and constant_sum == 0:
+            first, second = operands
+
+            def add_pair(data: dict, memo: dict) -> Any:
+                a = first(data, memo)
+                if a is None:
+                    return None
+                b = second(data, memo)
+                if b is None:
+                    return None
+                return a + b
+
+            return add_pair, _NOT_CONSTANT
+
+        def add(data: dict, memo: dict) -> Any:
+            result = constant_sum
+            for evaluator in operands:
+                val = evaluator(data, memo)
+                if val is None:
+                    return None
+                result += val
+            return result
+
+        return add, _NOT_CONSTANT
+
+
+def _constant(value: Any) -> Tuple[MemoEvaluator, Any]:
+    """构造常量节点"""
+    return (lambda data, memo: value), value
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _compile_path_reference(reference: str) -> MemoEvaluator:
+    """把 compile_path 的解析函数包装为带 memo 签名的求值函数（路径解析开销低，不做备忘）"""
+    resolve = compile_path(reference)
+
+    def resolve_reference(data: dict, memo: dict) -> Any:
+        return resolve(data)
+
+    return resolve_reference
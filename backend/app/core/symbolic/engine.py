@@ -1,25 +1,54 @@
 # fincode/backend/app/core/symbolic/engine.py
 
-import json
-import os
+import time
 from pathlib import Path
-from typing import List, Optional, Any
-from dataclasses import dataclass
-
-# Try to import zen-engine, provide mock if not available
-try:
-    from zen_engine import ZenEngine
-    ZEN_ENGINE_AVAILABLE = True
-except ImportError:
-    ZEN_ENGINE_AVAILABLE = False
-    print("Warning: zen-engine not installed, using mock validation")
+from typing import Dict, Iterator, List, Optional, Any, Mapping, Sequence, Set, Tuple, Union
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.core.symbolic.compiler import (
+    CompiledRuleSet,
+    Evaluator,
+    MemoEvaluator,
+    collect_paths,
+    compile_expression,
+    compile_path,
+    compile_ruleset,
+    expression_key,
+)
+from app.core.symbolic.cache import RulesetCache, RulesetSnapshot, ruleset_cache as default_ruleset_cache
+from app.core.symbolic.profiler import RuleProfiler, rule_profiler
+from app.core.symbolic.result_cache import ResultCache, result_cache as default_result_cache
+from app.core.symbolic.batch import (
+    NUMPY_AVAILABLE,
+    ColumnTable,
+    NotVectorizable,
+    VectorEvaluator,
+    compile_vectorized,
+    np,
+    to_valid_mask,
+)
+
+from app.core.symbolic.zen_backend import ZEN_ENGINE_AVAILABLE, ZenDecisionPool, evaluate_rules, get_decision_pool
+
+# 规则执行后端：python（编译闭包）/ zen（Zen Engine 决策图）
+BACKEND_PYTHON = "python"
+BACKEND_ZEN = "zen"
+
+# fail-fast 模式下的规则优先级：严重程度越高越先求值
+SEVERITY_RANK = {"CRITICAL": 0, "WARNING": 1, "INFO": 2}
+
+# fail-fast 模式每执行多少次重新按历史违规率排序
+REORDER_INTERVAL = 32
 
 @dataclass
 class ValidationResult:
     """校验结果"""
     status: str  # APPROVED / REJECTED
-    violations: List[dict]
+    violations: List[Mapping[str, Any]]  # Violation 记录，按需渲染文本
     retry_allowed: bool
+    ruleset_version: Optional[str] = None  # 校验所用的规则集版本
+    complete: bool = True  # False 表示 fail-fast 模式提前结束，违规列表不完整
 
 
 @dataclass
@@ -31,221 +60,659 @@ class RuleDefinition:
     severity: str  # CRITICAL / WARNING / INFO
     expression: dict
     correction_hint: str
+    evaluator: Optional[Evaluator] = field(default=None, repr=False, compare=False)  # 编译后的表达式
+    paths: List[str] = field(default_factory=list, repr=False, compare=False)  # 引用的 JSON path
+
+
+class Violation(Mapping):
+    """
+    规则违规记录
+
+    只保存规则与求值得到的操作数值，expected / actual 文本在首次读取
+    （生成反馈、序列化）时才渲染。实现只读 Mapping 接口，可按 dict 使用。
+    """
+
+    __slots__ = ("rule", "operands", "_text")
+
+    FIELDS = ("rule_id", "rule_name", "severity", "expected", "actual", "correction_hint")
+
+    def __init__(self, rule: RuleDefinition, operands: Optional[Tuple[Any, Any]] = None):
+        self.rule = rule
+        self.operands = operands  # equals 规则的 (左值, 右值)
+        self._text: Optional[Tuple[str, str]] = None
+
+    @property
+    def rule_id(self) -> str:
+        return self.rule.rule_id
+
+    @property
+    def severity(self) -> str:
+        return self.rule.severity
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "rule_id":
+            return self.rule.rule_id
+        elif key == "rule_name":
+            return self.rule.name
+        elif key == "severity":
+            return self.rule.severity
+        elif key == "expected":
+            return self._render()[0]
+        elif key == "actual":
+            return self._render()[1]
+        elif key == "correction_hint":
+            return self.rule.correction_hint
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def to_dict(self) -> dict:
+        """渲染为普通 dict（用于 JSON 序列化）"""
+        return {key: self[key] for key in self.FIELDS}
+
+    def _render(self) -> Tuple[str, str]:
+        """格式化期望值与实际值的字符串表示"""
+        if self._text is None:
+            expression = self.rule.expression
+            if self.operands is None:
+                self._text = (str(expression), str(expression))
+            else:
+                left_val, right_val = self.operands
+                left = _format_value(expression.get("left"), left_val)
+                right = _format_value(expression.get("right"), right_val)
+                self._text = (f"{left} = {right}", f"{left} ≠ {_format_number(right_val)}")
+        return self._text
+
+
+def _format_value(value_ref: Any, value: Any) -> str:
+    """格式化值为字符串：引用与表达式按数值格式化，字面量原样输出"""
+    if isinstance(value_ref, dict) or (isinstance(value_ref, str) and value_ref.startswith("$.")):
+        return _format_number(value)
+    return str(value_ref)
+
+
+def _format_number(value: Any) -> str:
+    """格式化数字为万元"""
+    if isinstance(value, (int, float)):
+        if value >= 10000:
+            return f"{value / 10000:.0f}万"
+        else:
+            return str(value)
+    return str(value)
+
+
+def compile_rule(rule: RuleDefinition) -> Evaluator:
+    """编译单条规则表达式并记录其引用的 JSON path"""
+    rule.evaluator = compile_expression(rule.expression)
+    rule.paths = collect_paths(rule.expression)
+    return rule.evaluator
+
+
+class PreparedRules:
+    """
+    针对某个规则列表预先构建的执行结构
+
+    包括整套规则的编译结果（公共子表达式共享备忘槽位）、JSON path 倒排索引
+    以及按需创建的 Zen 决策池。规则列表被整体替换或原地增删后重新构建。
+    """
+
+    def __init__(self, rules: List[RuleDefinition]):
+        self.rules = rules
+        self.size = len(rules)
+        self.program: CompiledRuleSet = compile_ruleset([rule.expression for rule in rules])
+        self.zen_pool: Optional[ZenDecisionPool] = None
+        self._vectorized: Optional[List[Union[VectorEvaluator, None, Exception]]] = None
+
+        # 结果缓存键前缀：表达式相同的规则结果可互相复用，规则重载后未变化的规则仍可命中
+        self.result_keys: List[str] = [expression_key(rule.expression) for rule in rules]
+
+        # 每条规则的求值与违规次数，fail-fast 模式据此估计违规概率
+        self.evaluations: List[int] = [0] * self.size
+        self.failures: List[int] = [0] * self.size
+        self._order: Optional[List[int]] = None
+        self._order_age = 0
+
+        # JSON path -> 引用该路径的规则下标，用于增量校验
+        self.path_index: Dict[str, List[int]] = {}
+        self.path_resolvers: Dict[str, Evaluator] = {}
+        for index, rule in enumerate(rules):
+            if rule.evaluator is None:
+                compile_rule(rule)
+            for path in rule.paths:
+                self.path_index.setdefault(path, []).append(index)
+                if path not in self.path_resolvers:
+                    self.path_resolvers[path] = compile_path(path)
+
+    def vectorized(self) -> List[Union[VectorEvaluator, None, Exception]]:
+        """
+        每条规则的向量化求值器（首次批量校验时构建，之后复用）
+
+        不可向量化的规则为 None，编译出错的规则为对应异常
+        """
+        if self._vectorized is None:
+            compiled: List[Union[VectorEvaluator, None, Exception]] = []
+            for rule in self.rules:
+                try:
+                    compiled.append(compile_vectorized(rule.expression))
+                except NotVectorizable:
+                    compiled.append(None)
+                except Exception as e:
+                    compiled.append(e)
+            self._vectorized = compiled
+        return self._vectorized
+
+    def matches(self, rules: List[RuleDefinition]) -> bool:
+        return self.rules is rules and self.size == len(rules)
+
+    def record_outcome(self, index: int, violated: bool) -> None:
+        """记录规则的一次求值结果"""
+        self.evaluations[index] += 1
+        if violated:
+            self.failures[index] += 1
+
+    def priority_order(self) -> List[int]:
+        """
+        fail-fast 模式的求值顺序
+
+        先按严重程度，再按历史违规率（拉普拉斯平滑）降序，
+        每 REORDER_INTERVAL 次调用重新排序一次。
+        """
+        if self._order is None or self._order_age >= REORDER_INTERVAL:
+            unknown_rank = len(SEVERITY_RANK)
+            self._order = sorted(
+                range(self.size),
+                key=lambda i: (
+                    SEVERITY_RANK.get(self.rules[i].severity, unknown_rank),
+                    -(self.failures[i] + 1) / (self.evaluations[i] + 2)
+                )
+            )
+            self._order_age = 0
+        self._order_age += 1
+        return self._order
 
 
 class SymbolicEngine:
     """符号引擎 - 基于 Zen Engine 的规则校验"""
 
-    def __init__(self, rules_dir: str = "rules"):
+    def __init__(
+        self,
+        rules_dir: str = "rules",
+        ruleset_cache: Optional[RulesetCache] = None,
+        backend: Optional[str] = None,
+        profiler: Optional[RuleProfiler] = None,
+        result_cache: Optional[ResultCache] = None
+    ):
         self.rules_dir = Path(rules_dir)
         self.rules: List[RuleDefinition] = []
-        self.zen_engine = None
 
-        if ZEN_ENGINE_AVAILABLE:
-            try:
-                self.zen_engine = ZenEngine()
-            except Exception as e:
-                print(f"Warning: Failed to initialize Zen Engine: {e}")
+        # 执行后端：zen 不可用时回退到 Python 求值器
+        self.backend = backend or settings.SYMBOLIC_BACKEND or BACKEND_PYTHON
+        if self.backend == BACKEND_ZEN and not ZEN_ENGINE_AVAILABLE:
+            print("Warning: zen-engine not available, falling back to python backend")
+            self.backend = BACKEND_PYTHON
+        self.zen_pool_size = settings.ZEN_POOL_SIZE
+
+        # 规则集缓存与当前规则版本（目录内容哈希）
+        self.ruleset_cache = ruleset_cache or default_ruleset_cache
+        self.ruleset_version: Optional[str] = None
+        self._loaded_categories: List[Optional[str]] = []
+
+        # 当前规则列表对应的编译结果与索引
+        self._prepared: Optional[PreparedRules] = None
+
+        # 规则执行统计（默认使用进程级实例，SYMBOLIC_PROFILING 开启计时）
+        self.profiler = profiler or rule_profiler
+
+        # 规则结果缓存（以引用字段取值为键，跨文档、跨重试复用）
+        self.result_cache = result_cache if result_cache is not None else default_result_cache
 
     def load_rules(self, category: Optional[str] = None) -> int:
         """
         加载规则库
 
+        规则文件经进程级 RulesetCache 读取，同一目录只解析、编译一次；
+        规则目录变化后，下一次 validate 会原子切换到新版本。
+
         Args:
             category: 规则类别（accounting/tax/internal_control）
 
         Returns:
             加载的规则数量
         """
-        if not self.rules_dir.exists():
+        snapshot = self.ruleset_cache.get(self.rules_dir)
+        if snapshot is None:
             print(f"Warning: Rules directory {self.rules_dir} does not exist")
             return 0
 
-        loaded_count = 0
+        rules = self._rules_from_snapshot(snapshot, category)
+        self.rules = self.rules + rules
+        self._loaded_categories.append(category)
+        self.ruleset_version = snapshot.version
+
+        print(f"Loaded {len(rules)} rules from {self.rules_dir}")
+        return len(rules)
+
+    def _rules_from_snapshot(self, snapshot: RulesetSnapshot, category: Optional[str]) -> List[RuleDefinition]:
+        """从规则集快照中取出（必要时编译）指定类别的规则"""
+        rules = []
+
+        for entry in snapshot.entries:
+            if entry.error is not None:
+                print(f"Warning: Failed to load rule from {entry.path}: {entry.error}")
+                continue
+
+            rule = entry.compiled
+            if rule is None:
+                try:
+                    rule_data = entry.data
+                    rule = RuleDefinition(
+                        rule_id=rule_data.get("rule_id", ""),
+                        name=rule_data.get("name", ""),
+                        category=rule_data.get("category", ""),
+                        severity=rule_data.get("severity", "INFO"),
+                        expression=rule_data.get("expression", {}),
+                        correction_hint=rule_data.get("correction_hint", "")
+                    )
+                    compile_rule(rule)
+                except Exception as e:
+                    print(f"Warning: Failed to load rule from {entry.path}: {e}")
+                    continue
+                entry.compiled = rule
+
+            if category is None or rule.category == category:
+                rules.append(rule)
+
+        return rules
+
+    def _sync_rules(self) -> None:
+        """规则目录已发布新快照时，按已加载的类别重建规则列表并整体替换"""
+        if not self._loaded_categories:
+            return
+
+        snapshot = self.ruleset_cache.current(self.rules_dir)
+        if snapshot is None or snapshot.version == self.ruleset_version:
+            return
+
+        rules = []
+        for category in self._loaded_categories:
+            rules.extend(self._rules_from_snapshot(snapshot, category))
+
+        self.rules = rules
+        self.ruleset_version = snapshot.version
+        print(f"Reloaded {len(rules)} rules from {self.rules_dir}")
+
+    def validate(
+        self,
+        neural_output: dict,
+        previous_data: Optional[dict] = None,
+        previous_violations: Optional[List[Mapping[str, Any]]] = None,
+        previous_version: Optional[str] = None,
+        fail_fast: bool = False
+    ) -> ValidationResult:
+        """
+        校验神经引擎输出
 
-        for json_file in self.rules_dir.rglob("*.json"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    rule_data = json.load(f)
+        传入上一次校验的数据和违规列表时执行增量校验：只重新评估
+        引用了变化字段的规则，其余规则沿用上一次的结果。规则集版本
+        与上一次不同时退化为全量校验。
 
-                rule = RuleDefinition(
-                    rule_id=rule_data.get("rule_id", ""),
-                    name=rule_data.get("name", ""),
-                    category=rule_data.get("category", ""),
-                    severity=rule_data.get("severity", "INFO"),
-                    expression=rule_data.get("expression", {}),
-                    correction_hint=rule_data.get("correction_hint", "")
-                )
+        fail_fast 模式按严重程度和历史违规率排序求值，遇到第一条违规即返回
+        （complete=False），用于纠偏循环的中间轮次；最终轮次应使用全量校验。
+        上一次结果不完整时不能作为增量校验的基准。
 
-                if category is None or rule.category == category:
-                    self.rules.append(rule)
-                    loaded_count += 1
+        Args:
+            neural_output: 神经引擎的结构化输出
+            previous_data: 上一次校验的 extracted_data（可选）
+            previous_violations: 上一次校验的违规列表（可选）
+            previous_version: 上一次校验的规则集版本（可选）
+            fail_fast: 遇到第一条违规即停止
+
+        Returns:
+            校验结果，包含状态和违规详情
+        """
+        self._sync_rules()
+        rules = self.rules
+        prepared = self._prepare(rules)
+        violations = []
+        memo: dict = {}
+
+        data = neural_output.get("extracted_data", {})
+
+        version_changed = previous_version is not None and previous_version != self.ruleset_version
+        if previous_data is None or version_changed:
+            affected = None
+            carried = {}
+        else:
+            affected = self._affected_rules(prepared, previous_data, data)
+            carried = {v.get("rule_id"): v for v in previous_violations or []}
 
-            except Exception as e:
-                print(f"Warning: Failed to load rule from {json_file}: {e}")
+        if fail_fast:
+            return self._validate_fail_fast(prepared, data, memo, affected, carried)
 
-        print(f"Loaded {loaded_count} rules from {self.rules_dir}")
-        return loaded_count
+        outcomes = self._evaluate_with_zen(prepared, data) if self.backend == BACKEND_ZEN else None
+        resolved = {} if self.result_cache.enabled else None
 
-    def _evaluate_expression(self, expression: dict, data: dict) -> Any:
+        for index, rule in enumerate(rules):
+            if affected is not None and index not in affected:
+                violation = carried.get(rule.rule_id)
+            else:
+                if outcomes is not None:
+                    violation = self._check_rule(prepared, index, data, memo, is_valid=outcomes[index])
+                else:
+                    violation = self._check_rule(prepared, index, data, memo, resolved=resolved)
+                prepared.record_outcome(index, violation is not None)
+            if violation is not None:
+                violations.append(violation)
+
+        return self._build_result(violations)
+
+    def _validate_fail_fast(
+        self,
+        prepared: PreparedRules,
+        data: dict,
+        memo: dict,
+        affected: Optional[Set[int]],
+        carried: Dict[str, Mapping[str, Any]]
+    ) -> ValidationResult:
+        """按优先级求值，返回第一条违规"""
+        order = prepared.priority_order()
+
+        # 未受影响的规则上次已违规，本次必然仍违规，无需求值
+        if affected is not None:
+            for index in order:
+                if index not in affected:
+                    violation = carried.get(prepared.rules[index].rule_id)
+                    if violation is not None:
+                        return self._build_result([violation], complete=False)
+
+        resolved = {} if self.result_cache.enabled else None
+        for index in order:
+            if affected is not None and index not in affected:
+                continue
+            violation = self._check_rule(prepared, index, data, memo, resolved=resolved)
+            prepared.record_outcome(index, violation is not None)
+            if violation is not None:
+                return self._build_result([violation], complete=False)
+
+        return self._build_result([])
+
+    def affected_rules(self, previous_data: dict, data: dict) -> Set[int]:
         """
-        评估规则表达式
+        找出受数据变化影响的规则
 
         Args:
-            expression: JSON 表达式树
-            data: 输入数据
+            previous_data: 上一次校验的 extracted_data
+            data: 本次 extracted_data
 
         Returns:
-            评估结果
+            需要重新评估的规则下标集合
         """
-        operator = expression.get("operator")
-
-        if operator == "equals":
-            left = self._resolve_value(expression.get("left"), data)
-            right = self._resolve_value(expression.get("right"), data)
-            tolerance = expression.get("tolerance", 0.01)
-
-            if left is None or right is None:
-                return False
-                
-            return abs(left - right) <= tolerance
-
-        elif operator == "add":
-            operands = expression.get("operands", [])
-            result = 0
-            for operand in operands:
-                val = self._resolve_value(operand, data)
-                if val is None:
-                    return None
-                result += val
-            return result
-
-        elif operator.startswith("$"):
-            return self._resolve_value(expression, data)
+        return self._affected_rules(self._prepare(self.rules), previous_data, data)
 
-        else:
-            print(f"Warning: Unknown operator: {operator}")
-            return None
+    def _affected_rules(self, prepared: PreparedRules, previous_data: dict, data: dict) -> Set[int]:
+        affected: Set[int] = set()
+
+        for path, rule_indices in prepared.path_index.items():
+            resolve = prepared.path_resolvers[path]
+            if resolve(previous_data) != resolve(data):
+                affected.update(rule_indices)
+
+        return affected
 
-    def _resolve_value(self, reference: Any, data: dict) -> Any:
+    def _prepare(self, rules: List[RuleDefinition]) -> PreparedRules:
+        """获取规则列表对应的编译结果与索引，规则列表变化时重建"""
+        prepared = self._prepared
+        if prepared is None or not prepared.matches(rules):
+            prepared = PreparedRules(rules)
+            self._prepared = prepared
+        return prepared
+
+    def validate_batch(self, batch: Union[Sequence[dict], Mapping[str, Sequence]]) -> List[ValidationResult]:
         """
-        解析值引用
+        批量校验多份 extracted_data
+
+        每条规则编译为 NumPy 数组运算，对全部文档一次性求值；
+        只有违规文档才渲染违规详情。含非数值字段的单元格回退到逐条求值。
 
         Args:
-            reference: 可以是直接值或 JSON path
-            data: 数据上下文
+            batch: extracted_data 字典列表，或列式表 {JSON path: 列值}
 
         Returns:
-            解析后的值
+            与输入文档一一对应的校验结果
         """
-        if isinstance(reference, (int, float)):
-            return float(reference)
-        elif isinstance(reference, str) and reference.startswith("$."):
-            parts = reference[2:].split(".")
-            value = data
-            for part in parts:
-                if isinstance(value, dict) and part in value:
-                    value = value[part]
-                else:
-                    return None
-            return value
-        elif isinstance(reference, dict):
-            return self._evaluate_expression(reference, data)
+        is_columnar = isinstance(batch, Mapping)
+
+        if not NUMPY_AVAILABLE:
+            if is_columnar:
+                raise RuntimeError("列式批量校验需要安装 numpy")
+            return [self.validate({"extracted_data": data}) for data in batch]
+
+        self._sync_rules()
+        rules = self.rules
+        prepared = self._prepare(rules)
+        paths = list(prepared.path_index)
+
+        if is_columnar:
+            table = ColumnTable.from_columns(batch, paths)
         else:
-            return reference
+            table = ColumnTable.from_records(batch, paths)
+
+        violations: List[List[Violation]] = [[] for _ in range(table.size)]
+        vector_program = prepared.vectorized()
+
+        for rule_index, rule in enumerate(rules):
+            vector_evaluator = vector_program[rule_index]
+            if isinstance(vector_evaluator, Exception):
+                self.profiler.record_error(rule.rule_id, vector_evaluator)
+                continue
 
-    def validate(self, neural_output: dict) -> ValidationResult:
+            if vector_evaluator is None:
+                fallback_rows = range(table.size)
+            else:
+                started = time.perf_counter_ns()
+                irregular = table.irregular_rows(rule.paths)
+                valid = to_valid_mask(vector_evaluator(table), table.size)
+                failed_rows = np.flatnonzero(~valid & ~irregular)
+                for index in failed_rows:
+                    try:
+                        violations[index].append(
+                            self._evaluate_rule(prepared, rule_index, table.row(index), {}, is_valid=False)
+                        )
+                    except Exception as e:
+                        self.profiler.record_error(rule.rule_id, e)
+                fallback_rows = np.flatnonzero(irregular)
+                if self.profiler.enabled:
+                    self.profiler.record(
+                        rule.rule_id,
+                        time.perf_counter_ns() - started,
+                        calls=table.size - len(fallback_rows),
+                        violations=len(failed_rows)
+                    )
+
+            for index in fallback_rows:
+                violation = self._check_rule(prepared, rule_index, table.row(index), {})
+                if violation is not None:
+                    violations[index].append(violation)
+
+        return [self._build_result(v) for v in violations]
+
+    def _evaluate_with_zen(self, prepared: PreparedRules, data: dict) -> Optional[List[bool]]:
         """
-        校验神经引擎输出
+        通过 Zen 决策图一次执行全部规则
+
+        Returns:
+            每条规则是否通过；Zen 求值失败时返回 None，由调用方回退到 Python 求值器
+        """
+        try:
+            if prepared.zen_pool is None:
+                prepared.zen_pool = get_decision_pool(
+                    [rule.expression for rule in prepared.rules],
+                    self.zen_pool_size
+                )
+            return evaluate_rules(prepared.zen_pool, prepared.size, data)
+        except Exception as e:
+            print(f"Warning: Zen evaluation failed, falling back to python backend: {e}")
+            return None
+
+    def _check_rule(
+        self,
+        prepared: PreparedRules,
+        index: int,
+        data: dict,
+        memo: dict,
+        is_valid: Optional[bool] = None,
+        resolved: Optional[dict] = None
+    ) -> Optional[Violation]:
+        """
+        对单份数据执行一条规则，并记录执行统计
+
+        共享子表达式的耗时计入首个求值它的规则；由 Zen 后端求值时
+        只统计违规记录的构造。
 
         Args:
-            neural_output: 神经引擎的结构化输出
+            prepared: 规则列表的编译结果
+            index: 规则下标
+            data: extracted_data
+            memo: 本次校验共享的子表达式备忘
+            is_valid: 其他后端已求得的结果（可选），提供时不再求值
+            resolved: 本次校验已解析的 {JSON path: 值}，提供时启用结果缓存
 
         Returns:
-            校验结果，包含状态和违规详情
+            违规记录；通过或求值异常时返回 None
         """
-        violations = []
-        retry_allowed = False
+        profiler = self.profiler
+        started = time.perf_counter_ns() if profiler.enabled else 0
+        try:
+            key = self._result_key(prepared, index, data, resolved) if resolved is not None else None
+            cached = self.result_cache.get(key) if key is not None else None
+            if cached is not None:
+                violated, operands = cached
+                violation = Violation(prepared.rules[index], operands) if violated else None
+            else:
+                violation = self._evaluate_rule(prepared, index, data, memo, is_valid)
+                if key is not None:
+                    self.result_cache.put(
+                        key,
+                        (False, None) if violation is None else (True, violation.operands)
+                    )
+        except Exception as e:
+            profiler.record_error(prepared.rules[index].rule_id, e)
+            return None
 
-        data = neural_output.get("extracted_data", {})
+        if profiler.enabled:
+            profiler.record(
+                prepared.rules[index].rule_id,
+                time.perf_counter_ns() - started,
+                violations=int(violation is not None)
+            )
+        return violation
 
-        for rule in self.rules:
-            try:
-                is_valid = self._evaluate_expression(rule.expression, data)
-
-                if not is_valid:
-                    expected = self._format_expression(rule.expression, data)
-                    actual = self._format_actual(rule.expression, data)
-
-                    violation = {
-                        "rule_id": rule.rule_id,
-                        "rule_name": rule.name,
-                        "severity": rule.severity,
-                        "expected": expected,
-                        "actual": actual,
-                        "correction_hint": rule.correction_hint
-                    }
-                    violations.append(violation)
-                    
-                    retry_allowed = True
-
-            except Exception as e:
-                print(f"Warning: Failed to validate rule {rule.rule_id}: {e}")
+    def _result_key(self, prepared: PreparedRules, index: int, data: dict, resolved: dict) -> Optional[tuple]:
+        """
+        结果缓存键：(规则表达式, 引用字段取值)
 
+        Returns:
+            缓存键；字段取值不可哈希（如嵌套对象）时返回 None，不走缓存
+        """
+        values = []
+        for path in prepared.rules[index].paths:
+            if path in resolved:
+                value = resolved[path]
+            else:
+                value = resolved[path] = prepared.path_resolvers[path](data)
+            values.append(value)
+        key = (prepared.result_keys[index], tuple(values))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _evaluate_rule(
+        self,
+        prepared: PreparedRules,
+        index: int,
+        data: dict,
+        memo: dict,
+        is_valid: Optional[bool] = None
+    ) -> Optional[Violation]:
+        """求值一条规则，违规时返回违规记录（异常向上抛出）"""
+        if is_valid is None:
+            is_valid = prepared.program.evaluators[index](data, memo)
+        if is_valid:
+            return None
+
+        rule = prepared.rules[index]
+        operands = prepared.program.operands[index]
+        if operands is None:
+            return Violation(rule)
+        left, right = operands
+        # 操作数已在求值时写入备忘，这里只读取，不渲染文本
+        return Violation(rule, (left(data, memo), right(data, memo)))
+
+    def _build_result(self, violations: List[Mapping[str, Any]], complete: bool = True) -> ValidationResult:
+        """根据违规列表汇总校验结果"""
         if len(violations) == 0:
             status = "APPROVED"
-        elif any(v.get("severity") == "CRITICAL" for v in violations):
-            status = "REJECTED"
         else:
             status = "REJECTED"
-            retry_allowed = True
 
         return ValidationResult(
             status=status,
             violations=violations,
-            retry_allowed=retry_allowed
+            retry_allowed=len(violations) > 0,
+            ruleset_version=self.ruleset_version,
+            complete=complete
         )
 
-    def _format_expression(self, expression: dict, data: dict) -> str:
-        """格式化期望值的字符串表示"""
-        operator = expression.get("operator")
-        if operator == "equals":
-            left = self._format_value(expression.get("left"), data)
-            right = self._format_value(expression.get("right"), data)
-            return f"{left} = {right}"
-        return str(expression)
-
-    def _format_actual(self, expression: dict, data: dict) -> str:
-        """格式化实际值的字符串表示"""
-        operator = expression.get("operator")
-        if operator == "equals":
-            left = self._format_value(expression.get("left"), data)
-            right_val = self._evaluate_expression(expression.get("right"), data)
-            right = self._format_number(right_val)
-            return f"{left} ≠ {right}"
-        return str(expression)
-
-    def _format_value(self, value_ref: Any, data: dict) -> str:
-        """格式化值为字符串"""
-        if isinstance(value_ref, str) and value_ref.startswith("$."):
-            value = self._resolve_value(value_ref, data)
-            return self._format_number(value)
-        elif isinstance(value_ref, dict):
-            value = self._evaluate_expression(value_ref, data)
-            return self._format_number(value)
-        else:
-            return str(value_ref)
+    def violation_fields(self, violations: List[Mapping[str, Any]]) -> List[str]:
+        """
+        违规规则引用的 JSON path（去重，保持出现顺序），用于纠偏重试时只复核相关字段
 
-    def _format_number(self, value: Any) -> str:
-        """格式化数字为万元"""
-        if isinstance(value, (int, float)):
-            if value >= 10000:
-                return f"{value / 10000:.0f}万"
-            else:
-                return str(value)
-        return str(value)
+        Args:
+            violations: 违规列表
+
+        Returns:
+            "$." 开头的路径列表
+        """
+        rules_by_id = {rule.rule_id: rule for rule in self.rules}
+        fields: List[str] = []
+        for v in violations:
+            rule = v.rule if isinstance(v, Violation) else rules_by_id.get(v.get("rule_id"))
+            if rule is None:
+                continue
+            for path in rule.paths or collect_paths(rule.expression):
+                if path not in fields:
+                    fields.append(path)
+        return fields
+
+    def severity_fields(self, severity: str = "CRITICAL") -> List[str]:
+        """
+        指定严重程度的规则引用的 JSON path（去重，保持规则顺序）
 
-    def generate_feedback(self, violations: List[dict]) -> str:
+        Args:
+            severity: CRITICAL / WARNING / INFO
+
+        Returns:
+            "$." 开头的路径列表
+        """
+        fields: List[str] = []
+        for rule in self.rules:
+            if str(rule.severity).upper() != severity.upper():
+                continue
+            for path in rule.paths or collect_paths(rule.expression):
+                if path not in fields:
+                    fields.append(path)
+        return fields
+
+    def generate_feedback(self, violations: List[Mapping[str, Any]]) -> str:
         """
         生成纠偏反馈
 
@@ -0,0 +1,108 @@
+"""
+规则执行统计
+按规则记录调用次数、违规次数、异常次数与求值耗时，用于定位拖慢校验的规则
+以及从不触发、可以从热路径移除的规则
+"""
+
+import json
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+
+@dataclass
+class RuleStats:
+    """单条规则的累计统计"""
+    rule_id: str
+    calls: int = 0
+    violations: int = 0
+    errors: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    last_error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["violation_rate"] = self.violations / self.calls if self.calls else 0.0
+        data["mean_us"] = self.total_ns / self.calls / 1000 if self.calls else 0.0
+        return data
+
+
+class RuleProfiler:
+    """
+    规则执行统计器
+
+    enabled 为 False 时不计时也不计数，只记录规则求值异常；
+    异常每条规则只打印一次警告，后续仅累加计数。
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._stats: Dict[str, RuleStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, rule_id: str) -> RuleStats:
+        stats = self._stats.get(rule_id)
+        if stats is None:
+            stats = self._stats.setdefault(rule_id, RuleStats(rule_id=rule_id))
+        return stats
+
+    def record(self, rule_id: str, elapsed_ns: int, calls: int = 1, violations: int = 0) -> None:
+        """
+        记录规则求值
+
+        Args:
+            rule_id: 规则 ID
+            elapsed_ns: 本次（批）求值耗时，纳秒
+            calls: 求值的文档数（向量化批量求值时大于 1）
+            violations: 违规的文档数
+        """
+        with self._lock:
+            stats = self._get(rule_id)
+            stats.calls += calls
+            stats.violations += violations
+            stats.total_ns += elapsed_ns
+            per_call = elapsed_ns // calls if calls else elapsed_ns
+            if per_call > stats.max_ns:
+                stats.max_ns = per_call
+
+    def record_error(self, rule_id: str, error: Exception) -> None:
+        """记录规则求值异常"""
+        with self._lock:
+            stats = self._get(rule_id)
+            stats.errors += 1
+            stats.last_error = f"{type(error).__name__}: {error}"
+            first = stats.errors == 1
+        if first:
+            print(f"Warning: Failed to validate rule {rule_id}: {error}")
+
+    def snapshot(self) -> List[dict]:
+        """返回全部规则的统计，按累计耗时降序"""
+        with self._lock:
+            items = [stats.to_dict() for stats in self._stats.values()]
+        items.sort(key=lambda item: item["total_ns"], reverse=True)
+        return items
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._stats.clear()
+
+    def dump(self, path: Path) -> None:
+        """
+        把统计写入 JSON 文件（如批量校验结束后）
+
+        Args:
+            path: 输出文件路径
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"enabled": self.enabled, "rules": self.snapshot()}, f, ensure_ascii=False, indent=2)
+
+
+# 全局实例
+rule_profiler = RuleProfiler(enabled=settings.SYMBOLIC_PROFILING)
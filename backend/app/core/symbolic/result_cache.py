@@ -0,0 +1,70 @@
+"""
+规则结果缓存
+以（规则表达式, 规则引用字段的取值）为键缓存规则的求值结果，
+同一公司重复提交、模板相同的报表以及纠偏重试中未变化的数据可直接复用结果
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.config import settings
+
+_MISSING = object()
+
+
+class ResultCache:
+    """
+    有界 LRU 结果缓存（线程安全）
+
+    maxsize 为 0 时关闭缓存。
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        读取缓存
+
+        Returns:
+            缓存的值，未命中时返回 None
+        """
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存与命中统计"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# 全局实例
+result_cache = ResultCache(settings.RULE_RESULT_CACHE_SIZE)
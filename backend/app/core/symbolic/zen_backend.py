@@ -0,0 +1,205 @@
+"""
+Zen Engine 执行后端
+把 rules/*.json 的表达式翻译为 JDM 决策图（单个 expressionNode，每条规则一个输出键），
+每个规则集只编译一次，并通过有界的引擎池复用已编译的 decision
+"""
+
+import hashlib
+import json
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Sequence
+
+# Try to import zen-engine (module name: zen), fall back to the Python evaluator if not available
+try:
+    import zen
+    ZEN_ENGINE_AVAILABLE = True
+except ImportError:
+    zen = None
+    ZEN_ENGINE_AVAILABLE = False
+    print("Warning: zen-engine not installed, falling back to the Python rule evaluator")
+
+from app.core.symbolic.compiler import DEFAULT_TOLERANCE
+
+# 决策图中数据挂载的根字段，路径统一翻译为 d["a"]["b"]，兼容中文等非标识符字段名
+CONTEXT_ROOT = "d"
+
+# 进程内缓存的决策池数量上限（按决策图内容哈希区分）
+MAX_CACHED_POOLS = 4
+
+
+def translate_expression(expression: Any) -> str:
+    """
+    把 JSON 表达式翻译为 ZEN 表达式语言
+
+    None 传播语义与 Python 求值器一致：add 任一操作数为 null 时结果为 null，
+    equals 任一侧为 null 时结果为 false。
+
+    Args:
+        expression: 表达式树或操作数
+
+    Returns:
+        ZEN 表达式字符串
+    """
+    if isinstance(expression, (int, float)):
+        return json.dumps(float(expression))
+    elif expression is None:
+        return "null"
+    elif isinstance(expression, str):
+        if expression.startswith("$."):
+            keys = "".join(f"[{json.dumps(part, ensure_ascii=False)}]" for part in expression[2:].split("."))
+            return f"{CONTEXT_ROOT}{keys}"
+        return json.dumps(expression, ensure_ascii=False)
+    elif isinstance(expression, dict):
+        operator = expression.get("operator")
+
+        if operator == "equals":
+            left = translate_expression(expression.get("left"))
+            right = translate_expression(expression.get("right"))
+            tolerance = json.dumps(float(expression.get("tolerance", DEFAULT_TOLERANCE)))
+            return f"((({left}) == null or ({right}) == null) ? false : (abs(({left}) - ({right})) <= {tolerance}))"
+
+        elif operator == "add":
+            operands = [translate_expression(o) for o in expression.get("operands", [])]
+            if not operands:
+                return "0"
+            null_check = " or ".join(f"({o}) == null" for o in operands)
+            total = " + ".join(f"({o})" for o in operands)
+            return f"(({null_check}) ? null : ({total}))"
+
+        elif isinstance(operator, str) and operator.startswith("$."):
+            return translate_expression(operator)
+
+        elif operator is None:
+            raise ValueError(f"Expression is missing operator: {expression}")
+
+        else:
+            return "null"
+    else:
+        raise ValueError(f"Unsupported operand: {expression!r}")
+
+
+def build_decision_content(expressions: Sequence[dict]) -> str:
+    """
+    构建 JDM 决策图
+
+    Args:
+        expressions: 规则表达式列表，第 i 条规则的结果输出到键 "r{i}"
+
+    Returns:
+        JDM JSON 字符串
+    """
+    graph = {
+        "nodes": [
+            {"id": "input", "type": "inputNode", "name": "request", "position": {"x": 0, "y": 0}},
+            {
+                "id": "rules",
+                "type": "expressionNode",
+                "name": "rules",
+                "position": {"x": 240, "y": 0},
+                "content": {
+                    "expressions": [
+                        {"id": f"r{i}", "key": f"r{i}", "value": translate_expression(expression)}
+                        for i, expression in enumerate(expressions)
+                    ]
+                }
+            },
+            {"id": "output", "type": "outputNode", "name": "response", "position": {"x": 480, "y": 0}}
+        ],
+        "edges": [
+            {"id": "input-rules", "sourceId": "input", "targetId": "rules", "type": "edge"},
+            {"id": "rules-output", "sourceId": "rules", "targetId": "output", "type": "edge"}
+        ]
+    }
+    return json.dumps(graph, ensure_ascii=False)
+
+
+class ZenDecisionPool:
+    """
+    有界的 Zen 引擎池
+
+    每个槽位持有一个 ZenEngine 及其已编译的 decision，按需创建，
+    最多 size 个；池耗尽时调用方阻塞等待归还。
+    """
+
+    def __init__(self, content: str, size: int = 4):
+        if not ZEN_ENGINE_AVAILABLE:
+            raise RuntimeError("zen-engine 未安装")
+        self.content = content
+        self.size = max(1, size)
+        self._idle: "queue.Queue" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def decision(self) -> Iterator[Any]:
+        """借出一个已编译的 decision"""
+        try:
+            decision = self._idle.get_nowait()
+        except queue.Empty:
+            decision = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    decision = zen.ZenEngine().create_decision(self.content)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                decision = self._idle.get()
+        try:
+            yield decision
+        finally:
+            self._idle.put(decision)
+
+    def evaluate(self, data: dict) -> dict:
+        """以 {CONTEXT_ROOT: data} 为上下文执行决策图，返回输出对象"""
+        with self.decision() as decision:
+            response = decision.evaluate({CONTEXT_ROOT: data})
+        return response.get("result") or {}
+
+
+_pools: "OrderedDict[str, ZenDecisionPool]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def get_decision_pool(expressions: Sequence[dict], size: int = 4) -> ZenDecisionPool:
+    """
+    获取（必要时创建）规则集对应的决策池，同一决策图在进程内共享
+
+    Args:
+        expressions: 规则表达式列表
+        size: 池大小上限
+    """
+    content = build_decision_content(expressions)
+    key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ZenDecisionPool(content, size)
+            _pools[key] = pool
+            while len(_pools) > MAX_CACHED_POOLS:
+                _pools.popitem(last=False)
+        else:
+            _pools.move_to_end(key)
+        return pool
+
+
+def evaluate_rules(pool: ZenDecisionPool, rule_count: int, data: dict) -> List[bool]:
+    """
+    执行全部规则，返回每条规则是否通过
+
+    Raises:
+        Exception: Zen 求值失败（如字段类型不是数值），调用方应回退到 Python 求值器
+    """
+    result = pool.evaluate(data)
+    return [bool(result.get(f"r{i}")) for i in range(rule_count)]
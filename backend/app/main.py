@@ -3,16 +3,35 @@ FinCode FastAPI Application Entry Point
 神经符号协同财务审计助手 - 应用入口
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import audit, qa, report
+from app.api import audit, qa, report, rules
+from app.core.config import settings
 from app.core.database import engine
+from app.core.neural.http import http_clients
+from app.core.symbolic.cache import ruleset_cache
+from app.services.jobs import audit_workers
 from app.models.database import Base
 
 # 创建数据库表（如果不存在）
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动规则热加载监测与审计工作者池，退出时依次停止并关闭共享的推理连接"""
+    ruleset_cache.start_watcher(settings.RULES_RELOAD_INTERVAL)
+    if settings.AUDIT_WORKERS > 0:
+        audit_workers.start()
+    yield
+    await audit_workers.stop()
+    ruleset_cache.stop_watcher()
+    await http_clients.aclose()
+
+
 # 创建 FastAPI 应用实例
 app = FastAPI(
     title="FinCode API",
@@ -20,6 +39,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS 配置
@@ -35,6 +55,7 @@ app.add_middleware(
 app.include_router(audit.router, prefix="/api/v1/audit", tags=["审计"])
 app.include_router(qa.router, prefix="/api/v1/qa", tags=["问答"])
 app.include_router(report.router, prefix="/api/v1/report", tags=["报告"])
+app.include_router(rules.router, prefix="/api/v1/rules", tags=["规则"])
 
 
 @app.get("/", tags=["健康检查"])
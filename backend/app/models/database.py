@@ -3,7 +3,7 @@ SQLAlchemy ORM 数据库模型
 定义 Document、Audit 和 Report 表结构
 """
 
-from sqlalchemy import Column, String, Float, Integer, Text, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, Text, DateTime, JSON, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
 import uuid
@@ -21,6 +21,12 @@ class TaskStatusEnum(str, enum.Enum):
     FAILED = "failed"
 
 
+class JobLaneEnum(str, enum.Enum):
+    """审计任务队列通道"""
+    INTERACTIVE = "interactive"  # 用户交互发起，优先执行
+    BATCH = "batch"  # 批量筛查
+
+
 class RiskSeverityEnum(str, enum.Enum):
     """风险严重程度枚举"""
     CRITICAL = "critical"
@@ -124,3 +130,53 @@ class Report(Base):
 
     def __repr__(self):
         return f"<Report(id={self.id}, audit_id={self.audit_id}, format={self.format})>"
+
+
+class AuditJob(Base):
+    """
+    审计任务队列表
+    持久化待执行的审计任务，由工作进程按通道优先级领取执行，进程重启后可恢复
+    """
+    __tablename__ = "audit_jobs"
+    __table_args__ = (
+        Index("ix_audit_jobs_claim", "status", "priority", "created_at"),
+    )
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    audit_id = Column(String(36), ForeignKey("audits.id"), nullable=False)
+    lane = Column(String(20), default="interactive", comment="队列通道")
+    priority = Column(Integer, default=0, comment="领取优先级，越小越先执行")
+    status = Column(String(20), default="pending", comment="任务状态")
+
+    # 执行控制
+    attempts = Column(Integer, default=0, comment="已执行次数")
+    max_attempts = Column(Integer, default=3, comment="最大执行次数")
+    deadline = Column(Float, nullable=True, comment="单次执行截止时间（秒）")
+    worker_id = Column(String(64), nullable=True, comment="执行中的工作者")
+    error_message = Column(Text, nullable=True, comment="错误信息")
+
+    # 时间戳
+    created_at = Column(DateTime, default=func.now(), comment="创建时间")
+    started_at = Column(DateTime, nullable=True, comment="开始执行时间")
+    heartbeat_at = Column(DateTime, nullable=True, comment="最近心跳时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+
+    def __repr__(self):
+        return f"<AuditJob(id={self.id}, audit_id={self.audit_id}, lane={self.lane}, status={self.status})>"
+
+
+class AuditCheckpoint(Base):
+    """
+    审计流程检查点表
+    每个流程节点完成后保存压缩的 AuditState 与下一个待执行节点，中断的审计据此续跑
+    """
+    __tablename__ = "audit_checkpoints"
+
+    thread_id = Column(String(64), primary_key=True, comment="审计流程标识（通常为审计 ID）")
+    next_node = Column(String(32), nullable=False, comment="下一个待执行节点，__end__ 表示流程已结束")
+    step = Column(Integer, default=0, comment="已完成的节点数")
+    state = Column(LargeBinary, nullable=False, comment="zlib 压缩的 JSON 状态")
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+
+    def __repr__(self):
+        return f"<AuditCheckpoint(thread_id={self.thread_id}, next_node={self.next_node}, step={self.step})>"
@@ -98,6 +98,7 @@ class AuditStartRequest(BaseModel):
     """审计启动请求"""
     document_id: str = Field(..., description="文档ID")
     rules: Optional[List[str]] = Field(None, description="指定规则列表，空则使用全部")
+    lane: str = Field("interactive", description="队列通道：interactive（交互，优先）/ batch（批量筛查）")
 
 
 class ValidationViolation(BaseModel):
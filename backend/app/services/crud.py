@@ -1,13 +1,14 @@
 """
 CRUD 操作服务
-提供 Document、Audit、Report 的数据库操作
+提供 Document、Audit、Report、AuditJob 的数据库操作
 """
 
-from typing import Optional, List
+from typing import Optional, List, Sequence
+from sqlalchemy import case, update
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from app.models.database import Document, Audit, Report
+from app.models.database import Document, Audit, Report, AuditJob
 
 
 class DocumentCRUD:
@@ -138,3 +139,190 @@ class ReportCRUD:
     def list(db: Session, limit: int = 10, offset: int = 0) -> List[Report]:
         """获取报告列表"""
         return db.query(Report).order_by(Report.created_at.desc()).offset(offset).limit(limit).all()
+
+
+class AuditJobCRUD:
+    """审计任务队列操作"""
+
+    @staticmethod
+    def create(
+        db: Session,
+        audit_id: str,
+        lane: str = "interactive",
+        priority: int = 0,
+        max_attempts: int = 3,
+        deadline: Optional[float] = None
+    ) -> AuditJob:
+        """创建排队中的任务"""
+        job = AuditJob(
+            audit_id=audit_id,
+            lane=lane,
+            priority=priority,
+            status="pending",
+            attempts=0,
+            max_attempts=max_attempts,
+            deadline=deadline
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def get(db: Session, job_id: str) -> Optional[AuditJob]:
+        """获取单个任务"""
+        return db.query(AuditJob).filter(AuditJob.id == job_id).first()
+
+    @staticmethod
+    def get_by_audit(db: Session, audit_id: str) -> Optional[AuditJob]:
+        """获取审计对应的最新任务"""
+        return (
+            db.query(AuditJob)
+            .filter(AuditJob.audit_id == audit_id)
+            .order_by(AuditJob.created_at.desc())
+            .first()
+        )
+
+    @staticmethod
+    def claim_next(db: Session, worker_id: str, lanes: Optional[Sequence[str]] = None) -> Optional[AuditJob]:
+        """
+        领取下一个待执行任务
+
+        按 priority、created_at 顺序选取，以带状态条件的 UPDATE 抢占，
+        多个工作者（含多进程）并发领取时同一任务只会被一个工作者拿到。
+
+        Args:
+            db: 数据库会话
+            worker_id: 工作者标识
+            lanes: 只领取这些通道的任务，None 表示不限
+
+        Returns:
+            领取到的任务，没有可领取的任务时返回 None
+        """
+        while True:
+            query = db.query(AuditJob.id).filter(AuditJob.status == "pending")
+            if lanes is not None:
+                query = query.filter(AuditJob.lane.in_(list(lanes)))
+            candidate = query.order_by(AuditJob.priority, AuditJob.created_at).first()
+            if candidate is None:
+                return None
+
+            now = datetime.now()
+            claimed = db.execute(
+                update(AuditJob)
+                .where(AuditJob.id == candidate.id, AuditJob.status == "pending")
+                .values(
+                    status="processing",
+                    worker_id=worker_id,
+                    attempts=AuditJob.attempts + 1,
+                    started_at=now,
+                    heartbeat_at=now
+                )
+            ).rowcount
+            db.commit()
+            if claimed:
+                return AuditJobCRUD.get(db, candidate.id)
+
+    @staticmethod
+    def heartbeat(db: Session, job_id: str, worker_id: str) -> None:
+        """刷新执行中任务的心跳"""
+        db.execute(
+            update(AuditJob)
+            .where(AuditJob.id == job_id, AuditJob.worker_id == worker_id, AuditJob.status == "processing")
+            .values(heartbeat_at=datetime.now())
+        )
+        db.commit()
+
+    @staticmethod
+    def finish(
+        db: Session,
+        job_id: str,
+        worker_id: str,
+        status: str,
+        error_message: Optional[str] = None
+    ) -> Optional[AuditJob]:
+        """
+        结束任务（completed / failed）
+
+        只有仍持有任务的工作者能结束它：任务被恢复并由其他工作者领取后，
+        原工作者迟到的结束不生效。
+
+        Returns:
+            更新后的任务；任务已不归该工作者执行时返回 None
+        """
+        updated = db.execute(
+            update(AuditJob)
+            .where(AuditJob.id == job_id, AuditJob.worker_id == worker_id, AuditJob.status == "processing")
+            .values(status=status, error_message=error_message, finished_at=datetime.now())
+        ).rowcount
+        db.commit()
+        return AuditJobCRUD.get(db, job_id) if updated else None
+
+    @staticmethod
+    def release(
+        db: Session,
+        job_id: str,
+        worker_id: str,
+        error_message: Optional[str] = None,
+        count_attempt: bool = True
+    ) -> Optional[AuditJob]:
+        """
+        释放执行中的任务：未用尽执行次数时重新排队，否则标记失败
+
+        Args:
+            db: 数据库会话
+            job_id: 任务 ID
+            worker_id: 持有任务的工作者标识（与 finish 相同，任务已易主时不生效）
+            error_message: 错误信息
+            count_attempt: 本次执行是否计入执行次数（工作者主动停止时不计入）
+
+        Returns:
+            更新后的任务；任务已不归该工作者执行时返回 None
+        """
+        attempts = AuditJob.attempts if count_attempt else AuditJob.attempts - 1
+        exhausted = attempts >= AuditJob.max_attempts
+        updated = db.execute(
+            update(AuditJob)
+            .where(AuditJob.id == job_id, AuditJob.worker_id == worker_id, AuditJob.status == "processing")
+            .values(
+                error_message=error_message,
+                worker_id=None,
+                attempts=attempts,
+                status=case((exhausted, "failed"), else_="pending"),
+                finished_at=case((exhausted, datetime.now()), else_=AuditJob.finished_at)
+            )
+        ).rowcount
+        db.commit()
+        return AuditJobCRUD.get(db, job_id) if updated else None
+
+    @staticmethod
+    def recover_stale(db: Session, stale_after: float) -> List[AuditJob]:
+        """
+        恢复心跳超时的执行中任务（工作进程崩溃或重启后遗留）
+
+        Args:
+            db: 数据库会话
+            stale_after: 心跳超过该秒数视为失联
+
+        Returns:
+            被恢复（重新排队或标记失败）的任务
+        """
+        cutoff = datetime.now() - timedelta(seconds=stale_after)
+        stale = (
+            db.query(AuditJob)
+            .filter(AuditJob.status == "processing", AuditJob.heartbeat_at < cutoff)
+            .all()
+        )
+        released = [
+            AuditJobCRUD.release(db, job.id, job.worker_id, error_message="工作者失联，任务已恢复")
+            for job in stale
+        ]
+        return [job for job in released if job is not None]
+
+    @staticmethod
+    def count(db: Session, status: Optional[str] = None) -> int:
+        """获取任务数"""
+        query = db.query(AuditJob)
+        if status is not None:
+            query = query.filter(AuditJob.status == status)
+        return query.count()
@@ -0,0 +1,302 @@
+"""
+审计任务队列与工作者池
+审计任务持久化在 audit_jobs 表中，固定数量的异步工作者按通道优先级领取并执行
+AuditOrchestrator.run；进程崩溃遗留的执行中任务按心跳超时重新排队
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import AuditJob, Document, JobLaneEnum
+from app.services.crud import AuditCRUD, AuditJobCRUD, DocumentCRUD
+
+# 通道 -> 领取优先级（越小越先执行）
+LANE_PRIORITY = {
+    JobLaneEnum.INTERACTIVE.value: 0,
+    JobLaneEnum.BATCH.value: 10,
+}
+
+# 违规严重程度 -> 风险分（与 AuditService 的评分口径一致）
+SEVERITY_WEIGHTS = {"critical": 30, "warning": 15, "info": 5}
+
+
+def enqueue_audit(
+    db: Session,
+    audit_id: str,
+    lane: str = JobLaneEnum.INTERACTIVE.value,
+    deadline: Optional[float] = None
+) -> AuditJob:
+    """
+    把审计加入任务队列
+
+    Args:
+        db: 数据库会话
+        audit_id: 审计 ID
+        lane: interactive / batch
+        deadline: 单次执行截止时间（秒），默认 AUDIT_JOB_DEADLINE
+
+    Returns:
+        新建的任务
+    """
+    if lane not in LANE_PRIORITY:
+        raise ValueError(f"不支持的任务通道: {lane}")
+    return AuditJobCRUD.create(
+        db,
+        audit_id,
+        lane=lane,
+        priority=LANE_PRIORITY[lane],
+        max_attempts=settings.AUDIT_JOB_MAX_ATTEMPTS,
+        deadline=deadline if deadline is not None else settings.AUDIT_JOB_DEADLINE
+    )
+
+
+def document_text(doc: Optional[Document]) -> str:
+    """审计输入文本：优先使用解析出的 Markdown，其次是已抽取的指标"""
+    if doc is None:
+        return ""
+    if doc.raw_markdown:
+        return doc.raw_markdown
+    if doc.indicators:
+        return str(doc.indicators)
+    return ""
+
+
+def normalize_violation(violation: Any) -> dict:
+    """把符号引擎的违规记录转换为可入库、可被 ValidationViolation 校验的字典"""
+    record = dict(violation)
+    severity = str(record.get("severity", "")).lower()
+    record["severity"] = severity if severity in SEVERITY_WEIGHTS else "warning"
+    return record
+
+
+def risk_score(violations: List[dict]) -> float:
+    """按违规严重程度累计风险分（0-100）"""
+    score = sum(SEVERITY_WEIGHTS.get(v["severity"], 0) for v in violations)
+    return float(min(max(score, 0), 100))
+
+
+class AuditWorkerPool:
+    """
+    审计工作者池
+
+    concurrency 个工作者并发执行任务，其中前 interactive_workers 个只领取 interactive 通道，
+    保证批量筛查占满其余工作者时交互式审计仍能立即开始。
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        interactive_workers: int = 1,
+        poll_interval: float = 1.0,
+        stale_after: float = 60.0,
+        session_factory: Callable[[], Session] = SessionLocal,
+        orchestrator_factory: Optional[Callable[[], Any]] = None
+    ):
+        self.concurrency = max(1, concurrency)
+        self.interactive_workers = min(max(0, interactive_workers), self.concurrency)
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.session_factory = session_factory
+        self.orchestrator_factory = orchestrator_factory
+        self.worker_prefix = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.completed = 0
+        self.failed = 0
+        self._orchestrator = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        """恢复遗留任务并启动工作者（需在事件循环中调用）"""
+        if self.running:
+            return
+        self.recover()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.ensure_future(self._worker(f"{self.worker_prefix}-{index}", index < self.interactive_workers))
+            for index in range(self.concurrency)
+        ]
+        self._tasks.append(asyncio.ensure_future(self._recovery_loop()))
+
+    async def stop(self) -> None:
+        """停止工作者；执行中的任务重新排队且不计入执行次数"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        """有新任务入队时立即唤醒空闲工作者"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def recover(self) -> int:
+        """重新排队心跳超时的执行中任务，返回恢复的任务数"""
+        db = self.session_factory()
+        try:
+            recovered = AuditJobCRUD.recover_stale(db, self.stale_after)
+            for job in recovered:
+                AuditCRUD.update(db, job.audit_id, status="failed" if job.status == "failed" else "pending")
+            return len(recovered)
+        finally:
+            db.close()
+
+    def _get_orchestrator(self):
+        if self._orchestrator is None:
+            if self.orchestrator_factory is not None:
+                self._orchestrator = self.orchestrator_factory()
+            else:
+                from app.core.orchestrator.graph import AuditOrchestrator
+                self._orchestrator = AuditOrchestrator()
+        return self._orchestrator
+
+    async def _recovery_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.stale_after / 2)
+            try:
+                if self.recover():
+                    self.notify()
+            except Exception as e:
+                print(f"Warning: Failed to recover stale audit jobs: {e}")
+
+    async def _worker(self, worker_id: str, interactive_only: bool) -> None:
+        lanes = [JobLaneEnum.INTERACTIVE.value] if interactive_only else None
+        while True:
+            try:
+                job = self._claim(worker_id, lanes)
+            except Exception as e:
+                print(f"Warning: Failed to claim audit job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            try:
+                await self.run_job(job, worker_id)
+            except Exception as e:
+                # 写回结果失败等意外错误：记录后继续领取，任务由心跳超时恢复
+                print(f"Warning: Audit worker {worker_id} failed to run job {job.id}: {e}")
+
+    def _claim(self, worker_id: str, lanes: Optional[List[str]]) -> Optional[AuditJob]:
+        db = self.session_factory()
+        try:
+            job = AuditJobCRUD.claim_next(db, worker_id, lanes)
+            if job is not None:
+                db.expunge(job)
+                AuditCRUD.update(db, job.audit_id, status="processing")
+            return job
+        finally:
+            db.close()
+
+    async def run_job(self, job: AuditJob, worker_id: str) -> None:
+        """
+        执行一个已领取的任务并写回结果
+
+        Args:
+            job: 已领取（processing）的任务
+            worker_id: 工作者标识
+        """
+        db = self.session_factory()
+        heartbeat = asyncio.ensure_future(self._heartbeat(job.id, worker_id))
+        try:
+            try:
+                audit = AuditCRUD.get(db, job.audit_id)
+                doc = DocumentCRUD.get(db, audit.document_id) if audit else None
+                if audit is None:
+                    if AuditJobCRUD.finish(db, job.id, worker_id, "failed", error_message="审计记录不存在"):
+                        self.failed += 1
+                    return
+
+                # 编排器构造失败（如未配置 API Key）同样按执行失败处理，不让异常带走工作者
+                orchestrator = self._get_orchestrator()
+                # 以审计 ID 作为流程标识：重新调度的任务从最后完成的节点续跑
+                state = await asyncio.wait_for(
+                    orchestrator.run(
+                        {"raw_document": document_text(doc), "indicators": doc.indicators if doc else None},
+                        thread_id=job.audit_id
+                    ),
+                    timeout=job.deadline or settings.AUDIT_JOB_DEADLINE
+                )
+            except asyncio.TimeoutError:
+                self._release(db, job, worker_id, "审计执行超时")
+                return
+            except asyncio.CancelledError:
+                # 工作者停止：任务重新排队，不计入执行次数
+                if AuditJobCRUD.release(db, job.id, worker_id, error_message="工作者停止", count_attempt=False):
+                    AuditCRUD.update(db, job.audit_id, status="pending")
+                raise
+            except Exception as e:
+                self._release(db, job, worker_id, f"审计执行失败: {e}")
+                return
+
+            # 先以持有者身份结束任务：任务已被恢复并由其他工作者领取时丢弃本次结果
+            if AuditJobCRUD.finish(db, job.id, worker_id, "completed") is None:
+                print(f"Warning: Audit job {job.id} was reassigned, dropping result of {worker_id}")
+                return
+
+            violations = [normalize_violation(v) for v in state.get("violations") or []]
+            neural_output = state.get("neural_output") or {}
+            AuditCRUD.update(
+                db,
+                job.audit_id,
+                status="completed",
+                violations=violations,
+                reasoning_chain=list(neural_output.get("reasoning_chain") or []),
+                retry_count=state.get("retry_count", 0),
+                risk_score=risk_score(violations),
+                completed_at=datetime.now()
+            )
+            if hasattr(orchestrator, "discard_checkpoint"):
+                orchestrator.discard_checkpoint(job.audit_id)
+            self.completed += 1
+        finally:
+            heartbeat.cancel()
+            db.close()
+
+    def _release(self, db: Session, job: AuditJob, worker_id: str, error: str) -> None:
+        released = AuditJobCRUD.release(db, job.id, worker_id, error_message=error)
+        if released is None:
+            # 任务已被恢复并由其他工作者领取，状态归新的持有者维护
+            return
+        if released.status == "failed":
+            AuditCRUD.update(db, job.audit_id, status="failed")
+            self.failed += 1
+        else:
+            AuditCRUD.update(db, job.audit_id, status="pending")
+            self.notify()
+
+    async def _heartbeat(self, job_id: str, worker_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.stale_after / 3)
+            db = self.session_factory()
+            try:
+                AuditJobCRUD.heartbeat(db, job_id, worker_id)
+            except Exception as e:
+                print(f"Warning: Failed to update audit job heartbeat: {e}")
+            finally:
+                db.close()
+
+
+# 全局实例
+audit_workers = AuditWorkerPool(
+    concurrency=settings.AUDIT_WORKERS,
+    interactive_workers=settings.AUDIT_INTERACTIVE_WORKERS,
+    poll_interval=settings.AUDIT_JOB_POLL_INTERVAL,
+    stale_after=settings.AUDIT_JOB_STALE_AFTER
+)
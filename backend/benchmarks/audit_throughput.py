@@ -0,0 +1,105 @@
+"""
+审计流程吞吐基准
+以固定并发对 OpenAI 兼容接口（通常是 benchmarks.mock_llm_server）跑完整的审计流程，
+统计吞吐、端到端延迟分位数、纠偏重试次数与自适应并发窗口
+
+用法（在 backend 目录下，先启动替身服务）:
+    python -m benchmarks.mock_llm_server --port 8900 --seed 1 &
+    python -m benchmarks.audit_throughput --base-url http://127.0.0.1:8900 --audits 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import List
+
+
+def make_documents(count: int, seed: int = 42) -> List[str]:
+    """生成互不相同的资产负债表文本（避免被请求合并与响应缓存掩盖）"""
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        liabilities = rng.randint(1_000_000, 50_000_000)
+        equity = rng.randint(1_000_000, 50_000_000)
+        documents.append(
+            f"样本公司{i} 合并资产负债表\n"
+            f"资产总计 {liabilities + equity:,}.00\n"
+            f"负债合计 {liabilities:,}.00\n"
+            f"所有者权益合计 {equity:,}.00"
+        )
+    return documents
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(audits: int, concurrency: int, stream: bool) -> dict:
+    from app.core.config import settings
+    from app.core.neural.http import http_clients
+    from app.core.neural.limiter import inference_limiter
+    from app.core.orchestrator.graph import AuditOrchestrator
+
+    settings.LLM_STREAM = stream
+    orchestrator = AuditOrchestrator()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    retries: List[int] = []
+    approved = 0
+
+    async def audit(document: str) -> None:
+        nonlocal approved
+        async with semaphore:
+            started = time.perf_counter()
+            result = await orchestrator.run({"raw_document": document})
+            latencies.append(time.perf_counter() - started)
+            retries.append(result["retry_count"])
+            approved += result["validation_result"] == "APPROVED"
+
+    started = time.perf_counter()
+    await asyncio.gather(*[audit(document) for document in make_documents(audits)])
+    elapsed = time.perf_counter() - started
+    await http_clients.aclose()
+
+    return {
+        "audits": audits,
+        "seconds": elapsed,
+        "audits_per_second": audits / elapsed if elapsed else float("inf"),
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "retries": sum(retries),
+        "approved": approved,
+        "concurrency_limit": inference_limiter.limit
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="审计流程吞吐基准")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8900", help="OpenAI 兼容接口地址")
+    parser.add_argument("--audits", type=int, default=200, help="审计次数")
+    parser.add_argument("--concurrency", type=int, default=32, help="同时进行的审计数")
+    parser.add_argument("--stream", action="store_true", help="使用流式接口")
+    parser.add_argument("--rules", default="../rules", help="规则目录")
+    args = parser.parse_args()
+
+    # 须在导入应用模块之前设置：关闭响应缓存，指向替身服务
+    os.environ["DEEPSEEK_BASE_URL"] = args.base_url
+    os.environ.setdefault("DEEPSEEK_API_KEY", "mock")
+    os.environ["LLM_CACHE_FILE"] = ""
+    os.environ["RULES_DIR"] = args.rules
+
+    r = asyncio.run(run(args.audits, args.concurrency, args.stream))
+    print(f"{'audits':>7} {'seconds':>9} {'audits/s':>9} {'p50':>7} {'p95':>7} {'retries':>8} {'approved':>9} {'limit':>6}")
+    print(
+        f"{r['audits']:>7} {r['seconds']:>9.2f} {r['audits_per_second']:>9.1f} "
+        f"{r['p50']:>7.2f} {r['p95']:>7.2f} {r['retries']:>8} {r['approved']:>9} {r['concurrency_limit']:>6.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+OpenAI 兼容的本地推理替身服务
+实现 /chat/completions（流式与非流式），回放录制的响应或按模板生成资产负债表结果，
+可配置延迟分布、错误率、429 注入与并发上限，用于离线压测神经推理链路
+
+用法（在 backend 目录下）:
+    python -m benchmarks.mock_llm_server --port 8900 --latency lognormal:0.8,0.4 --throttle-rate 0.05
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8900 DEEPSEEK_API_KEY=mock uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 延迟采样函数：输入随机数发生器，返回秒数
+LatencySampler = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> LatencySampler:
+    """
+    解析延迟分布
+
+    Args:
+        spec: fixed:秒 / uniform:下限,上限 / normal:均值,标准差 /
+              lognormal:中位数,sigma / exponential:均值
+
+    Returns:
+        延迟采样函数（结果不小于 0）
+    """
+    kind, _, raw = spec.partition(":")
+    try:
+        params = [float(p) for p in raw.split(",") if p.strip()]
+    except ValueError:
+        raise ValueError(f"无效的延迟参数: {spec}")
+
+    if kind == "fixed" and len(params) == 1:
+        return lambda rng: max(0.0, params[0])
+    if kind == "uniform" and len(params) == 2:
+        return lambda rng: max(0.0, rng.uniform(params[0], params[1]))
+    if kind == "normal" and len(params) == 2:
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal" and len(params) == 2:
+        mu = math.log(params[0]) if params[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, params[1])
+    if kind == "exponential" and len(params) == 1:
+        return lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+    raise ValueError(f"无效的延迟分布: {spec}")
+
+
+@dataclass
+class MockLLMConfig:
+    """替身服务配置"""
+    latency: str = "fixed:0"  # 首个 token 前的延迟分布
+    chunk_interval: float = 0.0  # 流式响应相邻分块的间隔（秒）
+    chunk_size: int = 16  # 流式响应每块字符数
+    error_rate: float = 0.0  # 返回 500 的概率
+    throttle_rate: float = 0.0  # 返回 429 的概率
+    retry_after: Optional[float] = 1.0  # 429 响应的 Retry-After（秒），None 表示不带该头
+    max_concurrency: int = 0  # 超过该并发数直接返回 429，0 表示不限制
+    imbalance_rate: float = 0.0  # 模板响应中资产不等于负债加权益的概率
+    responses: List[str] = field(default_factory=list)  # 录制的响应内容，按顺序循环回放
+    seed: Optional[int] = None
+
+
+class MockLLMStats:
+    """请求计数"""
+
+    def __init__(self):
+        self.requests = 0
+        self.completed = 0
+        self.errors = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def load_responses(path: str) -> List[str]:
+    """
+    读取录制的响应
+
+    JSONL 文件每行可以是完整的 /chat/completions 响应、{"content": "..."} 或直接的结果对象。
+    """
+    responses = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if isinstance(record, dict) and "choices" in record:
+            responses.append(record["choices"][0]["message"]["content"])
+        elif isinstance(record, dict) and isinstance(record.get("content"), str):
+            responses.append(record["content"])
+        else:
+            responses.append(json.dumps(record, ensure_ascii=False))
+    return responses
+
+
+def template_response(rng: random.Random, imbalance_rate: float = 0.0) -> str:
+    """按系统提示词的格式生成一份资产负债表分析结果"""
+    liabilities = rng.randint(1_000_000, 50_000_000)
+    equity = rng.randint(1_000_000, 50_000_000)
+    assets = liabilities + equity
+    if rng.random() < imbalance_rate:
+        assets += rng.randint(1, 100_000)
+    return json.dumps({
+        "conclusion": "资产负债表勾稽关系已核对",
+        "confidence": round(rng.uniform(0.8, 0.99), 2),
+        "reasoning_chain": [
+            f"步骤1: 提取资产总计 {assets}",
+            f"步骤2: 提取负债合计 {liabilities} 与所有者权益合计 {equity}",
+            "步骤3: 核对资产 = 负债 + 所有者权益"
+        ],
+        "extracted_data": {
+            "assets": {"total": assets},
+            "liabilities": {"total": liabilities},
+            "equity": {"total": equity}
+        }
+    }, ensure_ascii=False)
+
+
+def create_app(config: Optional[MockLLMConfig] = None) -> FastAPI:
+    """
+    创建替身服务
+
+    Args:
+        config: 服务配置，默认无延迟、无错误
+
+    Returns:
+        FastAPI 应用，app.state.stats 为请求计数
+    """
+    config = config or MockLLMConfig()
+    rng = random.Random(config.seed)
+    sample_latency = parse_latency(config.latency)
+    stats = MockLLMStats()
+    replay = {"next": 0}
+
+    app = FastAPI(title="Mock LLM")
+    app.state.stats = stats
+    app.state.config = config
+
+    def next_content() -> str:
+        if config.responses:
+            content = config.responses[replay["next"] % len(config.responses)]
+            replay["next"] += 1
+            return content
+        return template_response(rng, config.imbalance_rate)
+
+    def rejection() -> Optional[JSONResponse]:
+        """按并发上限与注入概率决定是否拒绝本次请求"""
+        if (config.max_concurrency and stats.in_flight > config.max_concurrency) or rng.random() < config.throttle_rate:
+            stats.throttled += 1
+            headers = {}
+            if config.retry_after is not None:
+                headers["Retry-After"] = f"{config.retry_after:g}"
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                status_code=429,
+                headers=headers
+            )
+        if rng.random() < config.error_rate:
+            stats.errors += 1
+            return JSONResponse(
+                {"error": {"message": "Injected server error", "type": "server_error"}},
+                status_code=500
+            )
+        return None
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "mock")
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        streaming = False
+        try:
+            rejected = rejection()
+            if rejected is not None:
+                return rejected
+
+            await asyncio.sleep(sample_latency(rng))
+            content = next_content()
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+            if not body.get("stream"):
+                stats.completed += 1
+                return {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }]
+                }
+
+            streaming = True
+            return StreamingResponse(
+                stream_chunks(completion_id, model, content),
+                media_type="text/event-stream"
+            )
+        finally:
+            if not streaming:
+                stats.in_flight -= 1
+
+    async def stream_chunks(completion_id: str, model: str, content: str):
+        try:
+            for piece in split_content(content, config.chunk_size):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                if config.chunk_interval:
+                    await asyncio.sleep(config.chunk_interval)
+            yield "data: [DONE]\n\n"
+            stats.completed += 1
+        finally:
+            stats.in_flight -= 1
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.to_dict()
+
+    return app
+
+
+def split_content(content: str, size: int) -> Iterator[str]:
+    """按固定字符数切分内容"""
+    size = max(1, size)
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地推理替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="延迟分布，如 fixed:0.5 / uniform:0.2,1 / lognormal:0.8,0.4")
+    parser.add_argument("--chunk-interval", type=float, default=0.01, help="流式分块间隔（秒）")
+    parser.add_argument("--chunk-size", type=int, default=16, help="流式分块字符数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 错误概率")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="429 限流概率")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 响应的 Retry-After（秒），负数表示不带")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="并发上限，超出返回 429")
+    parser.add_argument("--imbalance-rate", type=float, default=0.2, help="模板响应不平衡的概率")
+    parser.add_argument("--responses", default=None, help="录制响应的 JSONL 文件，按顺序循环回放")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，固定后结果可复现")
+    args = parser.parse_args()
+
+    config = MockLLMConfig(
+        latency=args.latency,
+        chunk_interval=args.chunk_interval,
+        chunk_size=args.chunk_size,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        max_concurrency=args.max_concurrency,
+        imbalance_rate=args.imbalance_rate,
+        responses=load_responses(args.responses) if args.responses else [],
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+符号引擎执行后端基准
+在同一规则包上比较 python（编译闭包）与 zen（Zen Engine 决策图）两种后端的校验吞吐
+
+用法（在 backend 目录下）:
+    python -m benchmarks.symbolic_backends --rules ../rules --docs 2000 --replicate 50
+"""
+
+import argparse
+import copy
+import random
+import time
+from typing import List, Optional
+
+from app.core.symbolic.engine import BACKEND_PYTHON, BACKEND_ZEN, SymbolicEngine
+from app.core.symbolic.profiler import RuleProfiler
+from app.core.symbolic.zen_backend import ZEN_ENGINE_AVAILABLE
+
+
+def make_documents(count: int, seed: int = 42) -> List[dict]:
+    """生成资产负债表样本，约 20% 不平衡、5% 缺失字段"""
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        liabilities = rng.randint(1_000_000, 50_000_000)
+        equity = rng.randint(1_000_000, 50_000_000)
+        assets = liabilities + equity
+        roll = rng.random()
+        if roll < 0.2:
+            assets += rng.randint(1, 100_000)
+        data = {
+            "assets": {"total": assets},
+            "liabilities": {"total": liabilities},
+            "equity": {"total": equity}
+        }
+        if roll > 0.95:
+            del data["equity"]
+        documents.append(data)
+    return documents
+
+
+def build_engine(
+    backend: str,
+    rules_dir: str,
+    replicate: int,
+    profiler: Optional[RuleProfiler] = None
+) -> SymbolicEngine:
+    """加载规则包，并按 replicate 复制规则以模拟大规模规则库"""
+    engine = SymbolicEngine(rules_dir=rules_dir, backend=backend, profiler=profiler)
+    engine.load_rules()
+    base_rules = list(engine.rules)
+    rules = []
+    for i in range(replicate):
+        for rule in base_rules:
+            clone = copy.copy(rule)
+            clone.rule_id = f"{rule.rule_id}-{i}"
+            rules.append(clone)
+    engine.rules = rules
+    return engine
+
+
+def run(
+    backend: str,
+    rules_dir: str,
+    documents: List[dict],
+    replicate: int,
+    profile_out: Optional[str] = None
+) -> dict:
+    profiler = RuleProfiler(enabled=profile_out is not None)
+    engine = build_engine(backend, rules_dir, replicate, profiler)
+
+    # 预热：编译决策图、填充引擎池
+    engine.validate({"extracted_data": documents[0]})
+    profiler.reset()
+
+    started = time.perf_counter()
+    rejected = 0
+    for data in documents:
+        if engine.validate({"extracted_data": data}).status == "REJECTED":
+            rejected += 1
+    elapsed = time.perf_counter() - started
+
+    if profile_out:
+        profiler.dump(f"{profile_out}.{backend}.json")
+
+    return {
+        "backend": backend,
+        "rules": len(engine.rules),
+        "documents": len(documents),
+        "seconds": elapsed,
+        "docs_per_second": len(documents) / elapsed if elapsed else float("inf"),
+        "rejected": rejected
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="比较符号引擎执行后端")
+    parser.add_argument("--rules", default="../rules", help="规则目录")
+    parser.add_argument("--docs", type=int, default=2000, help="文档数量")
+    parser.add_argument("--replicate", type=int, default=1, help="规则复制倍数")
+    parser.add_argument("--profile-out", default=None, help="开启逐规则统计并写入 <前缀>.<backend>.json")
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    backends = [BACKEND_PYTHON]
+    if ZEN_ENGINE_AVAILABLE:
+        backends.append(BACKEND_ZEN)
+    else:
+        print("zen-engine 未安装，仅测试 python 后端")
+
+    results = [run(b, args.rules, documents, args.replicate, args.profile_out) for b in backends]
+
+    print(f"{'backend':<8} {'rules':>6} {'docs':>6} {'seconds':>9} {'docs/s':>10} {'rejected':>9}")
+    for r in results:
+        print(
+            f"{r['backend']:<8} {r['rules']:>6} {r['documents']:>6} "
+            f"{r['seconds']:>9.3f} {r['docs_per_second']:>10.1f} {r['rejected']:>9}"
+        )
+
+    if len(results) > 1:
+        if results[0]["rejected"] != results[1]["rejected"]:
+            print("Warning: 两种后端的校验结论不一致")
+        fastest = min(results, key=lambda r: r["seconds"])
+        print(f"更快的后端: {fastest['backend']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -153,3 +153,21 @@ class TestReportAPI:
         data = response.json()
         assert "total" in data
         assert "items" in data
+
+
+class TestRulesAPI:
+    """规则引擎 API 测试"""
+
+    def test_rule_stats(self):
+        """测试规则执行统计查询与清空"""
+        from app.core.symbolic.profiler import rule_profiler
+
+        rule_profiler.record("R001", 2000, violations=1)
+        response = client.get("/api/v1/rules/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert any(r["rule_id"] == "R001" and r["calls"] >= 1 for r in data["rules"])
+
+        response = client.delete("/api/v1/rules/stats")
+        assert response.status_code == 200
+        assert client.get("/api/v1/rules/stats").json()["total"] == 0
@@ -0,0 +1,261 @@
+"""
+审计任务队列与工作者池测试
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base, AuditJob
+from app.services.crud import AuditCRUD, AuditJobCRUD, DocumentCRUD
+from app.services.jobs import AuditWorkerPool, enqueue_audit
+
+
+@pytest.fixture
+def session_factory():
+    """内存 SQLite 会话工厂（所有会话共享同一连接）"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def create_audit(db, audit_id, text="资产总计 100"):
+    doc = DocumentCRUD.create(db, f"doc-{audit_id}", "report.pdf", "/tmp/report.pdf")
+    DocumentCRUD.update(db, doc.id, status="completed", raw_markdown=text)
+    return AuditCRUD.create(db, audit_id, doc.id)
+
+
+class FakeOrchestrator:
+    """按文档内容返回固定结果，可模拟慢任务"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.documents = []
+
+    async def run(self, initial_state, thread_id=None):
+        self.documents.append(initial_state["raw_document"])
+        await asyncio.sleep(self.delay)
+        return {
+            "validation_result": "REJECTED",
+            "violations": [{"rule_id": "R001", "rule_name": "勾稽", "severity": "CRITICAL",
+                            "expected": "a", "actual": "b", "correction_hint": "c"}],
+            "neural_output": {"reasoning_chain": ["步骤1", "步骤2"]},
+            "retry_count": 2
+        }
+
+
+def test_claim_respects_lane_priority_and_is_exclusive(session_factory):
+    """Test interactive jobs are claimed before older batch jobs, each job only once"""
+    db = session_factory()
+    create_audit(db, "a1")
+    create_audit(db, "a2")
+    batch = enqueue_audit(db, "a1", lane="batch")
+    interactive = enqueue_audit(db, "a2", lane="interactive")
+
+    assert AuditJobCRUD.claim_next(db, "w1", lanes=["interactive"]).id == interactive.id
+    assert AuditJobCRUD.claim_next(db, "w2", lanes=["interactive"]) is None
+    claimed = AuditJobCRUD.claim_next(db, "w3")
+    assert claimed.id == batch.id
+    assert (claimed.status, claimed.worker_id, claimed.attempts) == ("processing", "w3", 1)
+    assert AuditJobCRUD.claim_next(db, "w4") is None
+
+    with pytest.raises(ValueError):
+        enqueue_audit(db, "a1", lane="urgent")
+    db.close()
+
+
+def test_recover_stale_requeues_until_attempts_exhausted(session_factory):
+    """Test jobs abandoned by a crashed worker are requeued, then failed after max attempts"""
+    db = session_factory()
+    create_audit(db, "a1")
+    job = AuditJobCRUD.create(db, "a1", max_attempts=2)
+
+    AuditJobCRUD.claim_next(db, "crashed")
+    AuditJobCRUD.heartbeat(db, job.id, "crashed")
+    assert AuditJobCRUD.recover_stale(db, stale_after=60) == []
+
+    db.query(AuditJob).update({"heartbeat_at": datetime.now() - timedelta(seconds=120)})
+    db.commit()
+    recovered = AuditJobCRUD.recover_stale(db, stale_after=60)
+    assert [j.status for j in recovered] == ["pending"]
+
+    AuditJobCRUD.claim_next(db, "crashed-again")
+    db.query(AuditJob).update({"heartbeat_at": datetime.now() - timedelta(seconds=120)})
+    db.commit()
+    assert [j.status for j in AuditJobCRUD.recover_stale(db, stale_after=60)] == ["failed"]
+    db.close()
+
+
+
+@pytest.mark.asyncio
+async def test_late_finish_after_stale_recovery_is_dropped(session_factory):
+    """Test a slow worker can't finish or release a job that was recovered and re-claimed"""
+    db = session_factory()
+    create_audit(db, "a1")
+    job = AuditJobCRUD.create(db, "a1")
+    slow_job = AuditJobCRUD.claim_next(db, "slow")
+    db.expunge(slow_job)
+
+    db.query(AuditJob).update({"heartbeat_at": datetime.now() - timedelta(seconds=120)})
+    db.commit()
+    assert len(AuditJobCRUD.recover_stale(db, stale_after=60)) == 1
+    assert AuditJobCRUD.claim_next(db, "fresh").worker_id == "fresh"
+
+    assert AuditJobCRUD.finish(db, job.id, "slow", "completed") is None
+    assert AuditJobCRUD.release(db, job.id, "slow", error_message="late") is None
+    current = AuditJobCRUD.get(db, job.id)
+    assert (current.status, current.worker_id, current.error_message) == ("processing", "fresh", "工作者失联，任务已恢复")
+
+    # 工作者池中迟到的结果被丢弃，不覆盖审计记录
+    AuditCRUD.update(db, "a1", status="processing")
+    pool = AuditWorkerPool(session_factory=session_factory, orchestrator_factory=FakeOrchestrator)
+    await pool.run_job(slow_job, "slow")
+    assert pool.completed == 0
+    db.expire_all()
+    assert AuditCRUD.get(db, "a1").status == "processing"
+    assert AuditJobCRUD.get(db, job.id).worker_id == "fresh"
+
+    assert AuditJobCRUD.finish(db, job.id, "fresh", "completed").status == "completed"
+    db.close()
+
+@pytest.mark.asyncio
+async def test_worker_pool_runs_jobs_and_reserves_interactive_lane(session_factory):
+    """Test workers execute queued audits and batch load doesn't block interactive audits"""
+    orchestrator = FakeOrchestrator(delay=0.2)
+    pool = AuditWorkerPool(
+        concurrency=2,
+        interactive_workers=1,
+        poll_interval=0.01,
+        session_factory=session_factory,
+        orchestrator_factory=lambda: orchestrator
+    )
+    db = session_factory()
+    for i in range(3):
+        create_audit(db, f"batch-{i}", text=f"batch {i}")
+        enqueue_audit(db, f"batch-{i}", lane="batch")
+
+    pool.start()
+    await asyncio.sleep(0.05)
+    # 批量任务占着唯一的通用工作者，交互式任务由预留工作者立即执行
+    create_audit(db, "interactive", text="interactive")
+    enqueue_audit(db, "interactive", lane="interactive")
+    pool.notify()
+
+    for _ in range(200):
+        if pool.completed == 4:
+            break
+        await asyncio.sleep(0.02)
+    await pool.stop()
+
+    assert pool.completed == 4
+    assert orchestrator.documents.index("interactive") < orchestrator.documents.index("batch 2")
+
+    db.expire_all()
+    audit = AuditCRUD.get(db, "interactive")
+    assert audit.status == "completed"
+    assert audit.retry_count == 2
+    assert audit.risk_score == 30.0
+    assert audit.violations[0]["severity"] == "critical"
+    assert audit.reasoning_chain == ["步骤1", "步骤2"]
+    assert AuditJobCRUD.count(db, status="completed") == 4
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_construction_error_fails_job_and_keeps_worker(session_factory):
+    """Test a failing orchestrator factory fails the job instead of killing the worker"""
+    orchestrator = FakeOrchestrator()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) <= 2:
+            raise ValueError("DEEPSEEK_API_KEY 环境变量未设置")
+        return orchestrator
+
+    pool = AuditWorkerPool(
+        concurrency=1,
+        interactive_workers=0,
+        poll_interval=0.01,
+        session_factory=session_factory,
+        orchestrator_factory=factory
+    )
+    db = session_factory()
+    create_audit(db, "broken")
+    job = AuditJobCRUD.create(db, "broken", max_attempts=2)
+
+    pool.start()
+    for _ in range(100):
+        if pool.failed:
+            break
+        await asyncio.sleep(0.02)
+    assert pool.running
+
+    db.expire_all()
+    job = AuditJobCRUD.get(db, job.id)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert "DEEPSEEK_API_KEY" in job.error_message
+    assert AuditCRUD.get(db, "broken").status == "failed"
+
+    # 同一工作者继续领取后续任务
+    create_audit(db, "next")
+    enqueue_audit(db, "next")
+    pool.notify()
+    for _ in range(100):
+        if pool.completed:
+            break
+        await asyncio.sleep(0.02)
+    await pool.stop()
+
+    db.expire_all()
+    assert pool.completed == 1
+    assert AuditCRUD.get(db, "next").status == "completed"
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_job_deadline_and_shutdown_requeue(session_factory):
+    """Test timed-out jobs are retried then failed, and stopping the pool requeues running jobs"""
+    pool = AuditWorkerPool(
+        concurrency=1,
+        interactive_workers=0,
+        poll_interval=0.01,
+        session_factory=session_factory,
+        orchestrator_factory=lambda: FakeOrchestrator(delay=10)
+    )
+    db = session_factory()
+    create_audit(db, "slow")
+    job = AuditJobCRUD.create(db, "slow", max_attempts=2, deadline=0.05)
+
+    pool.start()
+    for _ in range(100):
+        if pool.failed:
+            break
+        await asyncio.sleep(0.02)
+    await pool.stop()
+
+    db.expire_all()
+    job = AuditJobCRUD.get(db, job.id)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert "超时" in job.error_message
+    assert AuditCRUD.get(db, "slow").status == "failed"
+
+    create_audit(db, "interrupted")
+    interrupted = AuditJobCRUD.create(db, "interrupted", deadline=60)
+    pool.start()
+    await asyncio.sleep(0.1)
+    await pool.stop()
+
+    db.expire_all()
+    interrupted = AuditJobCRUD.get(db, interrupted.id)
+    assert (interrupted.status, interrupted.attempts) == ("pending", 0)
+    assert AuditCRUD.get(db, "interrupted").status == "pending"
+    db.close()
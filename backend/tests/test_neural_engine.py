@@ -23,3 +23,643 @@ async def test_deepseek_api_analyze_returns_structured_output():
     assert "reasoning_chain" in result
     assert isinstance(result["reasoning_chain"], list)
     assert len(result["reasoning_chain"]) >= 1
+
+@pytest.mark.asyncio
+async def test_deepseek_api_analyze_uses_response_cache(tmp_path):
+    """Test repeated prompts are served from the response cache"""
+    import json
+    import httpx
+    from app.core.neural.cache import ResponseCache
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        content = json.dumps({
+            "conclusion": "ok",
+            "confidence": 0.9,
+            "reasoning_chain": ["a", "b", "c"],
+            "extracted_data": {"资产总计": 100}
+        }, ensure_ascii=False)
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    cache = ResponseCache(tmp_path / "llm.sqlite3", ttl=60, max_entries=1)
+    adapter = DeepSeekAPIAdapter("test-key", response_cache=cache)
+    adapter.client = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+
+    data = {"assets": {"total": 100}}
+    first = await adapter.analyze(data)
+    second = await adapter.analyze(data)
+    assert first["cache_hit"] is False
+    assert second["cache_hit"] is True
+    assert second["extracted_data"] == first["extracted_data"]
+    assert len(calls) == 1
+
+    # 缓存读写不在事件循环线程上执行
+    import threading
+    threads = []
+    original_get = cache.get
+
+    def recording_get(key):
+        threads.append(threading.get_ident())
+        return original_get(key)
+
+    cache.get = recording_get
+    assert (await adapter.analyze(data))["cache_hit"] is True
+    assert threads and threading.get_ident() not in threads
+    del cache.get
+
+    # 纠偏反馈改变提示词，不命中；容量为 1 时旧条目被淘汰
+    await adapter.analyze(data, feedback="fix")
+    assert len(calls) == 2
+    assert (await adapter.analyze(data))["cache_hit"] is False
+
+    # 过期条目视为未命中
+    cache.ttl = 0
+    key = ResponseCache.make_key("m", "s", "u", 0.3)
+    cache.set(key, {"conclusion": "x"})
+    assert cache.get(key) == {"conclusion": "x"}
+    cache.ttl = 1e-9
+    import time
+    time.sleep(0.01)
+    assert cache.get(key) is None
+
+    await adapter.close()
+    cache.close()
+
+def test_incremental_json_parser_emits_fields_as_they_complete():
+    """Test top-level fields are emitted as soon as their values close"""
+    from app.core.neural.streaming import IncrementalJSONParser, parse_json_object
+
+    text = (
+        '```json\n{"conclusion": "含 \\"引号\\" 和 {括号}", "confidence": 0.8, '
+        '"extracted_data": {"资产总计": 100, "明细": [1, {"a": "}"}]}, '
+        '"reasoning_chain": ["步骤1", "步骤2"], "ok": true}\n```'
+    )
+    parser = IncrementalJSONParser()
+    emitted = []
+    for i in range(0, len(text), 3):
+        for key, value in parser.feed(text[i:i + 3]):
+            emitted.append(key)
+            if key == "extracted_data":
+                # reasoning_chain 尚未到达
+                assert "reasoning_chain" not in parser.result
+
+    assert parser.done
+    assert emitted == ["conclusion", "confidence", "extracted_data", "reasoning_chain", "ok"]
+    assert parser.result["extracted_data"] == {"资产总计": 100, "明细": [1, {"a": "}"}]}
+    assert parser.result["conclusion"] == '含 "引号" 和 {括号}'
+
+    # 非贪婪：只取第一个完整对象
+    assert parse_json_object('结果 {"a": 1} 其余说明 {b}') == {"a": 1}
+    with pytest.raises(ValueError):
+        parse_json_object('{"a": 1')
+
+@pytest.mark.asyncio
+async def test_deepseek_api_analyze_stream_yields_fields_incrementally():
+    """Test the streaming mode parses SSE chunks into field events"""
+    import json
+    import httpx
+
+    output = json.dumps({
+        "conclusion": "ok",
+        "extracted_data": {"资产总计": 100},
+        "reasoning_chain": ["a", "b", "c"]
+    }, ensure_ascii=False)
+    chunks = [output[i:i + 7] for i in range(0, len(output), 7)]
+    body = "".join(
+        f"data: {json.dumps({'choices': [{'delta': {'content': c}}]}, ensure_ascii=False)}\n\n"
+        for c in chunks
+    ) + "data: [DONE]\n\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    adapter = DeepSeekAPIAdapter("test-key", stream=True)
+    adapter.client = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+
+    events = [event async for event in adapter.analyze_stream({"raw_text": "x"})]
+    assert [e.get("key") for e in events] == ["conclusion", "extracted_data", "reasoning_chain", None]
+    assert events[-1]["result"]["cache_hit"] is False
+
+    result = await adapter.analyze({"raw_text": "x"})
+    assert result["extracted_data"] == {"资产总计": 100}
+    await adapter.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_streams_are_coalesced():
+    """Test concurrent analyze_stream calls share one upstream stream and late joiners replay fields"""
+    import asyncio
+    import json
+    import httpx
+    from app.core.neural.singleflight import SingleFlight
+
+    output = json.dumps({"conclusion": "ok", "extracted_data": {"a": 1}})
+    body = f"data: {json.dumps({'choices': [{'delta': {'content': output}}]})}\n\ndata: [DONE]\n\n"
+    calls = []
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        await release.wait()
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    flight = SingleFlight()
+    adapter = DeepSeekAPIAdapter("test-key", stream=True, single_flight=flight)
+    adapter.client = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+
+    async def collect():
+        return [event async for event in adapter.analyze_stream({"raw_text": "same"})]
+
+    tasks = [asyncio.create_task(collect()) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert len(calls) == 1
+    assert flight.coalesced == 2
+    assert results[0] == results[1] == results[2]
+    assert results[0][-1]["result"]["extracted_data"] == {"a": 1}
+    assert len(flight) == 0
+
+    # 所有订阅方退出后上游流被取消
+    release.clear()
+    waiting = asyncio.create_task(collect())
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    await asyncio.sleep(0)
+    assert len(calls) == 2 and len(flight) == 0
+    await adapter.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_are_coalesced():
+    """Test concurrent analyze calls with the same prompt share one request"""
+    import asyncio
+    import json
+    import httpx
+    from app.core.neural.singleflight import SingleFlight
+
+    calls = []
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        await release.wait()
+        content = json.dumps({"conclusion": "ok", "extracted_data": {"a": 1}})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    flight = SingleFlight()
+    adapter = DeepSeekAPIAdapter("test-key", single_flight=flight)
+    adapter.client = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+
+    tasks = [asyncio.create_task(adapter.analyze({"raw_text": "same"})) for _ in range(5)]
+    other = asyncio.create_task(adapter.analyze({"raw_text": "different"}))
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*tasks, other)
+
+    assert len(calls) == 2
+    assert flight.coalesced == 4
+    assert len(flight) == 0
+    # 每个调用方拿到独立副本
+    results[0]["conclusion"] = "changed"
+    assert results[1]["conclusion"] == "ok"
+
+    # 任务结束后再次调用会重新请求
+    await adapter.analyze({"raw_text": "same"})
+    assert len(calls) == 3
+    await adapter.close()
+
+@pytest.mark.asyncio
+async def test_single_flight_cancels_when_last_waiter_leaves():
+    """Test the shared call survives one cancelled waiter and is cancelled with the last"""
+    import asyncio
+    from app.core.neural.singleflight import SingleFlight
+
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    flight = SingleFlight()
+    first = asyncio.create_task(flight.do("k", slow))
+    second = asyncio.create_task(flight.do("k", slow))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set() and not second.done()
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert len(flight) == 0
+
+@pytest.mark.asyncio
+async def test_deepseek_api_retries_throttled_requests():
+    """Test 429/5xx responses are retried honoring Retry-After within the deadline"""
+    import json
+    import httpx
+    from app.core.neural.limiter import AdaptiveLimiter, deadline_scope
+    from app.core.neural.singleflight import SingleFlight
+
+    statuses = [429, 503, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        if status != 200:
+            return httpx.Response(status, headers={"Retry-After": "0"}, text="busy")
+        content = json.dumps({"conclusion": "ok", "extracted_data": {}})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    limiter = AdaptiveLimiter(initial=8, max_limit=8)
+    adapter = DeepSeekAPIAdapter("test-key", limiter=limiter, single_flight=SingleFlight())
+    adapter.client = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+
+    result = await adapter.analyze({"raw_text": "x"})
+    assert result["conclusion"] == "ok"
+    assert statuses == []
+    # 429 使窗口减半
+    assert limiter.limit < 8
+    assert limiter.in_flight == 0
+
+    # 非可重试状态直接降级
+    statuses.extend([400, 200])
+    result = await adapter.analyze({"raw_text": "y"})
+    assert result["conclusion"].startswith("分析失败")
+    assert statuses == [200]
+
+    # Retry-After 超过审计截止时间时不再重试
+    statuses[:] = [429, 200]
+    limiter.blocked_until = 0.0
+    await adapter.client.aclose()
+    adapter.client = httpx.AsyncClient(
+        base_url="https://api.test",
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(statuses.pop(0), headers={"Retry-After": "5"})
+        )
+    )
+    with deadline_scope(1.0):
+        result = await adapter.analyze({"raw_text": "z"})
+    assert result["conclusion"].startswith("分析失败")
+    assert statuses == [200]
+    await adapter.close()
+
+def test_adaptive_limiter_aimd_window():
+    """Test the window grows on healthy latency and shrinks on congestion"""
+    from app.core.neural.limiter import AdaptiveLimiter, parse_retry_after
+
+    limiter = AdaptiveLimiter(initial=4, min_limit=1, max_limit=6)
+    for _ in range(20):
+        limiter.on_success(1.0)
+    assert limiter.limit == 6
+
+    limiter.on_success(5.0)
+    assert limiter.limit == pytest.approx(5.4)
+
+    limiter.on_throttle(retry_after=1.0)
+    assert limiter.limit == pytest.approx(2.7)
+    assert limiter.blocked_until > 0
+
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+@pytest.mark.asyncio
+async def test_adapters_share_pooled_http_client(monkeypatch):
+    """Test adapters created by the factory reuse one pooled client"""
+    from app.core.neural.engine import InferenceEngineFactory
+    from app.core.neural.http import HTTP2_AVAILABLE, HTTPClientRegistry
+    import app.core.neural.engine as engine_module
+
+    registry = HTTPClientRegistry(max_connections=4)
+    monkeypatch.setattr(engine_module, "http_clients", registry)
+    monkeypatch.setenv("INFERENCE_MODE", "api")
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test-key")
+
+    first = InferenceEngineFactory.create()
+    second = InferenceEngineFactory.create()
+    assert first.client is second.client
+    assert len(registry) == 1
+    if HTTP2_AVAILABLE:
+        assert first.client._transport._pool._http2 is True
+
+    # 共享客户端不随单个适配器关闭
+    await first.close()
+    assert not second.client.is_closed
+
+    await registry.aclose()
+    assert second.client.is_closed
+    assert len(registry) == 0
+
+@pytest.mark.asyncio
+async def test_local_model_adapter_batches_concurrent_calls():
+    """Test concurrent local analyze calls are dispatched as micro-batches"""
+    import asyncio
+    from app.core.neural.engine import LocalModelAdapter
+    from app.core.neural.local_backends import StubBackend
+
+    backend = StubBackend()
+    adapter = LocalModelAdapter("stub-model", backend=backend, max_batch_size=4, max_wait=0.05)
+
+    results = await asyncio.gather(*[adapter.analyze({"raw_text": str(i)}) for i in range(10)])
+
+    assert len(results) == 10
+    assert all(r["conclusion"] == "本地模型分析占位" for r in results)
+    assert backend.batch_sizes == [4, 4, 2]
+    assert adapter.batcher.batches == 3
+
+    # 单个请求在等待窗口结束后单独成批
+    await adapter.analyze({"raw_text": "solo"})
+    assert backend.batch_sizes[-1] == 1
+
+def test_local_backend_requires_vllm_unless_stub_is_explicit(monkeypatch):
+    """Test INFERENCE_MODE=local fails loudly without vllm instead of serving stub results"""
+    from app.core.config import settings
+    from app.core.neural import local_backends
+    from app.core.neural.engine import InferenceEngineFactory
+    from app.core.neural.local_backends import StubBackend
+
+    monkeypatch.setattr(local_backends, "VLLM_AVAILABLE", False)
+    monkeypatch.setenv("INFERENCE_MODE", "local")
+    monkeypatch.setenv("LOCAL_MODEL_PATH", "/models/x")
+
+    for kind in ("", "vllm"):
+        monkeypatch.setattr(settings, "LOCAL_BACKEND", kind)
+        with pytest.raises(RuntimeError, match="vllm"):
+            InferenceEngineFactory.create()
+
+    monkeypatch.setattr(settings, "LOCAL_BACKEND", "stub")
+    assert isinstance(InferenceEngineFactory.create().backend, StubBackend)
+
+@pytest.mark.asyncio
+async def test_micro_batcher_propagates_batch_errors():
+    """Test a failing batch fails every caller in it and later batches still run"""
+    import asyncio
+    from app.core.neural.batching import MicroBatcher
+
+    calls = []
+
+    async def batch_fn(items):
+        calls.append(list(items))
+        if "bad" in items:
+            raise RuntimeError("backend down")
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait=0.01)
+    results = await asyncio.gather(
+        batcher.submit("bad"), batcher.submit("x"), batcher.submit("y"),
+        return_exceptions=True
+    )
+    assert isinstance(results[0], RuntimeError) and isinstance(results[1], RuntimeError)
+    assert results[2] == "Y"
+    assert calls == [["bad", "x"], ["y"]]
+
+def test_compact_document_keeps_balance_sheet_rows():
+    """Test compaction keeps balance-sheet rows, normalizes numbers and honours the budget"""
+    from app.core.neural.prompts.compaction import compact_document, estimate_tokens, normalize_numbers
+
+    assert normalize_numbers("资产总计 1,234,567.00") == "资产总计 1234567"
+    assert normalize_numbers("净利润 （１２,０００.50）") == "净利润 -12000.50"
+    # 不是金额的数字保持原样
+    assert normalize_numbers("资产总计,1000,2000") == "资产总计,1000,2000"
+    assert normalize_numbers("截至2023.10.31") == "截至2023.10.31"
+    assert normalize_numbers("报告期 2022，2023 年") == "报告期 2022,2023 年"
+    assert normalize_numbers("（2023年）") == "(2023年)"
+    assert normalize_numbers("增长 (5") == "增长 (5"
+
+    document = "\n".join([
+        "某某股份有限公司 2023 年年度报告",
+        "第一节 重要提示：董事会保证本报告内容真实、准确、完整。" * 5,
+        "合并资产负债表",
+        "项目    期末余额    期初余额",
+        "货币资金    1,000.00    900.00",
+        "资产总计    10,000.00    9,000.00",
+        "负债合计    6,000.00    5,500.00",
+        "所有者权益合计    4,000.00    3,500.00",
+        "第五节 管理层讨论与分析：报告期内公司业务稳步发展。" * 5,
+    ])
+
+    result = compact_document(document, token_budget=0)
+    lines = result.text.splitlines()
+    assert lines[0] == "合并资产负债表"
+    assert "项目 期末余额 期初余额" in lines
+    assert "资产总计 10000 9000" in lines
+    assert not any("管理层讨论" in line for line in lines)
+    assert result.tokens < result.original_tokens
+
+    # 预算紧张时优先保留合计行，输出仍按原文顺序
+    budget = sum(estimate_tokens(line) for line in ["资产总计 10000 9000", "负债合计 6000 5500"])
+    tight = compact_document(document, token_budget=budget).text.splitlines()
+    assert tight[:2] == ["资产总计 10000 9000", "负债合计 6000 5500"]
+    assert all("资产负债表" not in line for line in tight)
+
+    # 没有相关行时按预算截取开头
+    fallback = compact_document("第一行\n第二行\n第三行", token_budget=estimate_tokens("第一行"))
+    assert fallback.text == "第一行"
+
+def test_user_prompt_embeds_raw_text_verbatim():
+    """Test raw documents are embedded without dict escaping"""
+    from app.core.neural.prompts.audit import build_user_prompt
+
+    prompt = build_user_prompt({"raw_text": "资产总计 100\n负债合计 60"})
+    assert "资产总计 100\n负债合计 60" in prompt
+    assert "{'raw_text'" not in prompt
+    assert '"资产总计": 100' in build_user_prompt({"资产总计": 100})
+
+def test_split_sections_by_statement_headings():
+    """Test annual reports split into statements; note sub-headings stay in the notes"""
+    from app.core.neural.prompts.sections import split_sections
+
+    document = (
+        "某公司 2023 年年度报告\n"
+        "## 一、合并资产负债表\n资产总计 500.00\n"
+        "## 二、合并利润表\n营业收入 1,000.00\nNet cash flow from operations 12,345\n"
+        "## 三、合并现金流量表\n经营活动产生的现金流量净额 80.00\n"
+        "## 四、财务报表附注\n资产负债表日后事项\n无"
+    )
+    sections = split_sections(document)
+
+    assert list(sections) == ["balance_sheet", "income_statement", "cash_flow", "notes"]
+    assert sections["balance_sheet"].startswith("某公司") and "资产总计 500.00" in sections["balance_sheet"]
+    assert "Net cash flow" in sections["income_statement"]
+    assert sections["notes"].endswith("资产负债表日后事项\n无")
+    assert split_sections("无标题的文本") == {}
+
+def test_extract_snippets_for_violated_fields():
+    """Test retry snippets are the source lines naming the violated fields"""
+    from app.core.neural.prompts.compaction import extract_snippets, field_terms
+
+    assert field_terms("assets.total") == ["assets", "资产总计", "资产合计", "总资产"]
+    document = "资产负债表\n资产总计 5,000,000.00\n负债合计 3,000,000.00\n附注：略"
+    assert extract_snippets(document, field_terms("assets.total")) == ["资产总计 5000000"]
+    assert extract_snippets(document, []) == []
+
+@pytest.mark.asyncio
+async def test_adapter_against_mock_llm_server():
+    """Test the adapter talks to the bundled OpenAI-compatible stand-in server"""
+    import httpx
+    from app.core.neural.limiter import AdaptiveLimiter
+    from app.core.neural.singleflight import SingleFlight
+    from benchmarks.mock_llm_server import MockLLMConfig, create_app, parse_latency
+
+    def make_adapter(app, **kwargs):
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://mock")
+        return DeepSeekAPIAdapter(
+            "mock", base_url="http://mock", client=client,
+            single_flight=SingleFlight(), limiter=AdaptiveLimiter(), **kwargs
+        )
+
+    app = create_app(MockLLMConfig(seed=1, chunk_size=7))
+    adapter = make_adapter(app)
+    result = await adapter.analyze({"raw_text": "资产总计 100"})
+    total = result["extracted_data"]["assets"]["total"]
+    assert total == result["extracted_data"]["liabilities"]["total"] + result["extracted_data"]["equity"]["total"]
+
+    streaming = make_adapter(app, stream=True)
+    events = [event async for event in streaming.analyze_stream({"raw_text": "资产总计 200"})]
+    assert events[-1]["event"] == "done"
+    assert "extracted_data" in events[-1]["result"]
+    assert app.state.stats.completed == 2 and app.state.stats.in_flight == 0
+
+    # 录制响应按顺序回放
+    replay = make_adapter(create_app(MockLLMConfig(responses=['{"conclusion": "回放"}'])))
+    assert (await replay.analyze({"raw_text": "x"}))["conclusion"] == "回放"
+
+    # 429 注入：重试用尽后返回降级结果
+    throttled_app = create_app(MockLLMConfig(throttle_rate=1.0, retry_after=None))
+    throttled = make_adapter(throttled_app, max_retries=1)
+    result = await throttled.analyze({"raw_text": "y"})
+    assert result["confidence"] == 0.0
+    assert throttled_app.state.stats.throttled == 2
+
+    assert parse_latency("fixed:0.5")(None) == 0.5
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1")
+
+@pytest.mark.asyncio
+async def test_routing_adapter_prefers_fast_endpoint_and_hedges():
+    """Test routing picks the fastest healthy endpoint, fails over and hedges slow calls"""
+    import asyncio
+    from app.core.neural.engine import InferenceEngineAdapter
+    from app.core.neural.routing import RoutingAdapter
+
+    class FakeEndpoint(InferenceEngineAdapter):
+        def __init__(self, name, delay, fail=False):
+            self.name, self.delay, self.fail, self.calls = name, delay, fail, 0
+
+        async def analyze(self, data, feedback=None):
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                return {"conclusion": "分析失败: boom", "confidence": 0.0, "extracted_data": {}}
+            return {"conclusion": self.name, "confidence": 0.9, "extracted_data": {}}
+
+    fast, slow = FakeEndpoint("fast", 0.001), FakeEndpoint("slow", 0.02)
+    router = RoutingAdapter([("slow", slow), ("fast", fast)], hedge=False)
+    # 两个端点都先被探测一次，之后稳定选择更快的端点
+    for _ in range(6):
+        await router.analyze({})
+    assert slow.calls == 1
+    assert (await router.analyze({}))["conclusion"] == "fast"
+
+    # 失败的端点被切换，连续失败后进入冷却
+    broken = FakeEndpoint("broken", 0.0, fail=True)
+    router = RoutingAdapter([("broken", broken), ("fast", fast)], hedge=False, max_failures=1)
+    assert (await router.analyze({}))["conclusion"] == "fast"
+    assert router.ranked()[0][0] == "fast"
+    assert router.snapshot()["broken"]["error_rate"] > 0
+
+    # 主端点突然变慢：超过其 p95 后对冲到次优端点
+    primary, backup = FakeEndpoint("primary", 0.001), FakeEndpoint("backup", 0.005)
+    router = RoutingAdapter([("primary", primary), ("backup", backup)], min_samples=3, min_hedge_delay=0.0)
+    router.stats["backup"].record_success(0.005)
+    for _ in range(3):
+        await router.analyze({})
+    primary.delay = 1.0
+    result = await asyncio.wait_for(router.analyze({}), timeout=0.5)
+    assert result["conclusion"] == "backup"
+    assert router.stats["backup"].hedges == 1
+
+    # 缓存命中不计入端点延迟，不会把对冲等待时间压到下限
+    class CachedEndpoint(FakeEndpoint):
+        async def analyze(self, data, feedback=None):
+            if data.get("cached"):
+                return {"conclusion": self.name, "confidence": 0.9, "extracted_data": {}, "cache_hit": True}
+            return await super().analyze(data, feedback)
+
+    cached = CachedEndpoint("cached", 0.02)
+    router = RoutingAdapter([("cached", cached)], min_samples=3, min_hedge_delay=0.001)
+    for index in range(12):
+        await router.analyze({"cached": index % 4 != 0})
+    assert router.stats["cached"].samples == 3
+    assert router.stats["cached"].requests == 3
+    assert router.stats["cached"].quantile(0.95) >= 0.02
+    assert router.stats["cached"].latency_ewma >= 0.02
+
+    with pytest.raises(ValueError):
+        RoutingAdapter([])
+
+
+@pytest.mark.asyncio
+async def test_routing_adapter_ranks_always_failing_endpoint_last():
+    """Test an endpoint that has only ever failed doesn't outrank a healthy one or receive hedges"""
+    import asyncio
+    from app.core.neural.engine import InferenceEngineAdapter
+    from app.core.neural.routing import RoutingAdapter
+
+    class FakeEndpoint(InferenceEngineAdapter):
+        def __init__(self, name, delay, fail=False):
+            self.name, self.delay, self.fail, self.calls = name, delay, fail, 0
+
+        async def analyze(self, data, feedback=None):
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                return {"conclusion": "分析失败: boom", "confidence": 0.0, "extracted_data": {}}
+            return {"conclusion": self.name, "confidence": 0.9, "extracted_data": {}}
+
+    dead, healthy = FakeEndpoint("dead", 0.0, fail=True), FakeEndpoint("healthy", 0.002)
+    router = RoutingAdapter(
+        [("dead", dead), ("healthy", healthy)],
+        min_samples=2, min_hedge_delay=0.0, max_failures=100
+    )
+    for _ in range(20):
+        assert (await router.analyze({}))["conclusion"] == "healthy"
+
+    # 只被探测一次，之后流量全部落在健康端点，也不作为对冲端点
+    assert dead.calls == 1
+    assert healthy.calls == 20
+    assert router.stats["dead"].hedges == 0
+    assert router.ranked()[0][0] == "healthy"
+    assert router.stats["dead"].score() == float("inf")
+
+def test_factory_builds_routing_adapter(monkeypatch):
+    """Test INFERENCE_MODE=routing builds one adapter per configured endpoint"""
+    from app.core.neural.engine import InferenceEngineFactory, LocalModelAdapter
+    from app.core.config import settings
+    from app.core.neural.routing import RoutingAdapter
+
+    monkeypatch.setenv("INFERENCE_MODE", "routing")
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "key")
+    monkeypatch.setattr(settings, "LOCAL_BACKEND", "stub")
+    monkeypatch.setattr(settings, "INFERENCE_ENDPOINTS", "http://a.example, http://b.example,local:/models/x")
+    monkeypatch.setattr(settings, "LLM_HEDGE", False)
+
+    adapter = InferenceEngineFactory.create()
+    assert isinstance(adapter, RoutingAdapter)
+    assert [name for name, _ in adapter.endpoints] == ["http://a.example", "http://b.example", "local:/models/x"]
+    assert adapter.endpoints[1][1].base_url == "http://b.example"
+    assert isinstance(adapter.endpoints[2][1], LocalModelAdapter)
+    assert adapter.hedge is False
+
+    monkeypatch.setattr(settings, "INFERENCE_ENDPOINTS", "")
+    with pytest.raises(ValueError):
+        InferenceEngineFactory.create()
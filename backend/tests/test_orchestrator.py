@@ -64,3 +64,372 @@ async def test_audit_flow_retry_logic(orchestrator):
     assert result["validation_result"] == "APPROVED"
     assert result["retry_count"] == 1
     assert len(result["feedback_history"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_fail_fast_on_intermediate_attempts_only(orchestrator, monkeypatch):
+    """Test intermediate attempts use fail-fast and the last attempt runs a full pass"""
+    from app.core.config import settings
+    from app.core.orchestrator.graph import MAX_RETRIES
+
+    monkeypatch.setattr(settings, "SYMBOLIC_FAIL_FAST", True)
+
+    orchestrator.symbolic_engine.validate.return_value = {
+        "status": "REJECTED",
+        "violations": [{"rule_id": "R1"}],
+        "complete": False
+    }
+
+    result = await orchestrator.run({"raw_document": "doc", "retry_count": 0, "feedback_history": []})
+
+    calls = orchestrator.symbolic_engine.validate.call_args_list
+    assert result["retry_count"] == MAX_RETRIES
+    assert [c.kwargs["fail_fast"] for c in calls] == [True] * MAX_RETRIES + [False]
+    # 不完整的结果不作为增量校验基准
+    assert all(c.kwargs["previous_data"] is None for c in calls)
+
+
+@pytest.mark.asyncio
+async def test_retry_validates_incrementally_against_previous_attempt(orchestrator, tmp_path):
+    """Test with the default config a retry only re-evaluates rules reading changed fields"""
+    import json
+    from app.core.symbolic.cache import RulesetCache
+    from app.core.symbolic.engine import SymbolicEngine
+
+    rules_dir = tmp_path / "rules"
+    rules_dir.mkdir()
+    for rule_id, field in [("T1", "a"), ("T2", "b")]:
+        rule = {
+            "rule_id": rule_id,
+            "name": rule_id,
+            "category": "ACCOUNTING",
+            "severity": "CRITICAL",
+            "expression": {"operator": "equals", "left": f"$.{field}", "right": 0},
+            "correction_hint": ""
+        }
+        (rules_dir / f"{rule_id}.json").write_text(json.dumps(rule), encoding="utf-8")
+    engine = SymbolicEngine(rules_dir=str(rules_dir), ruleset_cache=RulesetCache())
+    engine.load_rules()
+    engine.validate = MagicMock(wraps=engine.validate)
+    affected = []
+    original_affected = engine._affected_rules
+
+    def record_affected(*args):
+        affected.append(original_affected(*args))
+        return affected[-1]
+
+    engine._affected_rules = record_affected
+    orchestrator.symbolic_engine = engine
+
+    orchestrator.neural_engine.analyze.side_effect = [
+        {"extracted_data": {"a": 0, "b": 1}},
+        {"extracted_data": {"b": 0}},
+    ]
+    result = await orchestrator.run({"raw_document": "doc", "retry_count": 0, "feedback_history": []})
+
+    assert result["validation_result"] == "APPROVED"
+    assert result["retry_count"] == 1
+    first, second = engine.validate.call_args_list
+    assert first.kwargs["previous_data"] is None
+    assert second.kwargs["previous_data"] == {"a": 0, "b": 1}
+    assert second.kwargs["fail_fast"] is False
+    # 增量校验：只有读取 b 的规则需要重新求值
+    assert affected == [{1}]
+
+
+@pytest.mark.asyncio
+async def test_streaming_validates_before_response_completes(orchestrator):
+    """Test extracted_data is validated while the rest of the response streams"""
+    order = []
+
+    async def analyze_stream(data, feedback=None):
+        yield {"event": "field", "key": "extracted_data", "value": {"a": 1}}
+        order.append("reasoning_chain")
+        yield {"event": "field", "key": "reasoning_chain", "value": ["s1"]}
+        yield {"event": "done", "result": {"extracted_data": {"a": 1}, "reasoning_chain": ["s1"]}}
+
+    def validate(*args, **kwargs):
+        order.append("validate")
+        return {"status": "APPROVED", "violations": []}
+
+    events = []
+    orchestrator.neural_engine.stream = True
+    orchestrator.neural_engine.analyze_stream = analyze_stream
+    orchestrator.symbolic_engine.validate.side_effect = validate
+    orchestrator.progress_callback = events.append
+
+    result = await orchestrator.run({"raw_document": "doc", "retry_count": 0, "feedback_history": []})
+
+    assert result["validation_result"] == "APPROVED"
+    # 校验先于 reasoning_chain 完成，且最终节点复用了提前校验的结果
+    assert order == ["validate", "reasoning_chain"]
+    assert {"stage": "verdict", "retry_count": 0, "status": "APPROVED", "violations": 0} in events
+
+@pytest.mark.asyncio
+async def test_retry_sends_delta_prompt_and_merges_patch(orchestrator):
+    """Test retries send only the violated fields and merge the returned patch"""
+    from app.core.neural.prompts.audit import CORRECTION_KEY, build_user_prompt
+
+    orchestrator.neural_engine.analyze.side_effect = [
+        {"extracted_data": {"资产总计": 90, "负债总计": 60, "权益总计": 40}},
+        {"extracted_data": {"资产总计": 100}},
+    ]
+    orchestrator.symbolic_engine.validate.side_effect = [
+        {"status": "REJECTED", "violations": [{"rule_id": "balance"}]},
+        {"status": "APPROVED", "violations": []},
+    ]
+    orchestrator.symbolic_engine.violation_fields.return_value = ["$.资产总计"]
+
+    document = "资产负债表\n资产总计 100.00\n负债总计 60.00\n管理层讨论与分析"
+    result = await orchestrator.run({"raw_document": document, "retry_count": 0, "feedback_history": []})
+
+    first, second = orchestrator.neural_engine.analyze.call_args_list
+    assert CORRECTION_KEY not in first.kwargs["data"]
+    correction = second.kwargs["data"][CORRECTION_KEY]
+    assert correction["fields"] == ["资产总计"]
+    assert correction["snippets"] == ["资产总计 100"]
+    assert correction["extracted_data"]["资产总计"] == 90
+
+    prompt = build_user_prompt(second.kwargs["data"], "Mock Feedback")
+    assert "管理层讨论" not in prompt and "资产总计 100" in prompt
+
+    assert result["validation_result"] == "APPROVED"
+    assert result["extracted_data"] == {"资产总计": 100, "负债总计": 60, "权益总计": 40}
+    validated = orchestrator.symbolic_engine.validate.call_args_list[1].args[0]
+    assert validated["extracted_data"]["负债总计"] == 60
+
+@pytest.mark.asyncio
+async def test_checkpoint_resumes_without_recalling_llm(orchestrator, monkeypatch):
+    """Test an interrupted audit resumes after the last completed node"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "AUDIT_SPECULATIVE", False)
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.core.orchestrator.checkpoint import CheckpointStore, deserialize_state, serialize_state
+    from app.models.database import Base
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    orchestrator.checkpoint_store = CheckpointStore(sessionmaker(bind=engine))
+
+    orchestrator.neural_engine.analyze.return_value = {"extracted_data": {"a": 1}, "reasoning_chain": ["s1"]}
+    orchestrator.symbolic_engine.validate.side_effect = [
+        RuntimeError("worker killed"),
+        {"status": "APPROVED", "violations": []},
+    ]
+    initial = {"raw_document": "doc", "retry_count": 0, "feedback_history": []}
+
+    with pytest.raises(RuntimeError):
+        await orchestrator.run(initial, thread_id="audit-1")
+    checkpoint = orchestrator.checkpoint_store.load("audit-1")
+    assert (checkpoint.next_node, checkpoint.step) == ("symbolic_validate", 2)
+    assert "raw_document" not in checkpoint.state
+
+    events = []
+    orchestrator.progress_callback = events.append
+    result = await orchestrator.run(initial, thread_id="audit-1")
+    assert result["validation_result"] == "APPROVED"
+    assert result["extracted_data"] == {"a": 1}
+    assert orchestrator.neural_engine.analyze.await_count == 1
+    assert {"stage": "resume", "node": "symbolic_validate", "step": 2} in events
+    assert orchestrator.checkpoint_store.load("audit-1").step == 4
+
+    # 流程已结束：直接返回保存的状态
+    again = await orchestrator.run(initial, thread_id="audit-1")
+    assert again["final_report"]["status"] == "APPROVED"
+    assert orchestrator.neural_engine.analyze.await_count == 1
+
+    orchestrator.discard_checkpoint("audit-1")
+    assert orchestrator.checkpoint_store.load("audit-1") is None
+
+    state = {"raw_document": "x" * 1000, "violations": [], "retry_count": 0, "validation_complete": False}
+    assert deserialize_state(serialize_state(state)) == {"retry_count": 0, "validation_complete": False}
+
+
+@pytest.mark.asyncio
+async def test_fast_path_skips_llm_for_high_confidence_indicators(orchestrator):
+    """Test parser indicators that pass every CRITICAL rule go straight to the report"""
+    from app.core.orchestrator.graph import indicators_to_extracted_data
+    from app.models.schemas import ConfidenceLevel, FinancialIndicators
+
+    indicators = FinancialIndicators(
+        total_assets=500.0, current_assets=300.0, non_current_assets=200.0,
+        total_liabilities=300.0, current_liabilities=200.0, non_current_liabilities=100.0,
+        total_equity=200.0, cash=50.0, confidence=ConfidenceLevel.HIGH
+    )
+    data = indicators_to_extracted_data(indicators)
+    assert data["assets"]["total"] == 500.0 and data["equity"]["total"] == 200.0
+    assert data["cash"] == 50.0 and "inventory" not in data
+
+    orchestrator.symbolic_engine.validate.return_value = {
+        "status": "REJECTED",
+        "violations": [{"rule_id": "W1", "severity": "WARNING"}]
+    }
+    result = await orchestrator.run({"raw_document": "doc", "indicators": indicators.model_dump()})
+
+    orchestrator.neural_engine.analyze.assert_not_called()
+    assert result["neural_output"]["fast_path"] is True
+    assert result["extracted_data"] == data
+    assert result["final_report"]["violations"] == [{"rule_id": "W1", "severity": "WARNING"}]
+    # 快速通道做全量校验
+    assert orchestrator.symbolic_engine.validate.call_args.kwargs["fail_fast"] is False
+
+@pytest.mark.asyncio
+async def test_fast_path_falls_back_to_llm(orchestrator, monkeypatch):
+    """Test low-confidence indicators or CRITICAL violations still go through the LLM"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "AUDIT_SPECULATIVE", False)
+    low = {"total_assets": 500.0, "confidence": "low"}
+    await orchestrator.run({"raw_document": "doc", "indicators": low})
+    assert orchestrator.neural_engine.analyze.await_count == 1
+
+    orchestrator.symbolic_engine.validate.side_effect = [
+        {"status": "REJECTED", "violations": [{"rule_id": "R001", "severity": "CRITICAL"}]},
+        {"status": "APPROVED", "violations": []},
+    ]
+    result = await orchestrator.run({"raw_document": "doc", "indicators": {**low, "confidence": "high"}})
+    assert orchestrator.neural_engine.analyze.await_count == 2
+    assert result["validation_result"] == "APPROVED"
+    assert not result["neural_output"].get("fast_path")
+
+@pytest.mark.asyncio
+async def test_speculative_parser_wins_and_cancels_llm(orchestrator):
+    """Test an approved parser extraction is accepted and the in-flight LLM call cancelled"""
+    import asyncio
+
+    llm_cancelled = asyncio.Event()
+
+    async def slow_analyze(data, feedback=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            llm_cancelled.set()
+            raise
+
+    orchestrator.neural_engine.analyze = slow_analyze
+    events = []
+    orchestrator.progress_callback = events.append
+    document = "资产负债表\n资产总计：500\n负债合计：300\n所有者权益合计：200"
+
+    result = await asyncio.wait_for(orchestrator.run({"raw_document": document}), 1)
+
+    assert llm_cancelled.is_set()
+    assert result["validation_result"] == "APPROVED"
+    assert result["neural_output"]["source"] == "parser"
+    assert result["extracted_data"]["assets"]["total"] == 500.0
+    assert {"stage": "speculative", "winner": "parser", "llm_cancelled": True} in events
+    # 解析器候选的校验结果被复用，不再重复校验
+    assert orchestrator.symbolic_engine.validate.call_count == 1
+
+@pytest.mark.asyncio
+async def test_speculative_falls_back_to_llm_when_parser_rejected(orchestrator):
+    """Test a rejected parser candidate leaves the LLM result in charge"""
+    import asyncio
+
+    async def analyze(data, feedback=None):
+        await asyncio.sleep(0.05)
+        return {"extracted_data": {"a": 1}}
+
+    orchestrator.neural_engine.analyze.side_effect = analyze
+    def validate(output, **kwargs):
+        if "assets" in output["extracted_data"]:
+            return {"status": "REJECTED", "violations": [{"rule_id": "R001", "severity": "CRITICAL"}]}
+        return {"status": "APPROVED", "violations": []}
+
+    orchestrator.symbolic_engine.validate.side_effect = validate
+    document = "资产总计：500\n负债合计：100\n所有者权益合计：200"
+
+    result = await orchestrator.run({"raw_document": document})
+
+    assert orchestrator.neural_engine.analyze.await_count == 1
+    assert result["validation_result"] == "APPROVED"
+    assert result["extracted_data"] == {"a": 1}
+    assert orchestrator.symbolic_engine.validate.call_count == 2
+
+    # 解析器抽不到指标时只有大模型候选
+    orchestrator.symbolic_engine.validate.side_effect = None
+    await orchestrator.run({"raw_document": "无表格文本"})
+    assert orchestrator.symbolic_engine.validate.call_count == 3
+
+@pytest.mark.asyncio
+async def test_section_fanout_merges_and_retries_violated_sections(orchestrator, monkeypatch):
+    """Test statements are analyzed concurrently within the bound and retries re-run only violated sections"""
+    import asyncio
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "AUDIT_SECTION_CONCURRENCY", 2)
+    orchestrator.section_fanout = True
+    orchestrator.graph = orchestrator._build_graph()
+
+    outputs = {
+        "资产负债表": [
+            {"assets": {"total": 90}, "equity": {"total": 40}},
+            {"assets": {"total": 100}, "equity": {"total": 40}},
+        ],
+        "利润表": [{"revenue": 10}],
+        "现金流量表": [{"operating_cash_flow": 5, "assets": {"total": 1}}],
+    }
+    calls = []
+    running = 0
+    peak = 0
+
+    async def analyze(data, feedback=None):
+        nonlocal running, peak
+        section = next(label for label in outputs if label in data["raw_text"])
+        calls.append(section)
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        attempt = min(calls.count(section), len(outputs[section])) - 1
+        return {"conclusion": section, "confidence": 0.9, "reasoning_chain": ["s"],
+                "extracted_data": outputs[section][attempt]}
+
+    orchestrator.neural_engine.analyze = analyze
+    orchestrator.symbolic_engine.validate.side_effect = [
+        {"status": "REJECTED", "violations": [{"rule_id": "R001", "severity": "CRITICAL"}]},
+        {"status": "APPROVED", "violations": []},
+    ]
+    orchestrator.symbolic_engine.violation_fields.return_value = ["$.assets.total"]
+    document = (
+        "# 合并资产负债表\n资产总计 100.00\n"
+        "# 合并利润表\n营业收入 10.00\n"
+        "# 合并现金流量表\n经营活动产生的现金流量净额 5.00"
+    )
+
+    result = await orchestrator.run({"raw_document": document})
+
+    assert peak == 2
+    # 首轮三段各一次；重试只重跑产出 assets 的资产负债表与现金流量表
+    assert sorted(calls) == sorted(["资产负债表", "利润表", "现金流量表", "资产负债表", "现金流量表"])
+    assert result["validation_result"] == "APPROVED"
+    # 资产负债表优先于现金流量表，未重跑的段沿用上一轮结果
+    assert result["extracted_data"] == {
+        "assets": {"total": 100}, "equity": {"total": 40}, "revenue": 10, "operating_cash_flow": 5
+    }
+    assert result["neural_output"]["sections"] == ["balance_sheet", "income_statement", "cash_flow"]
+    assert result["neural_output"]["reasoning_chain"][0] == "[资产负债表] s"
+
+@pytest.mark.asyncio
+async def test_speculative_skips_partial_parser_extraction(orchestrator):
+    """Test a parse missing fields read by CRITICAL rules never enters the race"""
+    import asyncio
+
+    orchestrator.symbolic_engine.severity_fields.return_value = [
+        "$.assets.total", "$.liabilities.total", "$.equity.total"
+    ]
+    async def analyze(data, feedback=None):
+        await asyncio.sleep(0.05)
+        return {"extracted_data": {"a": 1}}
+
+    orchestrator.neural_engine.analyze.side_effect = analyze
+
+    result = await orchestrator.run({"raw_document": "资产总计：500\n管理层讨论与分析"})
+
+    orchestrator.symbolic_engine.severity_fields.assert_called_with("CRITICAL")
+    assert orchestrator.neural_engine.analyze.await_count == 1
+    assert result["extracted_data"] == {"a": 1}
+    # 只有大模型结果被校验
+    assert orchestrator.symbolic_engine.validate.call_count == 1
+    assert orchestrator.symbolic_engine.validate.call_args.args[0]["extracted_data"] == {"a": 1}
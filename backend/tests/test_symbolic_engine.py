@@ -86,3 +86,409 @@ def test_generate_feedback_from_violations():
     assert "500万" in feedback
     assert "450万" in feedback
     assert "核验数据提取" in feedback
+
+def test_compiled_expression_evaluates_balance_rule():
+    """Test compiled evaluators follow the equals/add semantics"""
+    from app.core.symbolic.compiler import compile_expression
+
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+    rule = next(r for r in engine.rules if r.rule_id == "R001")
+
+    samples = [
+        {"assets": {"total": 100}, "liabilities": {"total": 60}, "equity": {"total": 40}},
+        {"assets": {"total": 100}, "liabilities": {"total": 60}, "equity": {"total": 30}},
+        {"assets": {"total": 100}, "liabilities": {"total": 60}},
+        {},
+    ]
+    evaluator = compile_expression(rule.expression)
+    assert [evaluator(data) for data in samples] == [True, False, False, False]
+
+def test_compiler_folds_constant_operands():
+    """Test literal operands are folded at compile time"""
+    from app.core.symbolic.compiler import compile_expression
+
+    expression = {
+        "operator": "equals",
+        "left": "$.total",
+        "right": {"operator": "add", "operands": [10, 20, "$.extra"]},
+        "tolerance": 0.5
+    }
+    evaluator = compile_expression(expression)
+
+    assert evaluator({"total": 35, "extra": 5}) is True
+    assert evaluator({"total": 35, "extra": 6}) is False
+    assert evaluator({"total": 35}) is False
+
+    constant = compile_expression({"operator": "add", "operands": [1, 2]})
+    assert constant({}) == 3.0
+
+def test_ruleset_shares_common_subexpressions():
+    """Test structurally equal subexpressions are evaluated once per memo"""
+    from app.core.symbolic.compiler import compile_ruleset
+
+    total = {"operator": "add", "operands": ["$.liabilities", "$.equity"]}
+    program = compile_ruleset([
+        {"operator": "equals", "left": "$.assets", "right": dict(total)},
+        {"operator": "equals", "left": "$.check", "right": dict(total), "tolerance": 1}
+    ])
+    assert program.shared_count == 1
+
+    class CountingData(dict):
+        reads = 0
+
+        def get(self, key, default=None):
+            CountingData.reads += 1
+            return super().get(key, default)
+
+    data = CountingData(assets=100, liabilities=60, equity=40, check=99.5)
+    memo = {}
+    assert [evaluate(data, memo) for evaluate in program.evaluators] == [True, True]
+    # assets + check + 一次 liabilities/equity
+    assert CountingData.reads == 4
+
+    # 渲染违规时直接读取备忘，不再重新求值
+    _, right = program.operands[0]
+    assert right(data, memo) == 100
+    assert CountingData.reads == 4
+
+def test_violation_renders_operand_values():
+    """Test violation text shows formatted operand values"""
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+
+    result = engine.validate({
+        "extracted_data": {
+            "assets": {"total": 5000000},
+            "liabilities": {"total": 3000000},
+            "equity": {"total": 1500000}
+        }
+    })
+    violation = next(v for v in result.violations if v["rule_id"] == "R001")
+    assert violation["expected"] == "500万 = 450万"
+    assert violation["actual"] == "500万 ≠ 450万"
+
+def test_violation_text_is_rendered_on_demand():
+    """Test violations keep operand values and render text only when read"""
+    import json
+
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+
+    result = engine.validate({
+        "extracted_data": {
+            "assets": {"total": 5000000},
+            "liabilities": {"total": 3000000},
+            "equity": {"total": 1500000}
+        }
+    })
+    violation = next(v for v in result.violations if v["rule_id"] == "R001")
+    assert violation.operands == (5000000, 4500000)
+    assert violation._text is None
+
+    rendered = violation.to_dict()
+    assert violation._text is not None
+    assert rendered == dict(violation)
+    assert violation == rendered
+    assert json.loads(json.dumps(rendered))["actual"] == "500万 ≠ 450万"
+
+def test_profiler_records_per_rule_stats(capsys):
+    """Test per-rule timing, violation and error counters"""
+    from app.core.symbolic.profiler import RuleProfiler
+
+    profiler = RuleProfiler(enabled=True)
+    engine = SymbolicEngine(rules_dir="../rules", profiler=profiler)
+    engine.load_rules()
+
+    balanced = {"assets": {"total": 100}, "liabilities": {"total": 60}, "equity": {"total": 40}}
+    broken = {"assets": {"total": "abc"}, "liabilities": {"total": 60}, "equity": {"total": 40}}
+    engine.validate({"extracted_data": balanced})
+    engine.validate({"extracted_data": {**balanced, "equity": {"total": 30}}})
+    engine.validate({"extracted_data": broken})
+    engine.validate({"extracted_data": broken})
+
+    stats = next(s for s in profiler.snapshot() if s["rule_id"] == "R001")
+    assert stats["calls"] == 2
+    assert stats["violations"] == 1
+    assert stats["violation_rate"] == 0.5
+    assert stats["errors"] == 2
+    assert stats["total_ns"] > 0
+    # 同一规则的异常只警告一次
+    assert capsys.readouterr().out.count("Failed to validate rule R001") == 1
+
+    engine.validate_batch([balanced, {**balanced, "equity": {"total": 30}}])
+    stats = next(s for s in profiler.snapshot() if s["rule_id"] == "R001")
+    assert stats["calls"] == 4
+    assert stats["violations"] == 2
+
+def test_validate_batch_matches_single_validation():
+    """Test vectorized batch validation agrees with validate()"""
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+
+    batch = [
+        {"assets": {"total": 5000000}, "liabilities": {"total": 3000000}, "equity": {"total": 2000000}},
+        {"assets": {"total": 5000000}, "liabilities": {"total": 3000000}, "equity": {"total": 1500000}},
+        {"assets": {"total": 5000000}, "liabilities": {"total": 3000000}},
+        {"assets": {"total": "n/a"}, "liabilities": {"total": 3000000}, "equity": {"total": 2000000}},
+    ]
+
+    results = engine.validate_batch(batch)
+
+    assert len(results) == len(batch)
+    for data, result in zip(batch, results):
+        expected = engine.validate({"extracted_data": data})
+        assert result.status == expected.status
+        assert result.violations == expected.violations
+
+def test_severity_fields_lists_paths_of_critical_rules():
+    """Test severity_fields returns the JSON paths read by rules of one severity"""
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+
+    critical = engine.severity_fields("CRITICAL")
+    assert set(critical) >= {"$.assets.total", "$.liabilities.total", "$.equity.total"}
+    assert engine.severity_fields("NONEXISTENT") == []
+
+def test_validate_batch_reuses_vectorized_program(monkeypatch):
+    """Test repeated batches compile the vectorized rules only once per ruleset"""
+    import app.core.symbolic.engine as engine_module
+
+    calls = []
+    compile_vectorized = engine_module.compile_vectorized
+    monkeypatch.setattr(
+        engine_module, "compile_vectorized",
+        lambda expression: calls.append(expression) or compile_vectorized(expression)
+    )
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+    batch = [{"assets": {"total": 100}, "liabilities": {"total": 60}, "equity": {"total": 40}}]
+
+    engine.validate_batch(batch)
+    compiled = len(calls)
+    assert compiled == len(engine.rules)
+    engine.validate_batch(batch * 3)
+    assert len(calls) == compiled
+
+def test_validate_batch_accepts_columnar_table():
+    """Test batch validation over a columnar table keyed by JSON path"""
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+
+    results = engine.validate_batch({
+        "$.assets.total": [100.0, 100.0],
+        "$.liabilities.total": [60.0, 60.0],
+        "equity.total": [40.0, None],
+    })
+
+    assert [r.status for r in results] == ["APPROVED", "REJECTED"]
+    assert results[1].violations[0]["rule_id"] == "R001"
+
+def test_incremental_validation_reevaluates_only_affected_rules():
+    """Test retries only re-run rules whose referenced paths changed"""
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+
+    previous_data = {
+        "assets": {"total": 5000000},
+        "liabilities": {"total": 3000000},
+        "equity": {"total": 1500000}
+    }
+    first = engine.validate({"extracted_data": previous_data})
+    assert first.status == "REJECTED"
+
+    # Unrelated field changed: R001 is carried forward without evaluation
+    unchanged = {**previous_data, "cash": 100}
+    assert engine.affected_rules(previous_data, unchanged) == set()
+    carried = engine.validate(
+        {"extracted_data": unchanged},
+        previous_data=previous_data,
+        previous_violations=first.violations
+    )
+    assert carried.violations == first.violations
+
+    # Referenced field fixed: R001 is re-evaluated and passes
+    fixed = {**previous_data, "equity": {"total": 2000000}}
+    result = engine.validate(
+        {"extracted_data": fixed},
+        previous_data=previous_data,
+        previous_violations=first.violations
+    )
+    assert result.status == "APPROVED"
+
+def test_ruleset_cache_reuses_snapshot_and_hot_reloads(tmp_path, monkeypatch):
+    """Test rules are parsed once per process and reloaded on change"""
+    import json
+    from app.core.symbolic.cache import RulesetCache
+
+    rules_dir = tmp_path / "rules"
+    rules_dir.mkdir()
+    rule_file = rules_dir / "r.json"
+    rule = {
+        "rule_id": "T001",
+        "name": "test",
+        "category": "ACCOUNTING",
+        "severity": "CRITICAL",
+        "expression": {"operator": "equals", "left": "$.a", "right": "$.b"},
+        "correction_hint": ""
+    }
+    rule_file.write_text(json.dumps(rule), encoding="utf-8")
+
+    engine = SymbolicEngine(rules_dir=str(rules_dir), ruleset_cache=RulesetCache())
+    assert engine.load_rules() == 1
+    first_version = engine.ruleset_version
+
+    # Unchanged files are neither re-read by another engine nor by a refresh
+    from pathlib import Path
+    with monkeypatch.context() as m:
+        m.setattr(Path, "read_bytes", lambda self: pytest.fail("rule file was re-read"))
+        other = SymbolicEngine(rules_dir=str(rules_dir), ruleset_cache=engine.ruleset_cache)
+        assert other.load_rules() == 1
+        assert engine.ruleset_cache.refresh() is False
+    assert other.ruleset_version == first_version
+
+    # Editing the rule publishes a new snapshot that validate() picks up
+    rule["expression"]["right"] = "$.c"
+    rule_file.write_text(json.dumps(rule) + " ", encoding="utf-8")
+    assert engine.ruleset_cache.refresh() is True
+
+    result = engine.validate({"extracted_data": {"a": 1, "b": 2, "c": 1}})
+    assert engine.ruleset_version != first_version
+    assert result.status == "APPROVED"
+
+def test_fail_fast_stops_at_first_prioritized_violation(tmp_path):
+    """Test fail-fast evaluates critical, frequently failing rules first"""
+    import json
+    from app.core.symbolic.cache import RulesetCache
+    from app.core.symbolic.profiler import RuleProfiler
+
+    rules_dir = tmp_path / "rules"
+    rules_dir.mkdir()
+    for rule_id, severity, field in [("T1", "INFO", "a"), ("T2", "CRITICAL", "b"), ("T3", "CRITICAL", "c")]:
+        rule = {
+            "rule_id": rule_id,
+            "name": rule_id,
+            "category": "ACCOUNTING",
+            "severity": severity,
+            "expression": {"operator": "equals", "left": f"$.{field}", "right": 0},
+            "correction_hint": ""
+        }
+        (rules_dir / f"{rule_id}.json").write_text(json.dumps(rule), encoding="utf-8")
+
+    profiler = RuleProfiler(enabled=True)
+    engine = SymbolicEngine(rules_dir=str(rules_dir), ruleset_cache=RulesetCache(), profiler=profiler)
+    engine.load_rules()
+
+    # 历史上 T3 更常违规
+    for _ in range(3):
+        engine.validate({"extracted_data": {"a": 0, "b": 0, "c": 1}})
+
+    data = {"a": 1, "b": 1, "c": 1}
+    profiler.reset()
+    result = engine.validate({"extracted_data": data}, fail_fast=True)
+    assert result.status == "REJECTED"
+    assert result.complete is False
+    assert [v["rule_id"] for v in result.violations] == ["T3"]
+    assert [s["rule_id"] for s in profiler.snapshot()] == ["T3"]
+
+    full = engine.validate({"extracted_data": data})
+    assert full.complete is True
+    assert len(full.violations) == 3
+
+    approved = engine.validate({"extracted_data": {"a": 0, "b": 0, "c": 0}}, fail_fast=True)
+    assert approved.status == "APPROVED"
+    assert approved.complete is True
+
+def test_result_cache_reuses_outcomes_for_same_field_values():
+    """Test rule outcomes are cached by the values of referenced fields"""
+    from app.core.symbolic.result_cache import ResultCache
+
+    cache = ResultCache(maxsize=100)
+    engine = SymbolicEngine(rules_dir="../rules", result_cache=cache)
+    engine.load_rules()
+    rule_count = len(engine.rules)
+
+    data = {
+        "assets": {"total": 5000000},
+        "liabilities": {"total": 3000000},
+        "equity": {"total": 1500000}
+    }
+    first = engine.validate({"extracted_data": data})
+    assert cache.hits == 0
+    assert cache.misses == rule_count
+
+    # 无关字段不同、引用字段相同的文档直接命中
+    second = engine.validate({"extracted_data": {**data, "note": "resubmitted"}})
+    assert cache.hits == rule_count
+    assert [v.to_dict() for v in second.violations] == [v.to_dict() for v in first.violations]
+
+    engine.validate({"extracted_data": {**data, "equity": {"total": 2000000}}})
+    assert cache.misses > rule_count
+
+    # 不可哈希的字段值不走缓存
+    hits, misses = cache.hits, cache.misses
+    engine.validate({"extracted_data": {**data, "assets": {"total": [1]}}})
+    assert (cache.hits, cache.misses) == (hits, misses)
+
+    small = ResultCache(maxsize=1)
+    small.put("a", 1)
+    small.put("b", 2)
+    assert small.get("a") is None
+    assert small.get("b") == 2
+
+def test_translate_expression_to_zen():
+    """Test rule expressions translate to null-safe ZEN expressions"""
+    from app.core.symbolic.zen_backend import translate_expression
+
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+    rule = next(r for r in engine.rules if r.rule_id == "R001")
+
+    translated = translate_expression(rule.expression)
+
+    assert 'd["assets"]["total"]' in translated
+    assert 'd["liabilities"]["total"]' in translated
+    assert "abs(" in translated
+    assert "<= 0.01" in translated
+
+def test_zen_backend_matches_python_backend():
+    """Test the Zen backend produces the same verdicts as the Python backend"""
+    from app.core.symbolic.zen_backend import ZEN_ENGINE_AVAILABLE
+    if not ZEN_ENGINE_AVAILABLE:
+        pytest.skip("zen-engine not installed")
+
+    python_engine = SymbolicEngine(rules_dir="../rules", backend="python")
+    zen_engine = SymbolicEngine(rules_dir="../rules", backend="zen")
+    python_engine.load_rules()
+    zen_engine.load_rules()
+
+    samples = [
+        {"assets": {"total": 100}, "liabilities": {"total": 60}, "equity": {"total": 40}},
+        {"assets": {"total": 100}, "liabilities": {"total": 60}, "equity": {"total": 30}},
+        {"assets": {"total": 100}, "liabilities": {"total": 60}},
+        {"assets": {"total": "n/a"}, "liabilities": {"total": 60}, "equity": {"total": 40}},
+    ]
+    for data in samples:
+        expected = python_engine.validate({"extracted_data": data})
+        actual = zen_engine.validate({"extracted_data": data})
+        assert actual.status == expected.status
+        assert actual.violations == expected.violations
+
+def test_violation_fields_lists_paths_of_violated_rules():
+    """Test violation_fields maps violations back to the JSON paths their rules read"""
+    engine = SymbolicEngine(rules_dir="../rules")
+    engine.load_rules()
+
+    result = engine.validate({"extracted_data": {
+        "assets": {"total": 5000000},
+        "liabilities": {"total": 3000000},
+        "equity": {"total": 1500000}
+    }})
+    fields = engine.violation_fields(result.violations)
+
+    assert "$.assets.total" in fields
+    assert "$.equity.total" in fields
+    assert len(fields) == len(set(fields))
+    # 以 dict 形式传入的违规同样按 rule_id 查找
+    assert engine.violation_fields([dict(v) for v in result.violations]) == fields
+    assert engine.violation_fields([{"rule_id": "unknown"}]) == []